@@ -1,37 +1,82 @@
 import time
+from typing import TYPE_CHECKING
 
 from app.core.config import Settings
-from app.core.chat_service import ChatService
-from app.rag.service import RAGService
+from app.core.startup import Lazy, resolve
 from app.agents.models import HealerMetrics
-from app.agents.planning import PlanningService
-from app.agents.healer import HealerService
 from app.core.models import ChatMetrics
+from app.rag.ingest_profile import IngestProfile
+from app.rag.jobs import IngestJob, JobManager
+
+# Service modules pull in openai and chromadb; app.main builds them lazily
+if TYPE_CHECKING:
+    from app.agents.healer import HealerService
+    from app.agents.planning import PlanningService
+    from app.core.chat_service import ChatService
+    from app.rag.service import RAGService
 
 # Command constants
 EXIT = "/exit"
 INGEST = "/ingest"
 INGEST_ALL = "/ingest_all"
+JOBS = "/jobs"
+JOB = "/job"
+CANCEL = "/cancel"
 PLAN = "/plan"
 HEAL = "/heal"
 
 SEPARATOR_LINE = "-" * 30
 
 
-def ingest_directory_with_report(rag_service: RAGService, directory_path: str) -> None:
-    print(f"Ingesting documents from {directory_path}...")
+def ingest_directory_with_report(
+    rag_service: "RAGService",
+    directory_path: str,
+    resume: bool = False,
+    profile: IngestProfile | None = None,
+) -> None:
+    """Ingest a directory, printing per-file progress and a summary; with a
+    profile, the summary adds a per-stage timing breakdown."""
+    action = "Resuming ingestion of" if resume else "Ingesting"
+    print(f"{action} documents from {directory_path}...")
     start_time = time.time()
+    rag_service.ingest_profile = profile
 
     try:
-        results_generator = rag_service.ingest_directory(directory_path)
+        results_generator = rag_service.ingest_directory(directory_path, resume=resume)
         total_chunks = 0
-
-        for i, (filename, chunks) in enumerate(results_generator, 1):
-            if chunks > 0:
-                print(f"[{i}] {filename}: {chunks} chunks", flush=True)
-                total_chunks += chunks
+        suppressed_chunks = 0
+        skipped_files = 0
+
+        for i, result in enumerate(results_generator, 1):
+            if result.skipped:
+                print(
+                    f"[{i}] {result.filename}: Skipped (unchanged, {result.chunks} chunks)",
+                    flush=True,
+                )
+                skipped_files += 1
+            elif result.chunks > 0:
+                duplicates = (
+                    f" ({result.suppressed} duplicates suppressed)"
+                    if result.suppressed
+                    else ""
+                )
+                print(
+                    f"[{i}] {result.filename}: {result.chunks} chunks{duplicates}",
+                    flush=True,
+                )
+                total_chunks += result.chunks
+                suppressed_chunks += result.suppressed
+            elif result.failed:
+                print(f"[{i}] {result.filename}: Failed", flush=True)
+            elif result.suppressed:
+                print(
+                    f"[{i}] {result.filename}: Deduplicated "
+                    f"({result.suppressed} duplicates suppressed)",
+                    flush=True,
+                )
+                suppressed_chunks += result.suppressed
             else:
-                print(f"[{i}] {filename}: Failed or Empty", flush=True)
+                print(f"[{i}] {result.filename}: Empty", flush=True)
 
     except ValueError as e:
         print(f"Error: {e}")
@@ -39,6 +84,8 @@ def ingest_directory_with_report(rag_service: RAGService, directory_path: str) -
     except Exception as e:
         print(f"Unexpected Error: {e}")
         return
+    finally:
+        rag_service.ingest_profile = None
 
     end_time = time.time()
     duration = end_time - start_time
@@ -47,37 +94,83 @@ def ingest_directory_with_report(rag_service: RAGService, directory_path: str) -
     print("Ingestion Complete.")
     print(f"Total Time:   {duration:.2f}s")
     print(f"Total Chunks: {total_chunks}")
+    print(f"Skipped:      {skipped_files} unchanged files")
+    saved_seconds = suppressed_chunks * rag_service.embed_seconds_per_chunk
+    print(
+        f"Suppressed:   {suppressed_chunks} duplicate chunks "
+        f"(~{saved_seconds:.1f}s of embedding saved)"
+    )
+    from app.rag import embeddings, loader
+
+    for label, cache_stats in (
+        ("Text Cache: ", loader.text_cache_stats()),
+        ("Embed Cache:", embeddings.cache_stats()),
+    ):
+        if cache_stats:
+            print(
+                f"{label}  {cache_stats.hits} hits / {cache_stats.misses} misses "
+                f"({cache_stats.hit_rate:.0%})"
+            )
     if duration > 0:
         print(f"Avg Speed:    {total_chunks / duration:.1f} chunks/sec")
     else:
         print("Avg Speed:    N/A chunks/sec")
+    if profile:
+        profile.finish()
+        print(profile.report())
 
 
 class CLI:
     def __init__(
         self,
-        chat_service: ChatService,
-        rag_service: RAGService,
+        chat_service: "ChatService | Lazy[ChatService]",
+        rag_service: "RAGService | Lazy[RAGService]",
         settings: Settings,
-        planning_service: PlanningService | None = None,
-        healer_service: HealerService | None = None,
+        planning_service: "PlanningService | Lazy[PlanningService] | None" = None,
+        healer_service: "HealerService | Lazy[HealerService] | None" = None,
     ):
-        self.chat_service = chat_service
-        self.rag_service = rag_service
+        self._chat_service = chat_service
+        self._rag_service = rag_service
         self.settings = settings
-        self.planning_service = planning_service
-        self.healer_service = healer_service
+        self._planning_service = planning_service
+        self._healer_service = healer_service
+        self.jobs = JobManager()
+
+    @property
+    def chat_service(self) -> "ChatService":
+        return resolve(self._chat_service)
+
+    @property
+    def rag_service(self) -> "RAGService":
+        return resolve(self._rag_service)
+
+    @property
+    def planning_service(self) -> "PlanningService | None":
+        if self._planning_service is None:
+            return None
+        return resolve(self._planning_service)
+
+    @property
+    def healer_service(self) -> "HealerService | None":
+        if self._healer_service is None:
+            return None
+        return resolve(self._healer_service)
 
     def run(self) -> None:
         print("--- Datacom AI Assessment ---")
         print(f"Type '{EXIT}' to quit.")
         print(f"Type '{INGEST} <path>' to load a document.")
-        print(f"Type '{INGEST_ALL} [--large]' to load all corpus documents.")
+        print(
+            f"Type '{INGEST_ALL} [--large] [--resume] [--profile]' to load all corpus "
+            "documents in the background."
+        )
+        print(f"Type '{JOBS}', '{JOB} <id>' or '{CANCEL} <id>' to manage ingest jobs.")
         print(f"Type '{PLAN} <request>' to plan a trip with AI agent.")
         print(f"Type '{HEAL} <task>' to generate and fix code with AI.")
 
         while True:
             try:
+                self._announce_finished_jobs()
                 user_input = input("You: ").strip()
 
                 if not user_input:
@@ -94,6 +187,8 @@ class CLI:
                 print("\nGoodbye!")
                 break
 
+        self._cancel_jobs()
+
     def _handle_command(self, user_input: str) -> bool:
         if user_input == EXIT:
             self._handle_exit()
@@ -103,6 +198,14 @@ class CLI:
             self._handle_ingest_all(user_input)
             return True
 
+        if user_input == JOBS:
+            self._handle_jobs()
+            return True
+
+        if user_input.split(" ", 1)[0] in (JOB, CANCEL):
+            self._handle_job_command(user_input)
+            return True
+
         if user_input.startswith(INGEST + " "):
             self._handle_ingest(user_input)
             return True
@@ -129,11 +232,73 @@ class CLI:
         target_dir = self.settings.CORPUS_DIR
         if " --large" in user_input:
             target_dir = self.settings.CORPUS_LARGE_DIR
-        ingest_directory_with_report(self.rag_service, target_dir)
+        try:
+            job = self.jobs.start_ingest(
+                self.rag_service,
+                target_dir,
+                resume=" --resume" in user_input,
+                profile=IngestProfile() if " --profile" in user_input else None,
+                embed_threads=self.settings.BACKGROUND_INGEST_THREADS,
+            )
+        except (RuntimeError, ValueError) as e:
+            print(f"Error: {e}")
+            return
+        print(
+            f"Started ingest job {job.id}: {job.files_total} files from {target_dir}. "
+            f"Check on it with '{JOB} {job.id}', stop it with '{CANCEL} {job.id}'."
+        )
+
+    def _handle_jobs(self) -> None:
+        jobs = self.jobs.jobs()
+        if not jobs:
+            print("No ingest jobs.")
+        for job in jobs:
+            print(format_job_line(job))
+
+    def _handle_job_command(self, user_input: str) -> None:
+        command, _, job_id = user_input.partition(" ")
+        job_id = job_id.strip()
+        if not job_id:
+            print(f"Usage: {command} <job id>")
+            return
+        job = self.jobs.get(int(job_id)) if job_id.isdigit() else None
+        if job is None:
+            print(f"No ingest job '{job_id}'. Type '{JOBS}' to list jobs.")
+            return
+
+        if command == CANCEL:
+            if job.cancel():
+                print(f"Cancelling job {job.id}; resume it later with --resume.")
+            else:
+                print(f"Job {job.id} already {job.state}.")
+            return
+
+        progress = job.progress()
+        print(format_job_line(job))
+        print(f"  Skipped:    {progress.skipped} unchanged files")
+        print(f"  Suppressed: {progress.suppressed} duplicate chunks")
+        print(f"  Elapsed:    {format_duration(progress.elapsed_seconds)}")
+        if job.error:
+            print(f"  Error:      {job.error}")
+        if job.profile and job.state != "running":
+            print(job.profile.report())
+
+    def _announce_finished_jobs(self) -> None:
+        for job in self.jobs.newly_finished():
+            print(f"[Job finished] {format_job_line(job)}")
+
+    def _cancel_jobs(self) -> None:
+        for job in self.jobs.cancel_all():
+            print(f"Cancelled ingest job {job.id}; resume it later with --resume.")
 
     def _handle_ingest(self, user_input: str) -> None:
         path = user_input.split(" ", 1)[1].strip()
-        count = self.rag_service.ingest(path)
+        try:
+            count = self.rag_service.ingest(path)
+        except RuntimeError as e:
+            # A background ingest job is running
+            print(f"Error: {e}")
+            return
         print(f"Ingested {count} chunks from {path}")
 
     def _handle_plan(self, user_input: str) -> None:
@@ -188,6 +353,29 @@ class CLI:
         print()  # Newline at end
 
 
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    return f"{minutes}m{seconds:02d}s" if minutes else f"{seconds}s"
+
+
+def format_job_line(job: IngestJob) -> str:
+    """One-line job progress: files, chunks, chunks/sec and ETA."""
+    progress = job.progress()
+    eta = (
+        f", ETA {format_duration(progress.eta_seconds)}"
+        if progress.eta_seconds is not None
+        else ""
+    )
+    return (
+        f"[{job.id}] {job.state:<9} {job.directory}: "
+        f"{progress.files_done}/{progress.files_total} files, "
+        f"{progress.chunks} chunks, {progress.chunks_per_second:.1f} chunks/sec{eta}"
+    )
+
+
 def format_chat_metrics(metrics: ChatMetrics) -> str:
     """Format metrics for CLI display."""
     return (
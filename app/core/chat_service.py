@@ -1,6 +1,6 @@
 import time
 from collections.abc import Generator
-from typing import cast
+from typing import TYPE_CHECKING, cast
 
 from openai import OpenAI
 from openai.types import CompletionUsage
@@ -9,7 +9,9 @@ from app.core.config import Settings
 from app.db.chat_repository import ChatRepository
 from app.core.models import ChatMetrics, ChatChunk
 from app.core.utils import calculate_cost
-from app.rag.service import RAGService
+
+if TYPE_CHECKING:
+    from app.rag.service import RAGService
 
 
 MAX_HISTORY_MESSAGES = 10
@@ -21,7 +23,7 @@ class ChatService:
         self,
         repo: ChatRepository,
         settings: Settings | None = None,
-        rag_service: RAGService | None = None,
+        rag_service: "RAGService | None" = None,
     ):
         self.settings = settings or Settings()
         self.repo = repo
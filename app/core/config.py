@@ -1,4 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Literal
+
 from pydantic import Field
 
 
@@ -15,10 +17,151 @@ class Settings(BaseSettings):
     CHROMA_PORT: int = Field(
         8000, description="ChromaDB server port for HTTP client mode"
     )
+    CHROMA_UPSERT_BATCH_SIZE: int = Field(
+        1024, description="Chunks per Chroma upsert, capped by the server's maximum"
+    )
+    CHROMA_UPSERT_CONCURRENCY: int = Field(
+        2, description="Upserts kept in flight during directory ingestion in HTTP mode"
+    )
+    CHUNK_STORE_DIR: str | None = Field(
+        None,
+        description="Compressed store of chunk texts, so Chroma holds only vectors "
+        "and metadata; must be kept with the Chroma directory once used "
+        "(None keeps texts in Chroma)",
+    )
+    VECTOR_BACKEND: Literal["chroma", "mmap"] = Field(
+        "chroma", description="Vector store backend: Chroma or the memory-mapped index"
+    )
+    MMAP_INDEX_DIR: str = Field(
+        "data/mmap_index", description="Directory of the memory-mapped vector index"
+    )
+    VECTOR_QUANTIZATION: Literal["none", "int8", "binary"] = Field(
+        "none",
+        description="First-stage quantized search for the mmap backend (float rescoring)",
+    )
+    QUANTIZATION_RESCORE_MULTIPLIER: int = Field(
+        8, description="Shortlist size as a multiple of k for float rescoring"
+    )
+    IVF_LISTS: int = Field(
+        0,
+        description="IVF lists for the mmap backend, trained automatically (0 = exact)",
+    )
+    IVF_NPROBE: int = Field(
+        8, description="IVF lists scanned per query; higher trades latency for recall"
+    )
     CORPUS_DIR: str = Field("data/corpus", description="Path to document corpus")
     CORPUS_LARGE_DIR: str = Field(
         "data/corpus_large", description="Path to large document corpus"
     )
+    INGEST_LOADER_WORKERS: int = Field(
+        4, description="Parallel document loader threads during directory ingestion"
+    )
+    INGEST_EMBED_BATCH_SIZE: int = Field(
+        256, description="Chunks per embedding batch during directory ingestion"
+    )
+    EMBEDDING_POOL_WORKERS: int = Field(
+        0,
+        description="Worker processes, each with its own model, that embed chunks "
+        "during directory ingestion (0 = in-process)",
+    )
+    EMBEDDING_POOL_THREADS: int = Field(
+        1, description="Torch threads per embedding pool worker"
+    )
+    EMBEDDING_BATCH_TOKENS: int = Field(
+        2048,
+        description="Padded tokens per length-bucketed encode batch (0 = the "
+        "model's fixed 32-text batches)",
+    )
+    INGEST_QUEUE_SIZE: int = Field(
+        8, description="Bound on queued items between ingestion pipeline stages"
+    )
+    BACKGROUND_INGEST_THREADS: int = Field(
+        0,
+        description="Torch threads of the worker process that embeds for CLI "
+        "background ingest jobs, leaving the rest for chat (0 = half the CPUs)",
+    )
+    INGEST_STREAM_MIN_MB: int = Field(
+        64,
+        description="Text files at least this large are read, cleaned and split "
+        "incrementally in constant memory (character splitter only)",
+    )
+    TEXT_CACHE_DIR: str | None = Field(
+        "data/text_cache",
+        description="Compressed cache of extracted document text (None disables)",
+    )
+    TEXT_CACHE_MAX_MB: int = Field(
+        1024, description="Size cap of the text cache before LRU eviction"
+    )
+    PDF_WORKERS: int = Field(
+        1,
+        description="Processes for page-parallel PDF extraction (1: off, 0: one per CPU)",
+    )
+    PDF_PARALLEL_MIN_PAGES: int = Field(
+        32, description="Smaller PDFs are extracted in-process"
+    )
+    INGEST_MANIFEST_PATH: str | None = Field(
+        "data/ingest_manifest.json",
+        description="Manifest used to skip unchanged files on re-ingest (None disables)",
+    )
+    INGEST_CHECKPOINT_DB: str | None = Field(
+        "data/ingest_checkpoint.db",
+        description="SQLite checkpoint of ingest progress for --resume (None disables)",
+    )
+    INGEST_INCREMENTAL: bool = Field(
+        True,
+        description="Embed only new chunks of changed documents and delete stale ones",
+    )
+    SPLITTER_MODE: Literal["characters", "tokens"] = Field(
+        "characters",
+        description="Chunk on fixed character windows or on embedding model tokens",
+    )
+    CHUNK_TOKENS: int = Field(
+        254, description="Tokens per chunk in token mode (model limit minus specials)"
+    )
+    CHUNK_OVERLAP_TOKENS: int = Field(
+        32, description="Tokens shared by consecutive chunks in token mode"
+    )
+    DEDUP_INDEX_DIR: str | None = Field(
+        None,
+        description="MinHash index for suppressing boilerplate and near-duplicate "
+        "chunks across documents (None disables)",
+    )
+    DEDUP_THRESHOLD: float = Field(
+        0.8, description="Estimated Jaccard similarity at which a chunk is a duplicate"
+    )
+    EMBEDDING_CACHE_DIR: str | None = Field(
+        "data/embedding_cache",
+        description="Persistent document embedding cache directory (None disables)",
+    )
+    EMBEDDING_CACHE_MAX_ENTRIES: int = Field(
+        500_000, description="Maximum cached embeddings before LRU eviction"
+    )
+    EMBEDDING_CACHE_DTYPE: str = Field(
+        "float16", description="Storage dtype for cached embeddings (float16/float32)"
+    )
+    RETRIEVAL_CACHE_SIZE: int = Field(
+        1024, description="Cached query embeddings and result sets (0 disables)"
+    )
+    KEYWORD_INDEX_DIR: str | None = Field(
+        "data/keyword_index",
+        description="BM25 inverted index of chunk texts, updated on ingest, for "
+        "keyword lookups and hybrid retrieval (None disables)",
+    )
+    RETRIEVAL_MODE: Literal["vector", "hybrid"] = Field(
+        "vector",
+        description="Rank by vector similarity alone, or fuse vector and BM25 "
+        "rankings with reciprocal rank fusion",
+    )
+    EMBEDDING_SERVER_SOCKET: str | None = Field(
+        "data/embedding.sock",
+        description="Unix socket of the shared embedding server, used when running",
+    )
+    EMBEDDING_SERVER_MAX_BATCH: int = Field(
+        64, description="Texts per micro-batch in the embedding server"
+    )
+    EMBEDDING_SERVER_MAX_WAIT_MS: float = Field(
+        5.0, description="How long the embedding server waits to fill a batch"
+    )
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
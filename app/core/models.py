@@ -16,6 +16,58 @@ class RetrievalResult:
     is_success: bool
 
 
+class IngestResult(tuple[str, int]):
+    """Outcome of ingesting one file. Unpacks as (filename, chunk_count), as
+    ingest_directory has always yielded; skipped, suppressed and failed are
+    attributes only."""
+
+    skipped: bool
+    suppressed: int
+    failed: bool
+
+    def __new__(
+        cls,
+        filename: str,
+        chunks: int,
+        skipped: bool = False,
+        suppressed: int = 0,
+        failed: bool = False,
+    ) -> "IngestResult":
+        result = super().__new__(cls, (filename, chunks))
+        result.skipped = skipped
+        result.suppressed = suppressed
+        result.failed = failed
+        return result
+
+    @property
+    def filename(self) -> str:
+        return self[0]
+
+    @property
+    def chunks(self) -> int:
+        return self[1]
+
+    def _outcome(self) -> tuple[bool, int, bool]:
+        return self.skipped, self.suppressed, self.failed
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, IngestResult):
+            return tuple(self) == tuple(other) and self._outcome() == other._outcome()
+        return super().__eq__(other)
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    __hash__ = tuple.__hash__
+
+    def __repr__(self) -> str:
+        return (
+            f"IngestResult(filename={self.filename!r}, chunks={self.chunks}, "
+            f"skipped={self.skipped}, suppressed={self.suppressed}, "
+            f"failed={self.failed})"
+        )
+
+
 class ChatMetrics(BaseModel):
     ttft: float = 0.0
     total_latency: float = 0.0
@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Generic, TypeVar, cast
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class StartupEvent:
+    name: str
+    kind: str  # "import", "init" or "warm-up"
+    seconds: float
+    thread: str
+    finished_at: float
+
+
+class StartupProfile:
+    """Collects import and initialization timings for --startup-profile."""
+
+    def __init__(self, started_at: float | None = None):
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self.events: list[StartupEvent] = []
+        self.first_prompt_at: float | None = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timed(self, name: str, kind: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            event = StartupEvent(
+                name, kind, end - start, threading.current_thread().name, end
+            )
+            with self._lock:
+                self.events.append(event)
+
+    def mark_first_prompt(self) -> None:
+        self.first_prompt_at = time.perf_counter()
+
+    def report(self) -> str:
+        with self._lock:
+            events = sorted(self.events, key=lambda e: e.finished_at)
+        lines = ["", "Startup profile", "-" * 62]
+        lines.append(f"{'Step':<32}{'Kind':<9}{'Thread':<11}{'Time (s)':>10}")
+        for event in events:
+            lines.append(
+                f"{event.name:<32}{event.kind:<9}{event.thread[:10]:<11}"
+                f"{event.seconds:>10.3f}"
+            )
+        lines.append("-" * 62)
+        if self.first_prompt_at is not None:
+            lines.append(
+                f"Time to first prompt: {self.first_prompt_at - self.started_at:.3f}s"
+            )
+        return "\n".join(lines)
+
+
+class Lazy(Generic[T]):
+    """Builds a value on first use; safe to trigger from a warm-up thread.
+
+    A failed build is not cached, so the next caller retries and sees the error.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._value: T | None = None
+        self._built = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._built
+
+    def get(self) -> T:
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    self._value = self._factory()
+                    self._built = True
+        return cast(T, self._value)
+
+
+def resolve(value: "T | Lazy[T]") -> T:
+    return value.get() if isinstance(value, Lazy) else value
+
+
+def start_warm_up(steps: list[tuple[str, Callable[[], object]]]) -> threading.Thread:
+    """Run warm-up steps in order on a daemon thread. Failures are only logged;
+    the failed step runs again (and raises) when first used in the foreground."""
+
+    def run() -> None:
+        for name, step in steps:
+            try:
+                step()
+            except Exception:
+                logger.warning(f"Background warm-up of {name} failed", exc_info=True)
+
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
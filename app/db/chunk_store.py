@@ -0,0 +1,250 @@
+import hashlib
+import json
+import os
+import threading
+import zlib
+from collections.abc import Sequence
+from pathlib import Path
+
+import numpy as np
+
+KEY_BYTES = 16
+COMPRESSION_LEVEL = 6
+# Raw text per compressed frame: larger frames compress better, smaller ones
+# decompress less text per hydrated chunk
+FRAME_BYTES = 4 * 1024
+COMPACT_MIN_DEAD_CHUNKS = 1000
+# Index record per chunk; a tombstone has a zero frame length
+INDEX_DTYPE = np.dtype(
+    [
+        ("key", f"V{KEY_BYTES}"),
+        ("offset", "<u8"),
+        ("length", "<u4"),
+        ("start", "<u4"),
+        ("end", "<u4"),
+    ]
+)
+
+
+class MissingChunkError(LookupError):
+    """A chunk has a vector but no text in the chunk store."""
+
+
+def chunk_key(chunk_id: str) -> bytes:
+    return hashlib.blake2b(chunk_id.encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+
+class ChunkStore:
+    """Append-only, zlib-compressed store of chunk texts keyed by chunk ID.
+
+    Layout of the store directory:
+      - chunks.<g>.z: compressed frames, each the UTF-8 texts of up to
+        FRAME_BYTES of consecutive chunks, concatenated
+      - index.<g>.bin: fixed-size INDEX_DTYPE records mapping a chunk ID hash to
+        its frame's offset and length and its byte range within the frame
+      - meta.json: the current generation g, bumped by compaction
+
+    Chunk IDs are content-derived, so an ID already stored is not written again.
+    Readers in other processes pick up appended records on a lookup miss. Writers
+    must be serialized (one writer process at a time).
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self._lock = threading.RLock()
+        self._reset()
+        self._refresh()
+
+    def _reset(self) -> None:
+        self._generation: int | None = None
+        self._entries: dict[bytes, tuple[int, int, int, int]] = {}
+        self._index_read = 0
+        self._dead = 0
+
+    def _path(self, name: str) -> Path:
+        assert self._generation is not None
+        return self.directory / name.format(g=self._generation)
+
+    @property
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes on disk of the current generation's data and index."""
+        with self._lock:
+            self._refresh()
+            if self._generation is None:
+                return 0
+            return sum(
+                self._path(name).stat().st_size
+                for name in ("chunks.{g}.z", "index.{g}.bin")
+            )
+
+    def _refresh(self) -> None:
+        """Pick up index records appended since the last refresh (by any process)."""
+        try:
+            meta = json.loads((self.directory / "meta.json").read_text())
+        except FileNotFoundError:
+            return
+        if meta["generation"] != self._generation:
+            self._reset()
+            self._generation = int(meta["generation"])
+
+        with open(self._path("index.{g}.bin"), "rb") as f:
+            f.seek(self._index_read)
+            data = f.read()
+        complete = len(data) - len(data) % INDEX_DTYPE.itemsize
+        records = np.frombuffer(data[:complete], dtype=INDEX_DTYPE)
+        self._index_read += complete
+        for key, offset, length, start, end in records.tolist():
+            if length == 0:
+                if self._entries.pop(key, None) is not None:
+                    self._dead += 1
+            else:
+                self._entries[key] = (offset, length, start, end)
+
+    def _create(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._write_meta(generation=0)
+        self._refresh()
+
+    def _write_meta(self, generation: int) -> None:
+        for name in ("chunks.{g}.z", "index.{g}.bin"):
+            (self.directory / name.format(g=generation)).touch()
+        tmp_path = self.directory / "meta.json.tmp"
+        tmp_path.write_text(json.dumps({"generation": generation}))
+        os.replace(tmp_path, self.directory / "meta.json")
+
+    def put_many(self, ids: Sequence[str], texts: Sequence[str]) -> None:
+        with self._lock:
+            self._refresh()
+            if self._generation is None:
+                self._create()
+            new: dict[bytes, bytes] = {}
+            for chunk_id, text in zip(ids, texts):
+                key = chunk_key(chunk_id)
+                if key not in self._entries:
+                    new[key] = text.encode("utf-8")
+            if new:
+                self._append(new)
+                self._refresh()
+
+    def _append(self, texts: dict[bytes, bytes]) -> None:
+        """Write texts as compressed frames, then the index records pointing at them,
+        so a reader never sees a record before its data."""
+        data_path = self._path("chunks.{g}.z")
+        offset = data_path.stat().st_size
+        frames: list[bytes] = []
+        records = []
+        frame: list[tuple[bytes, bytes]] = []
+        frame_bytes = 0
+
+        def close_frame() -> None:
+            nonlocal offset, frame_bytes
+            compressed = zlib.compress(
+                b"".join(text for _, text in frame), COMPRESSION_LEVEL
+            )
+            start = 0
+            for key, text in frame:
+                records.append((key, offset, len(compressed), start, start + len(text)))
+                start += len(text)
+            frames.append(compressed)
+            offset += len(compressed)
+            frame.clear()
+            frame_bytes = 0
+
+        for key, text in texts.items():
+            frame.append((key, text))
+            frame_bytes += len(text)
+            if frame_bytes >= FRAME_BYTES:
+                close_frame()
+        if frame:
+            close_frame()
+
+        with open(data_path, "ab") as f:
+            f.write(b"".join(frames))
+        with open(self._path("index.{g}.bin"), "ab") as f:
+            f.write(np.array(records, dtype=INDEX_DTYPE).tobytes())
+
+    def get_many(self, ids: Sequence[str]) -> list[str | None]:
+        """Texts of the given chunks in one pass over the data file, each frame read
+        and decompressed once; unknown IDs are returned as None."""
+        keys = [chunk_key(chunk_id) for chunk_id in ids]
+        with self._lock:
+            if any(key not in self._entries for key in keys):
+                self._refresh()
+            try:
+                locations, decompressed = self._read_frames(keys)
+            except FileNotFoundError:
+                # Compacted by another process since the last refresh
+                self._refresh()
+                locations, decompressed = self._read_frames(keys)
+        return [
+            decompressed[loc[0]][loc[2] : loc[3]].decode("utf-8")
+            if loc is not None
+            else None
+            for loc in locations
+        ]
+
+    def _read_frames(
+        self, keys: list[bytes]
+    ) -> tuple[list[tuple[int, int, int, int] | None], dict[int, bytes]]:
+        locations = [self._entries.get(key) for key in keys]
+        frames = sorted({(loc[0], loc[1]) for loc in locations if loc is not None})
+        if not frames:
+            return locations, {}
+        with open(self._path("chunks.{g}.z"), "rb") as f:
+            fd = f.fileno()
+            return locations, {
+                offset: zlib.decompress(os.pread(fd, length, offset))
+                for offset, length in frames
+            }
+
+    def delete(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            self._refresh()
+            keys = {chunk_key(chunk_id) for chunk_id in ids}
+            keys &= self._entries.keys()
+            if not keys:
+                return
+            tombstones = np.zeros(len(keys), dtype=INDEX_DTYPE)
+            tombstones["key"] = [np.void(key) for key in keys]
+            with open(self._path("index.{g}.bin"), "ab") as f:
+                f.write(tombstones.tobytes())
+            self._refresh()
+
+            if self._dead >= max(COMPACT_MIN_DEAD_CHUNKS, len(self._entries)):
+                self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the live chunks into a new generation and drop the old files."""
+        with self._lock:
+            self._refresh()
+            if self._generation is None:
+                return
+            old_generation = self._generation
+            keys = list(self._entries)
+            texts: dict[bytes, bytes] = {}
+            with open(self._path("chunks.{g}.z"), "rb") as f:
+                fd = f.fileno()
+                frames: dict[int, bytes] = {}
+                for key in keys:
+                    offset, length, start, end = self._entries[key]
+                    if offset not in frames:
+                        frames[offset] = zlib.decompress(os.pread(fd, length, offset))
+                    texts[key] = frames[offset][start:end]
+
+            self._reset()
+            self._generation = old_generation + 1
+            for name in ("chunks.{g}.z", "index.{g}.bin"):
+                self._path(name).touch()
+            if texts:
+                self._append(texts)
+            self._write_meta(generation=old_generation + 1)
+            self._reset()
+            self._refresh()
+            for name in ("chunks.{g}.z", "index.{g}.bin"):
+                (self.directory / name.format(g=old_generation)).unlink(missing_ok=True)
@@ -0,0 +1,108 @@
+import numpy as np
+
+# Rows scored against the centroids per step, bounding the rows x lists score block
+ASSIGN_BLOCK_ROWS = 8192
+# Training sample per list; more adds cost without moving the centroids much
+TRAIN_SAMPLE_PER_LIST = 256
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Nearest centroid (highest inner product) for each normalized row."""
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_BLOCK_ROWS):
+        block = np.asarray(vectors[start : start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+        labels[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def train_kmeans(
+    vectors: np.ndarray, n_lists: int, iterations: int = 20, seed: int = 0
+) -> np.ndarray:
+    """Spherical k-means over unit vectors; returns (n_lists, dim) unit centroids.
+
+    Trains on a random sample of at most TRAIN_SAMPLE_PER_LIST rows per list.
+    Empty lists are reseeded with the rows furthest from their centroid.
+    """
+    rng = np.random.default_rng(seed)
+    if len(vectors) > n_lists * TRAIN_SAMPLE_PER_LIST:
+        sample = np.sort(
+            rng.choice(len(vectors), n_lists * TRAIN_SAMPLE_PER_LIST, replace=False)
+        )
+        vectors = vectors[sample]
+    vectors = np.asarray(vectors, dtype=np.float32)
+    n_lists = min(n_lists, len(vectors))
+
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        scores = vectors @ centroids.T
+        labels = np.argmax(scores, axis=1)
+
+        # Per-list sums via sort + reduceat instead of a Python loop over lists
+        order = np.argsort(labels, kind="stable")
+        present, starts = np.unique(labels[order], return_index=True)
+        sums = np.add.reduceat(vectors[order], starts, axis=0)
+        updated = np.zeros_like(centroids)
+        updated[present] = sums
+
+        empty = np.setdiff1d(np.arange(n_lists), present)
+        if len(empty):
+            fit = scores[np.arange(len(vectors)), labels]
+            updated[empty] = vectors[np.argsort(fit)[: len(empty)]]
+
+        norms = np.linalg.norm(updated, axis=1, keepdims=True)
+        updated /= np.where(norms > 0, norms, 1.0)
+        if np.allclose(updated, centroids, atol=1e-6):
+            return updated
+        centroids = updated
+    return centroids
+
+
+class InvertedLists:
+    """Row ids grouped by list, rebuilt lazily into CSR form after rows are added."""
+
+    def __init__(self, centroids: np.ndarray):
+        self.centroids = centroids
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self._order = np.zeros(0, dtype=np.int64)
+        self._bounds = np.zeros(len(centroids) + 1, dtype=np.int64)
+        self._indexed_rows = 0
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    def __len__(self) -> int:
+        return len(self.assignments)
+
+    def append(self, labels: np.ndarray) -> None:
+        self.assignments = np.concatenate(
+            [self.assignments, labels.astype(np.int32, copy=False)]
+        )
+
+    def snapshot(self, rows: int) -> "InvertedLists":
+        """The lists of the first rows rows, built now and unaffected by later
+        appends, so that concurrent searches can probe them without a lock."""
+        frozen = InvertedLists(self.centroids)
+        if rows == len(self.assignments):
+            self._build()
+            frozen.assignments = self.assignments
+            frozen._order, frozen._bounds = self._order, self._bounds
+            frozen._indexed_rows = rows
+        else:
+            frozen.assignments = self.assignments[:rows]
+            frozen._build()
+        return frozen
+
+    def _build(self) -> None:
+        if self._indexed_rows != len(self.assignments):
+            self._order = np.argsort(self.assignments, kind="stable")
+            counts = np.bincount(self.assignments, minlength=self.n_lists)
+            self._bounds = np.concatenate([[0], np.cumsum(counts)])
+            self._indexed_rows = len(self.assignments)
+
+    def probe(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Sorted row ids in the nprobe lists whose centroids are nearest the query."""
+        self._build()
+        nearest = np.argsort(-(self.centroids @ query))[:nprobe]
+        rows = [self._order[self._bounds[i] : self._bounds[i + 1]] for i in nearest]
+        return np.sort(np.concatenate(rows)) if rows else np.zeros(0, dtype=np.int64)
@@ -0,0 +1,667 @@
+import json
+import os
+import threading
+from collections.abc import Iterator, Sequence
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, cast
+
+import numpy as np
+from chromadb.api.types import Metadata as ChromaMetadata
+
+from app.db.ivf import (
+    TRAIN_SAMPLE_PER_LIST,
+    InvertedLists,
+    assign_lists,
+    train_kmeans,
+)
+from app.db.quantization import QuantizationMode, QuantizedIndex
+from app.db.vector import ADD_WINDOW, make_chunk_id
+from app.rag import embeddings
+from app.types import Metadata
+
+VECTOR_DTYPE = np.dtype("<f4")
+COMPACT_MIN_DEAD_ROWS = 1000
+READ_BLOCK_ROWS = 8192
+# Train once there are this many rows per list, and retrain after this much growth
+IVF_MIN_ROWS_PER_LIST = 40
+IVF_RETRAIN_GROWTH = 4
+# Above this share of probed rows, scan everything and mask instead of gathering
+IVF_MAX_GATHER_FRACTION = 0.25
+# Score matrix elements per block in batched multi-query search
+BATCH_SCORE_ELEMENTS = 16 * 1024 * 1024
+
+
+@dataclass
+class _SearchView:
+    """The index as one search sees it. Rows, offsets, snapshots of the quantized
+    codes and IVF lists and open files are taken together under the lock, so
+    rows added, or renumbered by a compaction, meanwhile cannot change what the
+    search scores or make it read another chunk's text or vector."""
+
+    matrix: np.ndarray
+    alive: np.ndarray
+    offsets: list[int]
+    quantized: QuantizedIndex | None
+    ivf: InvertedLists | None
+    chunks_file: BinaryIO | None
+    vectors_file: BinaryIO | None
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=VECTOR_DTYPE)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return cast(np.ndarray, vectors / np.maximum(norms, np.finfo(VECTOR_DTYPE).tiny))
+
+
+class MmapVectorStore:
+    """Read-mostly vector store backed by a memory-mapped float32 matrix.
+
+    Layout per collection directory:
+      - vectors.f32: L2-normalized embeddings, one row per chunk, append-only
+      - chunks.jsonl: sidecar with id/text/metadata per row, in row order
+      - tombstones.txt: row numbers of deleted or superseded chunks
+      - meta.json: dimension, compaction generation and IVF version
+      - ivf_centroids.<v>.npy, ivf_lists.<v>.i32: IVF centroids and the list
+        of each row (append-only), once the index is trained
+
+    Search is an exact dot product over the mapped matrix, so several processes
+    share one page-cached index without a server. Distances are squared L2
+    between unit vectors (2 - 2 * cosine), matching Chroma's default space.
+    Writers must be serialized (one writer process at a time).
+
+    With int8 or binary quantization, search scans only in-memory codes and
+    rescores a shortlist of k * rescore_multiplier rows with the exact float
+    vectors, so the float matrix is paged in only for shortlisted rows.
+
+    With ivf_lists > 0 the writer trains k-means centroids once enough rows exist
+    (and again as the index grows) and assigns every new row to its nearest
+    list. Queries then score only the rows in the nprobe nearest lists; raising
+    nprobe trades latency for recall.
+    """
+
+    def __init__(
+        self,
+        index_directory: str,
+        collection_name: str = "documents",
+        quantization: QuantizationMode = "none",
+        rescore_multiplier: int = 8,
+        ivf_lists: int = 0,
+        nprobe: int = 8,
+    ):
+        self.directory = Path(index_directory) / collection_name
+        self.collection_name = collection_name
+        self.target = f"mmap:{self.directory}"
+        self.quantization = quantization
+        self.rescore_multiplier = max(1, rescore_multiplier)
+        self.ivf_lists = ivf_lists
+        self.nprobe = max(1, nprobe)
+        self._lock = threading.RLock()
+        self._reset()
+        self._refresh()
+
+    def _path(self, name: str) -> Path:
+        return self.directory / name
+
+    def _reset(self) -> None:
+        self._generation: int | None = None
+        self._dim: int | None = None
+        self._matrix: np.ndarray = np.zeros((0, 0), dtype=VECTOR_DTYPE)
+        self._quantized: QuantizedIndex | None = None
+        self._ivf: InvertedLists | None = None
+        self._ivf_version = 0
+        self._ivf_rows = 0
+        self._ids: list[str] = []
+        self._sources: list[str] = []
+        self._offsets: list[int] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._row_by_id: dict[str, int] = {}
+        self._ids_by_source: dict[str, set[str]] = {}
+        self._chunks_read = 0
+        self._tombstones_read = 0
+
+    @property
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return int(self._alive[: len(self._matrix)].sum())
+
+    def _read_meta(self) -> dict | None:
+        try:
+            return cast(dict, json.loads(self._path("meta.json").read_text()))
+        except FileNotFoundError:
+            return None
+
+    def _refresh(self) -> None:
+        """Pick up rows and tombstones appended since the last refresh (by any process)."""
+        meta = self._read_meta()
+        if meta is None:
+            return
+        if meta["generation"] != self._generation:
+            self._reset()
+            self._generation = meta["generation"]
+            self._dim = int(meta["dim"])
+        if meta.get("ivf", 0) != self._ivf_version:
+            self._load_ivf(meta)
+
+        self._read_new_chunks()
+        self._read_new_tombstones()
+
+        assert self._dim is not None
+        row_bytes = self._dim * VECTOR_DTYPE.itemsize
+        vector_rows = self._path("vectors.f32").stat().st_size // row_bytes
+        visible_rows = min(vector_rows, len(self._ids))
+        if visible_rows != len(self._matrix):
+            self._matrix = (
+                np.memmap(
+                    self._path("vectors.f32"),
+                    dtype=VECTOR_DTYPE,
+                    mode="r",
+                    shape=(visible_rows, self._dim),
+                )
+                if visible_rows
+                else np.zeros((0, self._dim), dtype=VECTOR_DTYPE)
+            )
+        if self.quantization != "none":
+            if self._quantized is None:
+                self._quantized = QuantizedIndex(self.quantization, self._dim)
+            for block in self._read_blocks(len(self._quantized), visible_rows):
+                self._quantized.append(block)
+        if self._ivf is not None:
+            self._assign_new_rows(visible_rows)
+
+    def _read_blocks(self, start: int, stop: int) -> Iterator[np.ndarray]:
+        """Yield float rows [start, stop) in blocks read through regular file I/O,
+        so building derived indexes does not leave the float matrix resident."""
+        assert self._dim is not None
+        row_bytes = self._dim * VECTOR_DTYPE.itemsize
+        with open(self._path("vectors.f32"), "rb") as f:
+            for block_start in range(start, stop, READ_BLOCK_ROWS):
+                count = min(READ_BLOCK_ROWS, stop - block_start)
+                f.seek(block_start * row_bytes)
+                block = np.fromfile(f, dtype=VECTOR_DTYPE, count=count * self._dim)
+                yield block.reshape(count, self._dim)
+
+    def _load_ivf(self, meta: dict) -> None:
+        self._ivf_version = int(meta.get("ivf", 0))
+        self._ivf_rows = int(meta.get("ivf_rows", 0))
+        try:
+            centroids = np.load(self._path(f"ivf_centroids.{self._ivf_version}.npy"))
+        except FileNotFoundError:
+            self._ivf = None
+            return
+        self._ivf = InvertedLists(centroids)
+
+    def _assign_new_rows(self, visible_rows: int) -> None:
+        """Read list assignments the writer persisted for new rows, computing any
+        that are missing (e.g. after an interrupted write)."""
+        assert self._ivf is not None
+        path = self._path(f"ivf_lists.{self._ivf_version}.i32")
+        if len(self._ivf) < visible_rows and path.exists():
+            with open(path, "rb") as f:
+                f.seek(len(self._ivf) * 4)
+                stored = np.fromfile(f, dtype="<i4")
+            self._ivf.append(stored[: visible_rows - len(self._ivf)])
+        for block in self._read_blocks(len(self._ivf), visible_rows):
+            self._ivf.append(assign_lists(block, self._ivf.centroids))
+
+    @property
+    def index_nbytes(self) -> int:
+        """Bytes scanned per query: quantized codes, or the full float matrix."""
+        with self._lock:
+            self._refresh()
+            if self._quantized is not None:
+                return self._quantized.nbytes
+            return int(self._matrix.size * VECTOR_DTYPE.itemsize)
+
+    def _read_new_chunks(self) -> None:
+        with open(self._path("chunks.jsonl"), "rb") as f:
+            f.seek(self._chunks_read)
+            data = f.read()
+
+        offset = self._chunks_read
+        records: list[tuple[dict, int]] = []
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break  # partially written record
+            records.append((json.loads(line), offset))
+            offset += len(line)
+        self._chunks_read = offset
+        if not records:
+            return
+
+        self._alive = np.concatenate([self._alive, np.ones(len(records), dtype=bool)])
+        for record, record_offset in records:
+            row = len(self._ids)
+            chunk_id = record["id"]
+            source = str((record.get("metadata") or {}).get("source", ""))
+
+            # Upserts append a new row; the superseded one is no longer searchable
+            previous = self._row_by_id.get(chunk_id)
+            if previous is not None:
+                self._kill_row(previous)
+            self._ids.append(chunk_id)
+            self._sources.append(source)
+            self._offsets.append(record_offset)
+            self._row_by_id[chunk_id] = row
+            self._ids_by_source.setdefault(source, set()).add(chunk_id)
+
+    def _read_new_tombstones(self) -> None:
+        path = self._path("tombstones.txt")
+        if not path.exists():
+            return
+        with open(path, "rb") as f:
+            f.seek(self._tombstones_read)
+            data = f.read()
+
+        complete = data[: data.rfind(b"\n") + 1]
+        for line in complete.split():
+            row = int(line)
+            if row < len(self._ids):
+                self._kill_row(row)
+        self._tombstones_read += len(complete)
+
+    def _kill_row(self, row: int) -> None:
+        if not self._alive[row]:
+            return
+        self._alive[row] = False
+        chunk_id = self._ids[row]
+        if self._row_by_id.get(chunk_id) == row:
+            del self._row_by_id[chunk_id]
+            self._ids_by_source.get(self._sources[row], set()).discard(chunk_id)
+
+    def add_documents(
+        self,
+        texts: list[str],
+        metadatas: Sequence[ChromaMetadata] | None = None,
+        doc_embeddings: np.ndarray | None = None,
+    ) -> None:
+        if not texts:
+            return
+        if doc_embeddings is None:
+            # Embed window by window so a very large document never holds all
+            # of its vectors at once
+            for start in range(0, len(texts), ADD_WINDOW):
+                window = texts[start : start + ADD_WINDOW]
+                self.add_documents(
+                    window,
+                    metadatas[start : start + ADD_WINDOW] if metadatas else None,
+                    embeddings.embed_documents(window),
+                )
+            return
+        vectors = normalize_rows(doc_embeddings)
+
+        records = []
+        for i, text in enumerate(texts):
+            metadata = dict(metadatas[i]) if metadatas and i < len(metadatas) else {}
+            chunk_id = make_chunk_id(str(metadata.get("source", "")), text)
+            records.append({"id": chunk_id, "text": text, "metadata": metadata})
+
+        with self._lock:
+            self._refresh()
+            if self._dim is None:
+                self._create(vectors.shape[1])
+            if vectors.shape[1] != self._dim:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match index ({self._dim})"
+                )
+
+            # Vectors first: readers only expose rows present in both files. Drop
+            # rows orphaned by an interrupted write so rows stay aligned with records
+            row_bytes = vectors.shape[1] * VECTOR_DTYPE.itemsize
+            with open(self._path("vectors.f32"), "r+b") as f:
+                f.truncate(len(self._ids) * row_bytes)
+                f.seek(0, os.SEEK_END)
+                f.write(vectors.tobytes())
+            if self._ivf is not None:
+                self._append_assignments(assign_lists(vectors, self._ivf.centroids))
+            with open(self._path("chunks.jsonl"), "ab") as f:
+                f.write(
+                    "".join(
+                        json.dumps(r, ensure_ascii=False) + "\n" for r in records
+                    ).encode("utf-8")
+                )
+            self._refresh()
+
+            if self.ivf_lists > 0 and self._ivf_needs_training():
+                self.train_ivf(self.ivf_lists)
+
+    def _append_assignments(self, labels: np.ndarray) -> None:
+        assert self._ivf is not None
+        rows = len(self._ids)
+        with open(self._path(f"ivf_lists.{self._ivf_version}.i32"), "ab") as f:
+            # Align with the vector rows: drop orphans, fill gaps left by a crash
+            stored_rows = min(f.tell() // 4, rows)
+            f.truncate(stored_rows * 4)
+            f.write(self._ivf.assignments[stored_rows:rows].astype("<i4").tobytes())
+            f.write(labels.astype("<i4").tobytes())
+
+    def _ivf_needs_training(self) -> bool:
+        alive_rows = int(self._alive[: len(self._matrix)].sum())
+        if alive_rows < self.ivf_lists * IVF_MIN_ROWS_PER_LIST:
+            return False
+        return self._ivf is None or alive_rows >= IVF_RETRAIN_GROWTH * self._ivf_rows
+
+    def train_ivf(self, n_lists: int, seed: int = 0) -> None:
+        """Train IVF centroids on a sample of live rows and assign every row."""
+        with self._lock:
+            self._refresh()
+            if self._dim is None or self._generation is None:
+                return
+
+            live_rows = np.flatnonzero(self._alive[: len(self._matrix)])
+            if not len(live_rows):
+                return
+            rng = np.random.default_rng(seed)
+            sample_size = min(len(live_rows), n_lists * TRAIN_SAMPLE_PER_LIST)
+            sample = np.sort(rng.choice(live_rows, sample_size, replace=False))
+            centroids = train_kmeans(self._read_vectors(sample), n_lists, seed=seed)
+
+            labels = [
+                assign_lists(block, centroids)
+                for block in self._read_blocks(0, len(self._matrix))
+            ]
+            self._write_ivf(
+                centroids,
+                np.concatenate(labels),
+                version=self._ivf_version + 1,
+                trained_rows=len(live_rows),
+            )
+            self._refresh()
+
+    def _write_ivf(
+        self,
+        centroids: np.ndarray,
+        assignments: np.ndarray,
+        version: int,
+        trained_rows: int,
+        generation: int | None = None,
+    ) -> None:
+        """Write a new IVF version, publish it via meta.json, then drop the old one."""
+        assert self._dim is not None and self._generation is not None
+        np.save(self._path(f"ivf_centroids.{version}.npy"), centroids)
+        self._path(f"ivf_lists.{version}.i32").write_bytes(
+            assignments.astype("<i4").tobytes()
+        )
+        previous = self._ivf_version
+        self._write_meta(
+            self._dim,
+            generation=self._generation if generation is None else generation,
+            ivf=version,
+            ivf_rows=trained_rows,
+        )
+        self._path(f"ivf_centroids.{previous}.npy").unlink(missing_ok=True)
+        self._path(f"ivf_lists.{previous}.i32").unlink(missing_ok=True)
+
+    def _create(self, dim: int) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._path("vectors.f32").touch()
+        self._path("chunks.jsonl").touch()
+        self._write_meta(dim, generation=0)
+        self._refresh()
+
+    def _write_meta(
+        self, dim: int, generation: int, ivf: int = 0, ivf_rows: int = 0
+    ) -> None:
+        meta = {"dim": dim, "generation": generation, "ivf": ivf, "ivf_rows": ivf_rows}
+        tmp_path = self._path("meta.json.tmp")
+        tmp_path.write_text(json.dumps(meta))
+        os.replace(tmp_path, self._path("meta.json"))
+
+    def delete(self, ids: list[str]) -> None:
+        if not ids:
+            return
+        with self._lock:
+            self._refresh()
+            rows = [self._row_by_id[i] for i in ids if i in self._row_by_id]
+            if not rows:
+                return
+            with open(self._path("tombstones.txt"), "ab") as f:
+                f.write("".join(f"{row}\n" for row in rows).encode("ascii"))
+            self._refresh()
+
+            dead_rows = len(self._alive) - int(self._alive.sum())
+            if dead_rows >= max(COMPACT_MIN_DEAD_ROWS, int(self._alive.sum())):
+                self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the index without dead rows and bump the generation for readers."""
+        with self._lock:
+            self._refresh()
+            if self._dim is None or self._generation is None:
+                return
+
+            live_rows = np.flatnonzero(self._alive[: len(self._matrix)])
+            with open(self._path("chunks.jsonl"), "rb") as f:
+                records = [_read_record(f, self._offsets[row]) for row in live_rows]
+            live_vectors = np.asarray(self._matrix[live_rows])
+
+            tmp_vectors = self._path("vectors.f32.tmp")
+            tmp_chunks = self._path("chunks.jsonl.tmp")
+            tmp_vectors.write_bytes(live_vectors.tobytes())
+            tmp_chunks.write_bytes(
+                "".join(
+                    json.dumps(r, ensure_ascii=False) + "\n" for r in records
+                ).encode("utf-8")
+            )
+            os.replace(tmp_vectors, self._path("vectors.f32"))
+            os.replace(tmp_chunks, self._path("chunks.jsonl"))
+            self._path("tombstones.txt").unlink(missing_ok=True)
+            if self._ivf is not None:
+                # Rows are renumbered, so publish the surviving assignments as a new version
+                self._write_ivf(
+                    self._ivf.centroids,
+                    self._ivf.assignments[live_rows],
+                    version=self._ivf_version + 1,
+                    trained_rows=self._ivf_rows,
+                    generation=self._generation + 1,
+                )
+            else:
+                self._write_meta(self._dim, generation=self._generation + 1)
+            self._refresh()
+
+    @contextmanager
+    def _search_view(self) -> Iterator[_SearchView]:
+        with ExitStack() as files:
+            with self._lock:
+                self._refresh()
+                rows = len(self._matrix)
+                has_files = self._dim is not None and rows > 0
+                view = _SearchView(
+                    matrix=self._matrix,
+                    alive=self._alive[:rows].copy(),
+                    # Compaction replaces the list rather than rewriting it
+                    offsets=self._offsets,
+                    # Refreshes keep appending to the live codes and lists
+                    quantized=self._quantized.snapshot(rows)
+                    if self._quantized is not None
+                    else None,
+                    ivf=self._ivf.snapshot(rows) if self._ivf is not None else None,
+                    chunks_file=files.enter_context(
+                        open(self._path("chunks.jsonl"), "rb")
+                    )
+                    if has_files
+                    else None,
+                    vectors_file=files.enter_context(
+                        open(self._path("vectors.f32"), "rb")
+                    )
+                    if has_files
+                    else None,
+                )
+            yield view
+
+    def get_ids_by_source(self, source: str) -> set[str]:
+        with self._lock:
+            self._refresh()
+            return set(self._ids_by_source.get(source, set()))
+
+    def get_documents(
+        self, ids: list[str]
+    ) -> list[tuple[str, Metadata, np.ndarray] | None]:
+        """Text, metadata and normalized vector per chunk ID; None for IDs not stored."""
+        with self._lock:
+            self._refresh()
+            rows = [self._row_by_id.get(chunk_id) for chunk_id in ids]
+            stored = [
+                row for row in rows if row is not None and row < len(self._matrix)
+            ]
+            with open(self._path("chunks.jsonl"), "rb") as f:
+                records = {row: _read_record(f, self._offsets[row]) for row in stored}
+            vectors = (
+                dict(zip(stored, self._read_vectors(np.asarray(stored))))
+                if stored
+                else {}
+            )
+        return [
+            (
+                records[row]["text"],
+                cast(Metadata, records[row]["metadata"]),
+                vectors[row],
+            )
+            if row in records
+            else None
+            for row in rows
+        ]
+
+    def similarity_search(
+        self, query: str, k: int = 5
+    ) -> list[tuple[str, Metadata, float]]:
+        return self.similarity_search_by_vector(embeddings.embed_query(query), k=k)
+
+    def similarity_search_by_vector(
+        self, query_vector: np.ndarray, k: int = 5
+    ) -> list[tuple[str, Metadata, float]]:
+        with self._search_view() as view:
+            return self._search(view, query_vector, k)
+
+    def _search(
+        self, view: _SearchView, query_vector: np.ndarray, k: int
+    ) -> list[tuple[str, Metadata, float]]:
+        matrix, alive, quantized, ivf = (
+            view.matrix,
+            view.alive.copy(),
+            view.quantized,
+            view.ivf,
+        )
+        if not len(matrix) or k <= 0:
+            return []
+
+        query = normalize_rows(np.asarray(query_vector))
+        rows: np.ndarray | None = None
+        if ivf is not None and self.nprobe < ivf.n_lists:
+            rows = ivf.probe(query, self.nprobe)
+            if len(rows) > len(matrix) * IVF_MAX_GATHER_FRACTION:
+                # A contiguous scan beats gathering most of the matrix
+                probed = np.zeros(len(matrix), dtype=bool)
+                probed[rows] = True
+                alive &= probed
+                rows = None
+            else:
+                rows = rows[alive[rows]]
+        k = min(k, int(alive.sum()) if rows is None else len(rows))
+        if k <= 0:
+            return []
+
+        if quantized is None:
+            scores = matrix @ query if rows is None else matrix[rows] @ query
+        else:
+            scores = quantized.scores(query, rows)
+        if rows is None:
+            scores[~alive] = -np.inf
+            rows = np.arange(len(matrix))
+
+        if quantized is None:
+            top = top_k_rows(scores, k)
+            return self._hydrate(view, rows[top], scores[top])
+
+        shortlist_size = min(
+            k * self.rescore_multiplier, int(np.isfinite(scores).sum())
+        )
+        # Sorted rows keep the float gather sequential on disk
+        shortlist = rows[np.sort(top_k_rows(scores, shortlist_size))]
+        assert view.vectors_file is not None
+        exact = self._read_rows(view.vectors_file, shortlist) @ query
+        order = top_k_rows(exact, k)
+        return self._hydrate(view, shortlist[order], exact[order])
+
+    def similarity_search_many(
+        self, queries: list[str], k: int = 5
+    ) -> list[list[tuple[str, Metadata, float]]]:
+        return self.similarity_search_by_vectors(embeddings.embed_queries(queries), k=k)
+
+    def similarity_search_by_vectors(
+        self, query_vectors: np.ndarray, k: int = 5
+    ) -> list[list[tuple[str, Metadata, float]]]:
+        """Search several queries; exact search scores them in one matrix product."""
+        with self._search_view() as view:
+            return self._search_many(view, query_vectors, k)
+
+    def _search_many(
+        self, view: _SearchView, query_vectors: np.ndarray, k: int
+    ) -> list[list[tuple[str, Metadata, float]]]:
+        matrix, alive = view.matrix, view.alive
+        exact = view.quantized is None and (
+            view.ivf is None or self.nprobe >= view.ivf.n_lists
+        )
+        if not exact or not len(matrix) or not len(query_vectors):
+            return [self._search(view, v, k) for v in query_vectors]
+
+        queries = normalize_rows(np.asarray(query_vectors))
+        k = min(k, int(alive.sum()))
+        results = []
+        # Bound the (queries x rows) score block for large indexes
+        block_size = max(1, BATCH_SCORE_ELEMENTS // len(matrix))
+        for start in range(0, len(queries), block_size):
+            scores = queries[start : start + block_size] @ matrix.T
+            scores[:, ~alive] = -np.inf
+            for row_scores in scores:
+                top = top_k_rows(row_scores, k)
+                results.append(self._hydrate(view, top, row_scores[top]))
+        return results
+
+    def _read_vectors(self, rows: np.ndarray) -> np.ndarray:
+        """Float rows of the current generation; call with the lock held."""
+        with open(self._path("vectors.f32"), "rb") as f:
+            return self._read_rows(f, rows)
+
+    def _read_rows(self, f: BinaryIO, rows: np.ndarray) -> np.ndarray:
+        """Read float rows with positioned reads instead of through the memmap, whose
+        page-fault readahead would pull most of the float matrix into RSS."""
+        assert self._dim is not None
+        row_bytes = self._dim * VECTOR_DTYPE.itemsize
+        fd = f.fileno()
+        data = b"".join(os.pread(fd, row_bytes, row * row_bytes) for row in rows)
+        return np.frombuffer(data, dtype=VECTOR_DTYPE).reshape(len(rows), self._dim)
+
+    def _hydrate(
+        self, view: _SearchView, rows: np.ndarray, scores: np.ndarray
+    ) -> list[tuple[str, Metadata, float]]:
+        assert view.chunks_file is not None
+        results = []
+        for row, score in zip(rows.tolist(), scores.tolist()):
+            record = _read_record(view.chunks_file, view.offsets[row])
+            results.append(
+                (
+                    record["text"],
+                    cast(Metadata, record["metadata"]),
+                    float(2.0 - 2.0 * score),
+                )
+            )
+        return results
+
+
+def _read_record(f: BinaryIO, offset: int) -> dict:
+    f.seek(offset)
+    return cast(dict, json.loads(f.readline()))
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, via argpartition."""
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
@@ -0,0 +1,93 @@
+from typing import Literal
+
+import numpy as np
+
+QuantizationMode = Literal["none", "int8", "binary"]
+
+INT8_MAX = 127
+# Rows decoded per step when scoring, keeping the float32 working set cache-sized
+SCORE_BLOCK_ROWS = 1024
+# Number of set bits for every byte value, for numpy releases without bitwise_count
+POPCOUNT = np.array([i.bit_count() for i in range(256)], dtype=np.uint8)
+
+
+def quantize_int8(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization. Returns (codes, scales) with
+    vectors ~= codes * scales[:, None]."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / INT8_MAX
+    scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """Sign-bit quantization packed 8 dimensions per byte."""
+    return np.packbits(np.asarray(vectors) > 0, axis=1)
+
+
+def hamming_distances(codes: np.ndarray, query_code: np.ndarray) -> np.ndarray:
+    """Bit differences between each packed row and a packed query."""
+    diff = np.bitwise_xor(codes, query_code)
+    if hasattr(np, "bitwise_count") and diff.shape[1] % 8 == 0:
+        # Popcount 64 bits at a time
+        words = np.ascontiguousarray(diff).view(np.uint64)
+        return np.asarray(np.bitwise_count(words).sum(axis=1, dtype=np.int32))
+    return np.asarray(POPCOUNT[diff].sum(axis=1, dtype=np.int32))
+
+
+class QuantizedIndex:
+    """In-memory int8 or binary codes used to shortlist candidates for float rescoring.
+
+    int8 takes 1 byte per dimension (4x smaller than float32); binary takes 1 bit
+    (32x smaller) and ranks by Hamming distance.
+    """
+
+    def __init__(self, mode: QuantizationMode, dim: int):
+        if mode == "none":
+            raise ValueError("QuantizedIndex requires int8 or binary mode")
+        self.mode = mode
+        self.dim = dim
+        self.codes = np.zeros(
+            (0, dim) if mode == "int8" else (0, (dim + 7) // 8),
+            dtype=np.int8 if mode == "int8" else np.uint8,
+        )
+        self.scales = np.zeros(0, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.codes.nbytes + self.scales.nbytes)
+
+    def append(self, vectors: np.ndarray) -> None:
+        if self.mode == "int8":
+            codes, scales = quantize_int8(vectors)
+            self.scales = np.concatenate([self.scales, scales])
+        else:
+            codes = quantize_binary(vectors)
+        self.codes = np.concatenate([self.codes, codes])
+
+    def snapshot(self, rows: int) -> "QuantizedIndex":
+        """The first rows codes, unaffected by later appends; arrays are shared,
+        not copied, since append replaces them rather than growing them."""
+        frozen = QuantizedIndex(self.mode, self.dim)
+        frozen.codes = self.codes[:rows]
+        frozen.scales = self.scales[:rows]
+        return frozen
+
+    def scores(self, query: np.ndarray, rows: np.ndarray | None = None) -> np.ndarray:
+        """Approximate similarity of each row (all rows, or the given row ids) to a
+        normalized query; higher is closer."""
+        codes = self.codes if rows is None else self.codes[rows]
+        if self.mode == "int8":
+            query = query.astype(np.float32)
+            scores = np.empty(len(codes), dtype=np.float32)
+            for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+                block = codes[start : start + SCORE_BLOCK_ROWS]
+                scores[start : start + len(block)] = block.astype(np.float32) @ query
+            return scores * (self.scales if rows is None else self.scales[rows])
+
+        query_code = quantize_binary(query.reshape(1, -1))[0]
+        return -hamming_distances(codes, query_code).astype(np.float32)
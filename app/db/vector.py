@@ -1,12 +1,81 @@
 import hashlib
+import logging
+import re
+import threading
+import time
 from collections.abc import Sequence
-from typing import cast
+from pathlib import Path
+from typing import Any, Protocol, cast
 import chromadb
+import httpx
+import numpy as np
 from chromadb.api import ClientAPI
+from chromadb.api.models.Collection import Collection
 from chromadb.api.types import Metadata as ChromaMetadata, QueryResult
+from chromadb.errors import InternalError, NotFoundError, RateLimitError
+from app.db.chunk_store import ChunkStore, MissingChunkError
 from app.rag import embeddings
 from app.types import Metadata
 
+logger = logging.getLogger(__name__)
+
+# Chunks embedded per call when add_documents embeds, so memory stays flat
+# however large the document
+ADD_WINDOW = 256
+# Chunks per Chroma upsert, capped by the client's maximum batch size
+UPSERT_BATCH_SIZE = 1024
+UPSERT_ATTEMPTS = 4
+# Backoff before the first retry, doubled for each one after it
+UPSERT_RETRY_SECONDS = 0.5
+# Failures of an upsert over HTTP that are worth retrying
+RETRYABLE_UPSERT_ERRORS = (httpx.TransportError, InternalError, RateLimitError)
+
+
+def make_chunk_id(source: str, text: str) -> str:
+    """Deterministic chunk ID from source and content.
+
+    This prevents duplicate entries if the same file is ingested twice.
+    """
+    unique_str = f"{source}::{text}"
+    return hashlib.md5(unique_str.encode("utf-8")).hexdigest()
+
+
+class VectorStore(Protocol):
+    """Storage backend used by RAGService for chunk upserts and vector search."""
+
+    target: str
+
+    def add_documents(
+        self,
+        texts: list[str],
+        metadatas: Sequence[ChromaMetadata] | None = None,
+        doc_embeddings: np.ndarray | None = None,
+    ) -> None: ...
+
+    def similarity_search(
+        self, query: str, k: int = 5
+    ) -> list[tuple[str, Metadata, float]]: ...
+
+    def similarity_search_by_vector(
+        self, query_vector: np.ndarray, k: int = 5
+    ) -> list[tuple[str, Metadata, float]]: ...
+
+    def similarity_search_many(
+        self, queries: list[str], k: int = 5
+    ) -> list[list[tuple[str, Metadata, float]]]: ...
+
+    def similarity_search_by_vectors(
+        self, query_vectors: np.ndarray, k: int = 5
+    ) -> list[list[tuple[str, Metadata, float]]]: ...
+
+    def get_ids_by_source(self, source: str) -> set[str]: ...
+
+    def get_documents(
+        self, ids: list[str]
+    ) -> list[tuple[str, Metadata, np.ndarray] | None]: ...
+
+    def delete(self, ids: list[str]) -> None: ...
+
 
 class ChromaVectorStore:
     client: ClientAPI
@@ -18,9 +87,29 @@ class ChromaVectorStore:
         collection_name: str = "documents",
         host: str | None = None,
         port: int = 8000,
+        upsert_batch_size: int = UPSERT_BATCH_SIZE,
+        chunk_store_dir: str | None = None,
     ) -> None:
         self.client = self._create_client(persist_directory, host, port)
         self.collection_name = collection_name
+        location = f"{host}:{port}" if host else str(persist_directory)
+        self.target = f"{location}/{collection_name}"
+        self.upsert_batch_size = max(1, upsert_batch_size)
+        # With a chunk store, Chroma keeps only IDs, vectors and metadata and search
+        # results are hydrated from the store; one store per target
+        self.chunk_store = (
+            ChunkStore(
+                str(
+                    Path(chunk_store_dir) / re.sub(r"[^A-Za-z0-9._-]", "_", self.target)
+                )
+            )
+            if chunk_store_dir
+            else None
+        )
+        # Looked up once rather than with a round trip per call in HTTP mode
+        self._collection_handle: Collection | None = None
+        self._max_batch_size: int | None = None
+        self._lock = threading.Lock()
 
     def _create_client(
         self,
@@ -36,13 +125,43 @@ class ChromaVectorStore:
 
         return chromadb.PersistentClient(path=persist_directory)
 
+    def _collection(self) -> Collection:
+        with self._lock:
+            if self._collection_handle is None:
+                self._collection_handle = self.client.get_or_create_collection(
+                    name=self.collection_name
+                )
+            return self._collection_handle
+
+    def _upsert_batch_size(self) -> int:
+        with self._lock:
+            if self._max_batch_size is None:
+                self._max_batch_size = self.client.get_max_batch_size()
+        return min(self.upsert_batch_size, self._max_batch_size)
+
     def add_documents(
         self,
         texts: list[str],
         metadatas: Sequence[ChromaMetadata] | None = None,
+        doc_embeddings: np.ndarray | None = None,
     ) -> None:
-        collection = self.client.get_or_create_collection(name=self.collection_name)
-        doc_embeddings = embeddings.embed_documents(texts)
+        """Upsert texts, embedding them unless precomputed embeddings are given.
+
+        Texts are embedded ADD_WINDOW at a time and upserted in batches of up to
+        upsert_batch_size, within Chroma's maximum batch size. Safe to call from
+        several threads, which keeps several upserts in flight in HTTP mode.
+        """
+        if doc_embeddings is None:
+            for start in range(0, len(texts), ADD_WINDOW):
+                window = texts[start : start + ADD_WINDOW]
+                self.add_documents(
+                    window,
+                    metadatas[start : start + ADD_WINDOW]
+                    if metadatas is not None
+                    else None,
+                    embeddings.embed_documents(window),
+                )
+            return
 
         ids = []
         for i, text in enumerate(texts):
@@ -50,27 +169,101 @@ class ChromaVectorStore:
             if metadatas and i < len(metadatas):
                 # We rely on 'source' being a string or simpler type in metadata
                 source = str(metadatas[i].get("source", ""))
+            ids.append(make_chunk_id(source, text))
+
+        batch_size = self._upsert_batch_size()
+        vectors = np.asarray(doc_embeddings, dtype=embeddings.EMBEDDING_DTYPE)
+        for start in range(0, len(texts), batch_size):
+            stop = start + batch_size
+            # Chroma rejects an ID repeated within one upsert; a chunk repeated
+            # verbatim in a document keeps its last copy
+            rows = [
+                start + i
+                for i in {
+                    chunk_id: i for i, chunk_id in enumerate(ids[start:stop])
+                }.values()
+            ]
+            batch_ids = [ids[i] for i in rows]
+            documents = [texts[i] for i in rows]
+            if self.chunk_store is not None:
+                # Texts are stored before their vectors, so search can always
+                # hydrate what it finds
+                self.chunk_store.put_many(batch_ids, documents)
+            self._upsert(
+                documents=documents if self.chunk_store is None else None,
+                embeddings=vectors[rows],
+                metadatas=[metadatas[i] for i in rows]
+                if metadatas is not None
+                else None,
+                ids=batch_ids,
+            )
+
+    def _upsert(self, **batch: Any) -> None:
+        """One upsert, retried with backoff on transient server or network errors."""
+        delay = UPSERT_RETRY_SECONDS
+        for attempt in range(1, UPSERT_ATTEMPTS + 1):
+            try:
+                self._collection().upsert(**batch)
+                return
+            except NotFoundError:
+                # Deleted behind the cached handle; recreated on the next attempt
+                with self._lock:
+                    self._collection_handle = None
+                if attempt == UPSERT_ATTEMPTS:
+                    raise
+            except RETRYABLE_UPSERT_ERRORS as e:
+                if attempt == UPSERT_ATTEMPTS:
+                    raise
+                logger.warning(
+                    f"Upsert of {len(batch['ids'])} chunks failed ({e}); "
+                    f"retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+                delay *= 2
+
+    def get_ids_by_source(self, source: str) -> set[str]:
+        collection = self._collection()
+        return set(collection.get(where={"source": source}, include=[])["ids"])
 
-            # Create a deterministic ID based on source and content
-            # This prevents duplicate entries if the same file is ingested twice
-            unique_str = f"{source}::{text}"
-            ids.append(hashlib.md5(unique_str.encode("utf-8")).hexdigest())
-
-        collection.upsert(
-            documents=texts,
-            embeddings=cast(list[Sequence[float]], doc_embeddings),
-            metadatas=cast(list[ChromaMetadata], metadatas)
-            if metadatas is not None
-            else None,
-            ids=ids,
+    def delete(self, ids: list[str]) -> None:
+        if not ids:
+            return
+        collection = self._collection()
+        collection.delete(ids=ids)
+        if self.chunk_store is not None:
+            self.chunk_store.delete(ids)
+
+    def get_documents(
+        self, ids: list[str]
+    ) -> list[tuple[str, Metadata, np.ndarray] | None]:
+        """Text, metadata and stored vector per chunk ID; None for IDs not stored."""
+        if not ids:
+            return []
+        found = self._collection().get(
+            ids=ids, include=["documents", "metadatas", "embeddings"]
         )
+        count = len(found["ids"])
+        documents = cast(list[str], found.get("documents") or [None] * count)
+        self._hydrate([found["ids"]], [documents])
+        vectors = np.asarray(found.get("embeddings"), dtype=embeddings.EMBEDDING_DTYPE)
+        by_id = {
+            chunk_id: (doc, cast(Metadata, dict(meta or {})), vector)
+            for chunk_id, doc, meta, vector in zip(
+                found["ids"],
+                documents,
+                found.get("metadatas") or [{}] * count,
+                vectors,
+            )
+            if doc is not None
+        }
+        return [by_id.get(chunk_id) for chunk_id in ids]
 
     def _process_search_results(
-        self, results: QueryResult
+        self, results: QueryResult, query_index: int = 0
     ) -> list[tuple[str, Metadata, float]]:
-        docs = (results.get("documents") or [[]])[0]
-        metas = (results.get("metadatas") or [[]])[0]
-        dists = (results.get("distances") or [[]])[0]
+        docs = (results.get("documents") or [[]])[query_index]
+        metas = (results.get("metadatas") or [[]])[query_index]
+        dists = (results.get("distances") or [[]])[query_index]
 
         if not docs:
             return []
@@ -78,18 +271,83 @@ class ChromaVectorStore:
         return [
             (doc, cast(Metadata, dict(meta or {})), dist)
             for doc, meta, dist in zip(docs, metas, dists)
+            if doc is not None
+        ]
+
+    def _hydrate(
+        self, id_lists: list[list[str]], documents: list[list[str]] | None
+    ) -> None:
+        """Fill in texts Chroma does not hold from the chunk store, with one batched
+        read for all queries. Chunks written before the store keep their Chroma text.
+
+        Raises MissingChunkError if the store lacks a chunk: Chroma holds no text
+        to fall back to, and dropping the chunk would return fewer than k results.
+        """
+        if self.chunk_store is None or documents is None:
+            return
+        missing = [
+            chunk_id
+            for ids, docs in zip(id_lists, documents)
+            for chunk_id, doc in zip(ids, docs)
+            if doc is None
         ]
+        if not missing:
+            return
+        texts = dict(zip(missing, self.chunk_store.get_many(missing)))
+        lost = [chunk_id for chunk_id, text in texts.items() if text is None]
+        if lost:
+            raise MissingChunkError(
+                f"{len(lost)} chunks are missing from the chunk store at "
+                f"{self.chunk_store.directory} (first: {lost[0]}); "
+                "re-ingest their sources to restore them"
+            )
+        for ids, docs in zip(id_lists, documents):
+            hydrated = cast(list[str | None], docs)
+            for i, chunk_id in enumerate(ids):
+                if hydrated[i] is None:
+                    hydrated[i] = texts[chunk_id]
 
     def similarity_search(
         self, query: str, k: int = 5
     ) -> list[tuple[str, Metadata, float]]:
-        collection = self.client.get_or_create_collection(name=self.collection_name)
-        query_vector = embeddings.embed_query(query)
+        return self.similarity_search_by_vector(embeddings.embed_query(query), k=k)
 
+    def similarity_search_by_vector(
+        self, query_vector: np.ndarray, k: int = 5
+    ) -> list[tuple[str, Metadata, float]]:
+        collection = self._collection()
         results = collection.query(
-            query_embeddings=cast(list[Sequence[float]], [query_vector]),
+            query_embeddings=np.asarray(
+                [query_vector], dtype=embeddings.EMBEDDING_DTYPE
+            ),
             n_results=k,
             include=["documents", "metadatas", "distances"],
         )
+        self._hydrate(results["ids"], results.get("documents"))
 
         return self._process_search_results(results)
+
+    def similarity_search_many(
+        self, queries: list[str], k: int = 5
+    ) -> list[list[tuple[str, Metadata, float]]]:
+        return self.similarity_search_by_vectors(embeddings.embed_queries(queries), k=k)
+
+    def similarity_search_by_vectors(
+        self, query_vectors: np.ndarray, k: int = 5
+    ) -> list[list[tuple[str, Metadata, float]]]:
+        """Search several query vectors in one collection.query round trip."""
+        if len(query_vectors) == 0:
+            return []
+        collection = self._collection()
+        results = collection.query(
+            query_embeddings=np.asarray(
+                query_vectors, dtype=embeddings.EMBEDDING_DTYPE
+            ),
+            n_results=k,
+            include=["documents", "metadatas", "distances"],
+        )
+        self._hydrate(results["ids"], results.get("documents"))
+
+        return [
+            self._process_search_results(results, i) for i in range(len(query_vectors))
+        ]
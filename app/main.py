@@ -1,14 +1,24 @@
+import time
+
+# Taken before the other imports so --startup-profile includes them
+STARTED_AT = time.perf_counter()
+
 import sys
 import logging
 import argparse
 from pathlib import Path
+from typing import TYPE_CHECKING
 from app.core.config import Settings
-from app.core.chat_service import ChatService
+from app.core.startup import Lazy, StartupProfile, start_warm_up
 from app.db.chat_repository import ChatRepository
-from app.rag.service import RAGService
 from app.cli import CLI
-from app.agents.planning import PlanningService
-from app.agents.healer import HealerService
+
+# Heavy subsystems (openai, chromadb, torch) are imported on first use
+if TYPE_CHECKING:
+    from app.agents.healer import HealerService
+    from app.agents.planning import PlanningService
+    from app.core.chat_service import ChatService
+    from app.rag.service import RAGService
 
 
 def configure_logging(verbose: bool = False) -> None:
@@ -38,28 +48,69 @@ def configure_logging(verbose: bool = False) -> None:
 def main() -> None:
     parser = argparse.ArgumentParser(description="AI Chat CLI")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="Report import and initialization times of each subsystem on exit",
+    )
     args = parser.parse_args()
 
     configure_logging(verbose=args.verbose)
+    profile = StartupProfile(started_at=STARTED_AT)
 
-    settings = Settings()
-    repo = ChatRepository()
-    rag_service = RAGService(settings=settings)
-    chat_service = ChatService(repo=repo, rag_service=rag_service, settings=settings)
-    planning_service = PlanningService(settings=settings)
-    healer_service = HealerService(
-        chat_service=chat_service, max_attempts=3, timeout_seconds=30
-    )
+    with profile.timed("Settings + ChatRepository", "init"):
+        settings = Settings()
+        repo = ChatRepository()
+
+    def build_rag_service() -> "RAGService":
+        with profile.timed("app.rag.service", "import"):
+            from app.rag.service import RAGService
+        with profile.timed("RAGService", "init"):
+            return RAGService(settings=settings)
+
+    def build_chat_service() -> "ChatService":
+        rag = rag_service.get()
+        with profile.timed("app.core.chat_service", "import"):
+            from app.core.chat_service import ChatService
+        with profile.timed("ChatService", "init"):
+            return ChatService(repo=repo, rag_service=rag, settings=settings)
+
+    def build_planning_service() -> "PlanningService":
+        with profile.timed("app.agents.planning", "import"):
+            from app.agents.planning import PlanningService
+        with profile.timed("PlanningService", "init"):
+            return PlanningService(settings=settings)
+
+    def build_healer_service() -> "HealerService":
+        chat = chat_service.get()
+        with profile.timed("app.agents.healer", "import"):
+            from app.agents.healer import HealerService
+        with profile.timed("HealerService", "init"):
+            return HealerService(chat_service=chat, max_attempts=3, timeout_seconds=30)
+
+    def warm_rag() -> None:
+        service = rag_service.get()
+        with profile.timed("embedding model + index", "warm-up"):
+            service.warm_up()
+
+    rag_service = Lazy(build_rag_service)
+    chat_service = Lazy(build_chat_service)
 
     cli = CLI(
         chat_service=chat_service,
         rag_service=rag_service,
         settings=settings,
-        planning_service=planning_service,
-        healer_service=healer_service,
+        planning_service=Lazy(build_planning_service),
+        healer_service=Lazy(build_healer_service),
     )
+    # Load RAG (embedding model, vector store) and chat while the user types
+    start_warm_up([("RAG", warm_rag), ("chat", chat_service.get)])
+    profile.mark_first_prompt()
     cli.run()
 
+    if args.startup_profile:
+        print(profile.report())
+
 
 if __name__ == "__main__":
     main()
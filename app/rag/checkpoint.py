@@ -0,0 +1,123 @@
+import sqlite3
+import threading
+from datetime import UTC, datetime
+from pathlib import Path
+
+
+class IngestCheckpoint:
+    """Durable per-file and per-batch progress of a directory ingest run.
+
+    A run is keyed by vector store target and directory. Each written batch
+    commits how many chunks of each file it contained, and each finished file
+    is marked done, so an interrupted run can be resumed: done files are skipped
+    and partially written files continue after their last committed batch.
+    """
+
+    def __init__(self, db_path: str, target: str, directory: str):
+        self.db_path = db_path
+        self.target = target
+        self.directory = directory
+        self.run_id: int | None = None
+        self.resumed = False
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        # Written from the pipeline's writer thread, read from its loader threads
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS ingest_runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    target TEXT NOT NULL,
+                    directory TEXT NOT NULL,
+                    started_at TEXT NOT NULL,
+                    finished_at TEXT
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS ingest_files (
+                    run_id INTEGER NOT NULL,
+                    path TEXT NOT NULL,
+                    written_chunks INTEGER NOT NULL DEFAULT 0,
+                    chunk_count INTEGER,
+                    PRIMARY KEY (run_id, path)
+                )
+            """)
+
+    def start(self, resume: bool = False) -> bool:
+        """Begin a run, continuing the latest unfinished one if resume is set.
+
+        Returns True if an unfinished run was resumed.
+        """
+        with self._lock, self._conn:
+            row = (
+                self._conn.execute(
+                    "SELECT id FROM ingest_runs WHERE target = ? AND directory = ? "
+                    "AND finished_at IS NULL ORDER BY id DESC LIMIT 1",
+                    (self.target, self.directory),
+                ).fetchone()
+                if resume
+                else None
+            )
+            if row:
+                self.run_id = row[0]
+            else:
+                cursor = self._conn.execute(
+                    "INSERT INTO ingest_runs (target, directory, started_at) "
+                    "VALUES (?, ?, ?)",
+                    (self.target, self.directory, _now()),
+                )
+                self.run_id = cursor.lastrowid
+        self.resumed = row is not None
+        return self.resumed
+
+    def completed_chunk_count(self, path: Path) -> int | None:
+        """Chunk count of a file already finished in this run, else None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT chunk_count FROM ingest_files WHERE run_id = ? AND path = ?",
+                (self.run_id, str(path)),
+            ).fetchone()
+        return row[0] if row else None
+
+    def written_chunks(self, path: Path) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT written_chunks FROM ingest_files WHERE run_id = ? AND path = ?",
+                (self.run_id, str(path)),
+            ).fetchone()
+        return row[0] if row else 0
+
+    def record_batch(self, written: dict[Path, int]) -> None:
+        """Commit chunks written per file; call after the batch is upserted."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO ingest_files (run_id, path, written_chunks) "
+                "VALUES (?, ?, ?) ON CONFLICT (run_id, path) "
+                "DO UPDATE SET written_chunks = written_chunks + excluded.written_chunks",
+                [(self.run_id, str(path), count) for path, count in written.items()],
+            )
+
+    def record_file(self, path: Path, chunk_count: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO ingest_files (run_id, path, chunk_count) "
+                "VALUES (?, ?, ?) ON CONFLICT (run_id, path) "
+                "DO UPDATE SET chunk_count = excluded.chunk_count",
+                (self.run_id, str(path), chunk_count),
+            )
+
+    def finish(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE ingest_runs SET finished_at = ? WHERE id = ?",
+                (_now(), self.run_id),
+            )
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def _now() -> str:
+    return datetime.now(UTC).isoformat()
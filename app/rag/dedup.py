@@ -0,0 +1,249 @@
+import logging
+import os
+import re
+import threading
+import zlib
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NUM_PERMUTATIONS = 64
+# 16 bands of 4 rows: chunks with Jaccard similarity 0.8 share a band with
+# probability ~0.999, at 0.5 with ~0.64, before the exact signature check
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+SHINGLE_WORDS = 5
+MERSENNE_PRIME = (1 << 61) - 1
+WORD_PATTERN = re.compile(r"\w+")
+
+_rng = np.random.default_rng(0x5EED)
+_PERM_A = _rng.integers(1, MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.integers(0, MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    """MinHash of the text's word 5-gram shingles (case-insensitive).
+
+    Shingles are hashed with crc32 so signatures are stable across processes.
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    shingles = {
+        " ".join(words[i : i + SHINGLE_WORDS])
+        for i in range(max(1, len(words) - SHINGLE_WORDS + 1))
+    }
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    # (a * x + b) mod p per permutation; x < 2^32 and a < 2^61 may wrap uint64,
+    # which only changes the (still universal) hash family
+    permuted = (hashes[:, None] * _PERM_A + _PERM_B) % MERSENNE_PRIME
+    return np.asarray(permuted.min(axis=0), dtype=np.uint32)
+
+
+class ChunkDeduplicator:
+    """Finds chunks that near-duplicate a chunk of another document, such as the
+    license header and footer every Gutenberg book carries.
+
+    MinHash signatures of kept chunks are indexed with LSH bands and persisted to
+    index_path, so the first document to contain a passage keeps it and later
+    documents (in this or any later ingest) drop their copies. Matches within
+    the same source are ignored, so re-ingesting a document never suppresses it
+    against its own previous version.
+
+    A classified document's kept chunks are staged: later documents are checked
+    against them, but they replace the source's saved entries only on commit(),
+    once its chunks are stored. discard() drops staged chunks that never were.
+
+    The sources each document's copies were suppressed against are remembered.
+    When a commit drops chunks a source kept, it returns the sources that
+    depended on that source, so that they can be checked again.
+    """
+
+    def __init__(self, index_path: str | None = None, threshold: float = 0.8):
+        self.index_path = Path(index_path) if index_path else None
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._signatures: list[np.ndarray] = []
+        self._sources: list[str | None] = []
+        self._bands: list[dict[bytes, list[int]]] = [{} for _ in range(BANDS)]
+        self._by_source: dict[str, list[int]] = {}
+        self._staged: dict[str, list[int]] = {}
+        # Source -> the sources its suppressed chunks duplicate
+        self._kept_by: dict[str, set[str]] = {}
+        self._staged_kept_by: dict[str, set[str]] = {}
+        self._dirty = False
+        self._load()
+
+    @property
+    def entries(self) -> int:
+        """Committed entries."""
+        with self._lock:
+            return sum(len(indices) for indices in self._by_source.values())
+
+    def filter(self, source: str, chunks: list[str]) -> tuple[list[str], int]:
+        """Drop chunks that near-duplicate another source's chunks, and stage the
+        rest under source.
+
+        Returns the kept chunks in order and the number suppressed.
+        """
+        kept = [
+            chunk for chunk, duplicate in self.classify(source, chunks) if not duplicate
+        ]
+        return kept, len(chunks) - len(kept)
+
+    def classify(
+        self, source: str, chunks: Iterable[str]
+    ) -> Iterator[tuple[str, bool]]:
+        """Yield (chunk, is_duplicate) as chunks arrive, staging the kept ones
+        under source."""
+        return self.classify_signed(
+            source, ((chunk, minhash_signature(chunk)) for chunk in chunks)
+        )
+
+    def classify_signed(
+        self, source: str, signed_chunks: Iterable[tuple[str, np.ndarray]]
+    ) -> Iterator[tuple[str, bool]]:
+        """classify() for chunks whose signatures were computed beforehand."""
+        with self._lock:
+            self._discard_locked(source)
+            staged = self._staged[source] = []
+            kept_by = self._staged_kept_by[source] = set()
+        for chunk, signature in signed_chunks:
+            with self._lock:
+                original = self._duplicated_source_locked(source, signature)
+                if original is None:
+                    staged.append(self._add_locked(source, signature))
+                else:
+                    kept_by.add(original)
+            yield chunk, original is not None
+
+    def commit(self, source: str) -> set[str]:
+        """Replace source's entries with its staged ones, now that they are stored.
+
+        Returns the other sources whose copies were suppressed against source, if
+        it no longer keeps every chunk it did: their copies may now be the only
+        ones left.
+        """
+        with self._lock:
+            staged = self._staged.pop(source, [])
+            kept = {self._signatures[i].tobytes() for i in staged}
+            dropped = any(
+                self._signatures[i].tobytes() not in kept
+                for i in self._by_source.get(source, [])
+            )
+            self._remove_source_locked(source)
+            self._by_source[source] = staged
+            self._kept_by[source] = self._staged_kept_by.pop(source, set())
+            self._dirty = True
+            if not dropped:
+                return set()
+            return {
+                dependent
+                for dependent, originals in self._kept_by.items()
+                if source in originals and dependent != source
+            }
+
+    def discard(self, source: str | None = None) -> None:
+        """Drop the chunks staged for source, or for every source."""
+        with self._lock:
+            for staged_source in [source] if source else list(self._staged):
+                self._discard_locked(staged_source)
+
+    def save(self) -> None:
+        if self.index_path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            live = sorted(i for indices in self._by_source.values() for i in indices)
+            signatures = (
+                np.stack([self._signatures[i] for i in live])
+                if live
+                else np.zeros((0, NUM_PERMUTATIONS), dtype=np.uint32)
+            )
+            sources = np.array([self._sources[i] for i in live], dtype=str)
+            pairs = [
+                (dependent, original)
+                for dependent, originals in self._kept_by.items()
+                for original in sorted(originals)
+            ]
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix(".tmp.npz")
+            np.savez(
+                tmp_path,
+                signatures=signatures,
+                sources=sources,
+                dependents=np.array([pair[0] for pair in pairs], dtype=str),
+                originals=np.array([pair[1] for pair in pairs], dtype=str),
+            )
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+
+    def _load(self) -> None:
+        if self.index_path is None or not self.index_path.exists():
+            return
+        try:
+            with np.load(self.index_path) as data:
+                signatures, sources = data["signatures"], data["sources"].tolist()
+                # Absent from indexes saved before dependencies were tracked
+                pairs = (
+                    zip(data["dependents"].tolist(), data["originals"].tolist())
+                    if "dependents" in data.files
+                    else []
+                )
+            if signatures.shape[1:] != (NUM_PERMUTATIONS,):
+                raise ValueError(f"signature shape {signatures.shape}")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable dedup index {self.index_path}: {e}")
+            return
+        for source, signature in zip(sources, signatures):
+            self._by_source.setdefault(source, []).append(
+                self._add_locked(source, signature)
+            )
+        for dependent, original in pairs:
+            self._kept_by.setdefault(dependent, set()).add(original)
+
+    def _band_keys(self, signature: np.ndarray) -> list[bytes]:
+        return [
+            signature[b * ROWS_PER_BAND : (b + 1) * ROWS_PER_BAND].tobytes()
+            for b in range(BANDS)
+        ]
+
+    def _duplicated_source_locked(
+        self, source: str, signature: np.ndarray
+    ) -> str | None:
+        """Another source holding a near-duplicate of the chunk, if any."""
+        checked: set[int] = set()
+        for band, key in zip(self._bands, self._band_keys(signature)):
+            for i in band.get(key, ()):
+                other = self._sources[i]
+                if i in checked or other in (None, source):
+                    continue
+                checked.add(i)
+                similarity = np.count_nonzero(self._signatures[i] == signature)
+                if similarity >= self.threshold * NUM_PERMUTATIONS:
+                    return other
+        return None
+
+    def _add_locked(self, source: str, signature: np.ndarray) -> int:
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        self._sources.append(source)
+        for band, key in zip(self._bands, self._band_keys(signature)):
+            band.setdefault(key, []).append(index)
+        return index
+
+    def _remove_source_locked(self, source: str) -> None:
+        # Tombstoned in place; band lookups skip them and save() drops them
+        for i in self._by_source.pop(source, []):
+            self._sources[i] = None
+
+    def _discard_locked(self, source: str) -> None:
+        self._staged_kept_by.pop(source, None)
+        for i in self._staged.pop(source, []):
+            self._sources[i] = None
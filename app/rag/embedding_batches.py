@@ -0,0 +1,50 @@
+"""Length-bucketed encode batches.
+
+The model pads every text in a batch to the longest one. It sorts each call's
+texts by characters, but its fixed batches of 32 still span a wide range of
+token lengths when short page tails sit next to full chunks. Texts are instead
+encoded longest first, in batches of similar token length sized to a budget of
+padded tokens, so short texts go in larger batches and long ones in smaller,
+and the vectors are scattered back to input order.
+"""
+
+from collections.abc import Callable, Sequence
+
+import numpy as np
+
+
+def plan_batches(
+    lengths: Sequence[int], max_tokens: int, max_batch_size: int
+) -> list[np.ndarray]:
+    """Indices of the texts in each batch, longest texts first.
+
+    A batch's padded size, its text count times its longest length, stays within
+    max_tokens; a text longer than max_tokens is a batch on its own.
+    """
+    order = np.argsort(-np.asarray(lengths, dtype=np.int64), kind="stable")
+    batches = []
+    start = 0
+    while start < len(order):
+        # Sorted longest first, so a batch's first text sets its padded length
+        longest = max(1, int(lengths[order[start]]))
+        size = max(1, min(max_batch_size, max_tokens // longest))
+        batches.append(order[start : start + size])
+        start += size
+    return batches
+
+
+def encode_by_length(
+    texts: list[str],
+    lengths: Sequence[int],
+    encode: Callable[[list[str]], np.ndarray],
+    max_tokens: int,
+    max_batch_size: int,
+) -> np.ndarray:
+    """Encode texts in length-homogeneous batches; rows follow the input order."""
+    vectors: np.ndarray | None = None
+    for batch in plan_batches(lengths, max_tokens, max_batch_size):
+        encoded = encode([texts[i] for i in batch])
+        if vectors is None:
+            vectors = np.empty((len(texts), encoded.shape[1]), dtype=encoded.dtype)
+        vectors[batch] = encoded
+    return vectors if vectors is not None else np.zeros((0, 0), dtype=np.float32)
@@ -0,0 +1,322 @@
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+KEY_BYTES = 16
+INITIAL_CAPACITY = 1024
+EVICTION_FRACTION = 0.1
+FLUSH_INTERVAL_SECONDS = 5.0
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def cache_key(model_name: str, text: str) -> bytes:
+    digest = hashlib.blake2b(digest_size=KEY_BYTES)
+    digest.update(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.digest()
+
+
+class EmbeddingCache:
+    """Content-addressed on-disk embedding cache with LRU eviction.
+
+    Vectors are stored in fixed-size slots of a memory-mapped matrix
+    (``vectors.bin``); ``keys.bin`` holds the 16-byte text hash owning each slot and
+    ``lru.npy`` the last-used clock per slot.
+
+    Several processes may share a cache directory. Writes hold an exclusive
+    ``flock`` on ``lock`` and reads a shared one. Each process keeps its own
+    key-to-slot map, so a slot is served only while ``keys.bin`` still holds the
+    key; one that another process has reused counts as a miss.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        model_name: str,
+        max_entries: int = 500_000,
+        dtype: str = "float16",
+    ):
+        safe_name = re.sub(r"[^A-Za-z0-9._-]", "_", model_name)
+        self.directory = Path(cache_dir) / safe_name
+        self.model_name = model_name
+        self.max_entries = max(1, max_entries)
+        self.dtype = np.dtype(dtype)
+
+        self._lock = threading.Lock()
+        self._slots: dict[bytes, int] = {}
+        self._free_slots: list[int] = []
+        self._dim: int | None = None
+        self._vectors: np.memmap | None = None
+        self._keys: np.memmap | None = None
+        self._last_used = np.zeros(0, dtype=np.int64)
+        self._clock = 0
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        with self._file_lock(exclusive=False):
+            self._load()
+
+    @property
+    def capacity(self) -> int:
+        return len(self._last_used)
+
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, self.evictions, len(self._slots))
+
+    def get_many(self, texts: list[str]) -> list[np.ndarray | None]:
+        """Look up vectors for texts; misses are returned as None."""
+        keys = [cache_key(self.model_name, text) for text in texts]
+        results: list[np.ndarray | None] = []
+        with self._lock, self._file_lock(exclusive=False):
+            for key in keys:
+                slot = self._owned_slot(key)
+                if slot is None:
+                    self.misses += 1
+                    results.append(None)
+                    continue
+                assert self._vectors is not None
+                self.hits += 1
+                self._clock += 1
+                self._last_used[slot] = self._clock
+                # Saved on flush, so other processes' evictions see it too
+                self._dirty = True
+                results.append(np.array(self._vectors[slot], dtype=np.float32))
+        return results
+
+    def put_many(self, texts: list[str], vectors: np.ndarray) -> None:
+        if not texts:
+            return
+
+        vectors = np.asarray(vectors)
+        with self._lock, self._file_lock(exclusive=True):
+            self._sync_locked()
+            if self._dim is None:
+                self._initialize(vectors.shape[1])
+            for text, vector in zip(texts, vectors):
+                key = cache_key(self.model_name, text)
+                slot = self._owned_slot(key)
+                if slot is None:
+                    slot = self._allocate_slot()
+                    self._slots[key] = slot
+                assert self._vectors is not None and self._keys is not None
+                self._vectors[slot] = vector
+                self._keys[slot] = np.frombuffer(key, dtype=np.uint8)
+                self._clock += 1
+                self._last_used[slot] = self._clock
+
+            self._dirty = True
+            if time.monotonic() - self._last_flush >= FLUSH_INTERVAL_SECONDS:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            with self._file_lock(exclusive=True):
+                self._flush_locked()
+
+    def _path(self, name: str) -> Path:
+        return self.directory / name
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool) -> Iterator[None]:
+        """Hold the cache directory's lock against other processes; self._lock
+        covers threads. Reads of a cache not created yet need no lock."""
+        if not self.directory.exists():
+            if not exclusive:
+                yield
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+        # Closing the file releases the lock
+        with open(self._path("lock"), "ab") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def _owned_slot(self, key: bytes) -> int | None:
+        """The slot holding key, unless another process has since reused it."""
+        slot = self._slots.get(key)
+        if slot is None or self._keys is None:
+            return None
+        if self._keys[slot].tobytes() != key:
+            del self._slots[key]
+            return None
+        return slot
+
+    def _disk_capacity(self) -> int:
+        assert self._dim is not None
+        return min(
+            self._path("vectors.bin").stat().st_size
+            // (self._dim * self.dtype.itemsize),
+            self._path("keys.bin").stat().st_size // KEY_BYTES,
+        )
+
+    def _sync_locked(self) -> None:
+        """Pick up a cache created or grown by another process. Slots it filled
+        may sit on the free list; _allocate_slot checks them before use."""
+        if self._dim is None:
+            self._load()
+            return
+        capacity = self._disk_capacity()
+        if capacity > self.capacity:
+            old_capacity = self.capacity
+            self._map_files(capacity)
+            self._last_used = np.concatenate(
+                [self._last_used, np.zeros(capacity - old_capacity, dtype=np.int64)]
+            )
+            self._free_slots[:0] = range(capacity - 1, old_capacity - 1, -1)
+
+    def _load(self) -> None:
+        meta_path = self._path("meta.json")
+        if not meta_path.exists():
+            return
+
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if np.dtype(meta["dtype"]) != self.dtype:
+                raise ValueError(f"cache dtype is {meta['dtype']}, not {self.dtype}")
+            self._dim = int(meta["dim"])
+            capacity = self._disk_capacity()
+            self._map_files(capacity)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(
+                f"Discarding unreadable embedding cache {self.directory}: {e}"
+            )
+            self._dim = None
+            self._vectors = None
+            self._keys = None
+            return
+
+        assert self._keys is not None
+        self._last_used = np.zeros(capacity, dtype=np.int64)
+        lru_path = self._path("lru.npy")
+        if lru_path.exists():
+            saved = np.load(lru_path)[:capacity]
+            self._last_used[: len(saved)] = saved
+
+        occupied = self._keys.any(axis=1)
+        for slot in np.flatnonzero(occupied).tolist():
+            self._slots[self._keys[slot].tobytes()] = slot
+        self._free_slots = np.flatnonzero(~occupied)[::-1].tolist()
+        self._clock = int(self._last_used.max(initial=0))
+
+    def _initialize(self, dim: int) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._dim = dim
+        meta = {"model_name": self.model_name, "dtype": self.dtype.name, "dim": dim}
+        self._path("meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        self._resize(min(INITIAL_CAPACITY, self.max_entries))
+
+    def _map_files(self, capacity: int) -> None:
+        assert self._dim is not None
+        self._vectors = np.memmap(
+            self._path("vectors.bin"),
+            dtype=self.dtype,
+            mode="r+",
+            shape=(capacity, self._dim),
+        )
+        self._keys = np.memmap(
+            self._path("keys.bin"),
+            dtype=np.uint8,
+            mode="r+",
+            shape=(capacity, KEY_BYTES),
+        )
+
+    def _resize(self, capacity: int) -> None:
+        assert self._dim is not None
+        old_capacity = self.capacity
+        if self._vectors is not None and self._keys is not None:
+            self._vectors.flush()
+            self._keys.flush()
+
+        row_bytes = self._dim * self.dtype.itemsize
+        for name, size in (("vectors.bin", row_bytes), ("keys.bin", KEY_BYTES)):
+            with open(self._path(name), "ab") as f:
+                f.truncate(capacity * size)
+        self._map_files(capacity)
+
+        self._last_used = np.concatenate(
+            [self._last_used, np.zeros(capacity - old_capacity, dtype=np.int64)]
+        )
+        self._free_slots.extend(range(capacity - 1, old_capacity - 1, -1))
+
+    def _allocate_slot(self) -> int:
+        assert self._keys is not None
+        while True:
+            if not self._free_slots:
+                if self.capacity < self.max_entries:
+                    self._resize(min(self.capacity * 2, self.max_entries))
+                else:
+                    self._evict(max(1, int(self.capacity * EVICTION_FRACTION)))
+            slot = self._free_slots.pop()
+            if not self._keys[slot].any():
+                return slot
+            # Filled by another process since this one listed it as free
+            self._slots[self._keys[slot].tobytes()] = slot
+
+    def _evict(self, count: int) -> None:
+        """Free the least recently used slots in one batch to amortize eviction."""
+        assert self._keys is not None
+        oldest = np.argpartition(self._last_used, count - 1)[:count]
+        for slot in oldest.tolist():
+            # Freed even if this process never mapped its key: another one wrote it
+            if self._keys[slot].any():
+                self._slots.pop(self._keys[slot].tobytes(), None)
+                self._keys[slot] = 0
+                self.evictions += 1
+            self._free_slots.append(slot)
+
+    def _flush_locked(self) -> None:
+        if not self._dirty or self._vectors is None or self._keys is None:
+            return
+
+        self._vectors.flush()
+        self._keys.flush()
+        lru_path = self._path("lru.npy")
+        last_used = self._last_used
+        if lru_path.exists():
+            # Other processes sharing the cache saved their clocks here: keep the
+            # latest use of each slot rather than only this process's
+            saved = np.load(lru_path)
+            last_used = np.zeros(max(len(saved), len(last_used)), dtype=np.int64)
+            last_used[: len(saved)] = saved
+            np.maximum(
+                last_used[: self.capacity],
+                self._last_used,
+                out=last_used[: self.capacity],
+            )
+            self._last_used = last_used[: self.capacity].copy()
+            self._clock = max(self._clock, int(last_used.max(initial=0)))
+        tmp_path = self._path("lru.tmp.npy")
+        np.save(tmp_path, last_used)
+        os.replace(tmp_path, lru_path)
+        self._dirty = False
+        self._last_flush = time.monotonic()
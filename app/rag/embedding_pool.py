@@ -0,0 +1,125 @@
+"""Worker processes that encode large document batches on many CPU cores.
+
+One ``model.encode`` call keeps a few cores busy at best. The pool shards each
+batch across worker processes, each holding its own copy of the model with
+torch pinned to a few threads, so that workers x threads cores are used without
+oversubscribing them. Vectors come back in input order.
+"""
+
+import itertools
+import multiprocessing
+import os
+import sys
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+from app.rag.embedding_server import EncodeFn
+
+# Texts per shard a batch should give each worker; smaller shards spend more of
+# their time on IPC and per-call overhead than on encoding
+SHARD_SIZE = 64
+# Read by torch, BLAS and the tokenizer when they load, so they are set in a
+# worker before the model is imported
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+# Guards os.environ while workers are spawned with their thread settings
+_spawn_lock = threading.Lock()
+
+
+@contextmanager
+def _worker_environment(threads: int) -> Iterator[None]:
+    """Environment inherited by the worker processes spawned in the block.
+
+    A spawned worker imports numpy, and with it BLAS, while it unpickles its
+    initializer and the main module, before any of its own code runs; so the
+    thread settings are in its environment from the start.
+    """
+    settings = dict.fromkeys(THREAD_ENV_VARS, str(threads))
+    # The fast tokenizer's own thread pool would compete for the pinned cores
+    settings["TOKENIZERS_PARALLELISM"] = "false"
+    with _spawn_lock:
+        saved = {name: os.environ.get(name) for name in settings}
+        os.environ.update(settings)
+        try:
+            yield
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    del os.environ[name]
+                else:
+                    os.environ[name] = value
+
+
+def _init_worker(threads: int, encode: EncodeFn) -> None:
+    encode(["warm up"])  # load the model now, in parallel across workers
+    # torch sizes its pool from OMP_NUM_THREADS, unless it was imported early
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+class EmbeddingPool:
+    """Encodes batches on a pool of worker processes, each with its own model.
+
+    encode must be a module-level function so that it can be sent to spawned
+    workers; it is called once per worker on start to load the model. Raises
+    BrokenProcessPool from encode if a worker dies or fails to start.
+    """
+
+    def __init__(self, workers: int, threads: int, encode: EncodeFn):
+        self.workers = max(1, workers)
+        self.threads = max(1, threads)
+        self._encode = encode
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def batch_size(self) -> int:
+        """Smallest batch that gives every worker a full shard."""
+        return self.workers * SHARD_SIZE
+
+    def start(self) -> None:
+        """Start the workers and wait until each has loaded the model."""
+        with self._lock:
+            if self._executor is not None:
+                return
+            # Forking a process that already runs ingestion and model threads is
+            # unsafe, as for the PDF pool
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.threads, self._encode),
+            )
+            # Workers are spawned as tasks arrive; one task each starts them all
+            with _worker_environment(self.threads):
+                futures = [self._executor.submit(_ready) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Encode texts on up to one shard per worker, in input order."""
+        self.start()
+        executor = self._executor
+        assert executor is not None
+        shard_count = max(1, min(self.workers, len(texts) // SHARD_SIZE))
+        bounds = [len(texts) * i // shard_count for i in range(shard_count + 1)]
+        futures = [
+            executor.submit(self._encode, texts[start:stop])
+            for start, stop in itertools.pairwise(bounds)
+        ]
+        return np.concatenate([future.result() for future in futures])
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
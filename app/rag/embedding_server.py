@@ -0,0 +1,247 @@
+"""Local embedding daemon: one model shared by every process on the machine.
+
+Clients send texts over a Unix socket; the server gathers requests that arrive
+within a few milliseconds of each other into one ``encode`` batch.
+
+Run with ``python -m app.rag.embedding_server``.
+"""
+
+import json
+import logging
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FRAME_HEADER = struct.Struct(">I")
+VECTOR_DTYPE = np.dtype("<f4")
+
+EncodeFn = Callable[[list[str]], np.ndarray]
+
+
+class EmbeddingServerError(RuntimeError):
+    """The server accepted the request but failed to encode it."""
+
+
+def _send_frame(sock: socket.socket, payload: bytes) -> None:
+    sock.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("embedding server connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _recv_frame(sock: socket.socket) -> bytes:
+    (size,) = FRAME_HEADER.unpack(_recv_exact(sock, FRAME_HEADER.size))
+    return _recv_exact(sock, size)
+
+
+class EmbeddingServer:
+    """Unix socket server that micro-batches concurrent encode requests.
+
+    The batcher waits up to max_wait_ms after the first queued request for more
+    to arrive, or until max_batch_size texts are queued, then encodes them in one
+    call. A single request larger than max_batch_size is encoded on its own.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        encode: EncodeFn,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+    ):
+        self.socket_path = socket_path
+        self.encode = encode
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max(0.0, max_wait_ms) / 1000
+        self.batches = 0
+        self.requests = 0
+        self._requests: queue.Queue[tuple[list[str], Future[np.ndarray]]] = (
+            queue.Queue()
+        )
+        self._stop = threading.Event()
+        self._listener: socket.socket | None = None
+
+    def serve_forever(self) -> None:
+        path = Path(self.socket_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # A socket file left by a crashed server would make bind fail
+        path.unlink(missing_ok=True)
+
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(self.socket_path)
+        self._listener.listen()
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+        logger.info(f"Embedding server listening on {self.socket_path}")
+
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._listener.accept()
+            except OSError:
+                break  # listener closed by shutdown()
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        if self._listener is not None:
+            # shutdown() wakes a blocked accept(); close() alone does not on Linux
+            try:
+                self._listener.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._listener.close()
+            Path(self.socket_path).unlink(missing_ok=True)
+
+    def _handle(self, conn: socket.socket) -> None:
+        with conn:
+            while not self._stop.is_set():
+                try:
+                    texts = json.loads(_recv_frame(conn))["texts"]
+                except (ConnectionError, OSError):
+                    return
+
+                future: Future[np.ndarray] = Future()
+                self._requests.put((texts, future))
+                try:
+                    vectors = future.result()
+                except EmbeddingServerError as e:
+                    _send_frame(conn, json.dumps({"error": str(e)}).encode("utf-8"))
+                    continue
+
+                header = {"rows": vectors.shape[0], "dim": vectors.shape[1]}
+                _send_frame(conn, json.dumps(header).encode("utf-8"))
+                _send_frame(conn, vectors.astype(VECTOR_DTYPE).tobytes())
+
+    def _batch_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                batch = [self._requests.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+
+            queued_texts = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait_seconds
+            while queued_texts < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = (
+                        self._requests.get(timeout=remaining)
+                        if remaining > 0
+                        else self._requests.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+                batch.append(item)
+                queued_texts += len(item[0])
+
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: list[tuple[list[str], Future[np.ndarray]]]) -> None:
+        texts = [text for request_texts, _ in batch for text in request_texts]
+        try:
+            vectors = np.asarray(self.encode(texts), dtype=VECTOR_DTYPE)
+        except Exception as e:
+            logger.exception("Embedding batch failed")
+            for _, future in batch:
+                future.set_exception(EmbeddingServerError(str(e)))
+            return
+
+        self.batches += 1
+        self.requests += len(batch)
+        start = 0
+        for request_texts, future in batch:
+            future.set_result(vectors[start : start + len(request_texts)])
+            start += len(request_texts)
+
+
+class EmbeddingClient:
+    """Client for EmbeddingServer, keeping one connection per thread."""
+
+    def __init__(self, socket_path: str, timeout: float = 60.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def available(self) -> bool:
+        return os.path.exists(self.socket_path)
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Encode texts on the server. Raises OSError if it cannot be reached."""
+        sock = self._connection()
+        try:
+            _send_frame(sock, json.dumps({"texts": texts}).encode("utf-8"))
+            header = json.loads(_recv_frame(sock))
+            if "error" in header:
+                raise EmbeddingServerError(header["error"])
+            data = _recv_frame(sock)
+        except OSError:
+            self.close()
+            raise
+
+        return np.frombuffer(data, dtype=VECTOR_DTYPE).reshape(
+            header["rows"], header["dim"]
+        )
+
+    def close(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+
+def main() -> None:
+    from app.core.config import Settings
+    from app.rag import embeddings
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    settings = Settings()
+    if not settings.EMBEDDING_SERVER_SOCKET:
+        raise SystemExit("EMBEDDING_SERVER_SOCKET is not set")
+
+    # Document batches from ingestion are length-bucketed like in-process ones
+    embeddings.configure_batching(settings.EMBEDDING_BATCH_TOKENS)
+    embeddings.encode_locally(["warm up"])  # load the model before serving
+    server = EmbeddingServer(
+        settings.EMBEDDING_SERVER_SOCKET,
+        encode=embeddings.encode_locally,
+        max_batch_size=settings.EMBEDDING_SERVER_MAX_BATCH,
+        max_wait_ms=settings.EMBEDDING_SERVER_MAX_WAIT_MS,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
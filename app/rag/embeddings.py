@@ -1,22 +1,258 @@
-from functools import lru_cache
-from typing import cast
-from sentence_transformers import SentenceTransformer
+import atexit
+import logging
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import TYPE_CHECKING, cast
+
+import numpy as np
+
+from app.rag.embedding_batches import encode_by_length
+from app.rag.embedding_cache import CacheStats, EmbeddingCache
+from app.rag.embedding_pool import EmbeddingPool
+from app.rag.embedding_server import EmbeddingClient, EmbeddingServerError
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+    from transformers import PreTrainedTokenizerFast
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+# Embeddings stay contiguous float32 arrays from encode through upsert and search
+EMBEDDING_DTYPE = np.dtype(np.float32)
+SPECIAL_TOKEN_COUNT = 2
+# The model truncates its input, special tokens included, to this many tokens
+MAX_SEQ_TOKENS = 256
+# Padded tokens per length-bucketed encode batch: eight full-length texts. On
+# CPU, small batches of similar length beat the model's 32-text batches
+BATCH_TOKENS = 8 * MAX_SEQ_TOKENS
+# Bound on texts per batch however short they are
+MAX_BATCH_TEXTS = 512
+# After a failed server call, encode in-process for this long before retrying
+SERVER_RETRY_SECONDS = 30.0
+
+_cache: EmbeddingCache | None = None
+_server: EmbeddingClient | None = None
+_server_retry_at = 0.0
+_pool: EmbeddingPool | None = None
+_batch_tokens = BATCH_TOKENS
+# lru_cache does not serialize its misses: without this the warm-up thread and
+# the first query could each load the model
+_load_lock = threading.Lock()
+
+
+def _get_model() -> "SentenceTransformer":
+    with _load_lock:
+        return _load_model()
 
 
 @lru_cache(maxsize=1)
-def _get_model() -> SentenceTransformer:
-    return SentenceTransformer("all-MiniLM-L6-v2")
+def _load_model() -> "SentenceTransformer":
+    # Imported lazily: processes served by the embedding server never load torch
+    from sentence_transformers import SentenceTransformer
 
+    return SentenceTransformer(MODEL_NAME)
 
-def embed_query(text: str) -> list[float]:
-    return cast(list[float], _get_model().encode(text).tolist())
 
+def get_tokenizer() -> "PreTrainedTokenizerFast":
+    """The model's fast tokenizer, loaded without the model weights."""
+    with _load_lock:
+        return _load_tokenizer()
 
-def embed_documents(texts: list[str]) -> list[list[float]]:
-    return cast(list[list[float]], _get_model().encode(texts).tolist())
 
+@lru_cache(maxsize=1)
+def _load_tokenizer() -> "PreTrainedTokenizerFast":
+    from transformers import AutoTokenizer
 
-SPECIAL_TOKEN_COUNT = 2
+    return cast(
+        "PreTrainedTokenizerFast",
+        AutoTokenizer.from_pretrained(f"sentence-transformers/{MODEL_NAME}"),
+    )
+
+
+def configure_server(socket_path: str | None) -> None:
+    """Use the embedding server at socket_path when it is running (None disables)."""
+    global _server, _server_retry_at
+    if _server is not None:
+        _server.close()
+    _server = EmbeddingClient(socket_path) if socket_path else None
+    _server_retry_at = 0.0
+
+
+def server_running() -> bool:
+    """Whether encoding currently goes to the embedding server."""
+    return (
+        _server is not None
+        and time.monotonic() >= _server_retry_at
+        and _server.available()
+    )
+
+
+def _encode(texts: list[str], batch_tokens: int | None = None) -> np.ndarray:
+    """Encode on the embedding server if one is running, else with the local model.
+
+    batch_tokens applies to local encoding only, as for encode_locally.
+    """
+    global _server_retry_at
+    if _server is not None and server_running():
+        try:
+            return _server.encode(texts)
+        except (OSError, EmbeddingServerError) as e:
+            logger.warning(f"Embedding server failed ({e}); encoding in-process")
+            _server_retry_at = time.monotonic() + SERVER_RETRY_SECONDS
+    return encode_locally(texts, batch_tokens)
+
+
+def configure_batching(max_tokens: int) -> None:
+    """Encode documents in length-bucketed batches of up to max_tokens padded tokens
+    (0 leaves batching to the model: input sorted by characters, 32 per batch)."""
+    global _batch_tokens
+    _batch_tokens = max(0, max_tokens)
+
+
+def encode_locally(texts: list[str], batch_tokens: int | None = None) -> np.ndarray:
+    """Encode with this process's own model; also the embedding pool's worker task.
+
+    batch_tokens overrides the configured token budget, for pool workers.
+    """
+    model = _get_model()
+    budget = _batch_tokens if batch_tokens is None else batch_tokens
+    if budget <= 0 or len(texts) <= 1:
+        return np.asarray(model.encode(texts), dtype=EMBEDDING_DTYPE)
+
+    return encode_by_length(
+        texts,
+        _token_lengths(model, texts),
+        lambda batch: np.asarray(
+            model.encode(batch, batch_size=len(batch)), dtype=EMBEDDING_DTYPE
+        ),
+        max_tokens=budget,
+        max_batch_size=MAX_BATCH_TEXTS,
+    )
+
+
+def _token_lengths(model: "SentenceTransformer", texts: list[str]) -> list[int]:
+    """Tokens per text as the model will see them, special tokens included."""
+    encoded = model.tokenizer(
+        texts,
+        add_special_tokens=True,
+        truncation=True,
+        max_length=model.max_seq_length,
+        return_attention_mask=False,
+        return_token_type_ids=False,
+    )
+    return [len(ids) for ids in encoded["input_ids"]]
+
+
+@contextmanager
+def process_pool(workers: int, threads: int = 1) -> Iterator[EmbeddingPool | None]:
+    """Encode documents on this many worker processes, each holding its own model
+    pinned to threads torch threads, while the block runs. The workers start on
+    first use and stop on exit; workers <= 0 keeps encoding in-process."""
+    global _pool
+    if workers <= 0:
+        yield None
+        return
+    # Workers are separate processes, so they are given the budget explicitly
+    encode = partial(encode_locally, batch_tokens=_batch_tokens)
+    pool = EmbeddingPool(workers, threads, encode)
+    previous, _pool = _pool, pool
+    try:
+        yield pool
+    finally:
+        _pool = previous
+        pool.shutdown()
+
+
+def _encode_documents(texts: list[str]) -> np.ndarray:
+    global _pool
+    pool = _pool
+    if pool is None:
+        return np.ascontiguousarray(_encode(texts), dtype=EMBEDDING_DTYPE)
+    try:
+        return np.ascontiguousarray(pool.encode(texts), dtype=EMBEDDING_DTYPE)
+    except BrokenProcessPool:
+        # Not restarted for later batches: a worker that cannot load the model
+        # would fail again on every one
+        logger.warning("Embedding pool failed; encoding in-process")
+        pool.shutdown()
+        if _pool is pool:
+            _pool = None
+        return np.ascontiguousarray(_encode(texts), dtype=EMBEDDING_DTYPE)
+
+
+def configure_cache(
+    cache_dir: str | None, max_entries: int = 500_000, dtype: str = "float16"
+) -> None:
+    """Enable the persistent document embedding cache, or disable it with None."""
+    global _cache
+    if _cache is not None:
+        _cache.flush()
+        if cache_dir and _cache.directory.parent.resolve() == Path(cache_dir).resolve():
+            return
+    _cache = (
+        EmbeddingCache(cache_dir, MODEL_NAME, max_entries=max_entries, dtype=dtype)
+        if cache_dir
+        else None
+    )
+
+
+def cache_stats() -> CacheStats | None:
+    return _cache.stats() if _cache else None
+
+
+def flush_cache() -> None:
+    if _cache:
+        _cache.flush()
+
+
+atexit.register(flush_cache)
+
+
+def embed_query(text: str) -> np.ndarray:
+    """Embed one query as a float32 vector."""
+    return cast(np.ndarray, embed_queries([text])[0])
+
+
+def embed_queries(texts: list[str]) -> np.ndarray:
+    """Embed several queries in one encode call, as a (len(texts), dim) float32 array.
+
+    Not length-bucketed: a query batch is short, and stays one model call.
+    """
+    if not texts:
+        return np.zeros((0, 0), dtype=EMBEDDING_DTYPE)
+    return np.ascontiguousarray(_encode(texts, batch_tokens=0), dtype=EMBEDDING_DTYPE)
+
+
+def embed_documents(texts: list[str]) -> np.ndarray:
+    """Embed documents through the cache, as a (len(texts), dim) float32 array."""
+    if not texts:
+        return embed_queries(texts)
+    if _cache is None:
+        return _encode_documents(texts)
+
+    cached = _cache.get_many(texts)
+    missing = [i for i, vector in enumerate(cached) if vector is None]
+    computed = np.zeros((0, 0), dtype=EMBEDDING_DTYPE)
+    if missing:
+        missing_texts = [texts[i] for i in missing]
+        computed = _encode_documents(missing_texts)
+        _cache.put_many(missing_texts, computed)
+    if len(missing) == len(texts):
+        return computed
+
+    hits = [i for i, vector in enumerate(cached) if vector is not None]
+    dim = len(cast(np.ndarray, cached[hits[0]]))
+    vectors = np.empty((len(texts), dim), dtype=EMBEDDING_DTYPE)
+    vectors[hits] = np.stack([cast(np.ndarray, cached[i]) for i in hits])
+    if missing:
+        vectors[missing] = computed
+    return vectors
 
 
 def get_token_count(text: str) -> int:
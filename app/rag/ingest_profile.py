@@ -0,0 +1,123 @@
+import os
+import resource
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+
+# Report order; stages run concurrently on the ingestion pipeline's threads
+STAGES = ("text_cache", "parse", "clean", "split", "dedup", "embed", "upsert")
+
+
+@dataclass
+class StageRecord:
+    """Filled in by the timed block: input bytes and output items (chunks)."""
+
+    bytes: int = 0
+    items: int = 0
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    wall_seconds: float = 0.0
+    # CPU time of the calling thread; library thread pools (e.g. torch) are not
+    # included
+    cpu_seconds: float = 0.0
+    bytes: int = 0
+    items: int = 0
+    max_rss_mb: float = 0.0
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        # ru_maxrss is KiB on Linux (peak rather than current elsewhere)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class IngestProfile:
+    """Per-stage wall/CPU time, bytes, chunk counts and RSS of an ingest run."""
+
+    def __init__(self) -> None:
+        self.started_at = time.perf_counter()
+        self.finished_at: float | None = None
+        self.stages: dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timed(self, stage: str) -> Iterator[StageRecord]:
+        record = StageRecord()
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield record
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            rss = current_rss_mb()
+            with self._lock:
+                stats = self.stages.setdefault(stage, StageStats())
+                stats.calls += 1
+                stats.wall_seconds += wall
+                stats.cpu_seconds += cpu
+                stats.bytes += record.bytes
+                stats.items += record.items
+                stats.max_rss_mb = max(stats.max_rss_mb, rss)
+
+    def finish(self) -> None:
+        self.finished_at = time.perf_counter()
+
+    @property
+    def total_seconds(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    def ordered_stages(self) -> list[tuple[str, StageStats]]:
+        with self._lock:
+            names = [s for s in STAGES if s in self.stages]
+            names += sorted(set(self.stages) - set(STAGES))
+            return [(name, self.stages[name]) for name in names]
+
+    def to_dict(self) -> dict:
+        return {
+            "total_seconds": self.total_seconds,
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "stages": {name: asdict(stats) for name, stats in self.ordered_stages()},
+        }
+
+    def report(self) -> str:
+        lines = ["", "Ingest profile", "-" * 78]
+        lines.append(
+            f"{'Stage':<12}{'Calls':>7}{'Wall (s)':>10}{'CPU (s)':>9}"
+            f"{'MB in':>10}{'Items':>9}{'MB/s':>9}{'RSS (MB)':>12}"
+        )
+        for name, stats in self.ordered_stages():
+            mb = stats.bytes / 2**20
+            rate = (
+                f"{mb / stats.wall_seconds:.1f}"
+                if stats.bytes and stats.wall_seconds
+                else "-"
+            )
+            lines.append(
+                f"{name:<12}{stats.calls:>7}{stats.wall_seconds:>10.2f}"
+                f"{stats.cpu_seconds:>9.2f}{mb:>10.1f}{stats.items:>9}{rate:>9}"
+                f"{stats.max_rss_mb:>12.1f}"
+            )
+        lines.append("-" * 78)
+        lines.append(
+            "Stages overlap across pipeline threads, so their wall times can sum "
+            f"to more than the {self.total_seconds:.2f}s total."
+        )
+        return "\n".join(lines)
+
+
+def timed_stage(
+    profile: IngestProfile | None, stage: str
+) -> AbstractContextManager[StageRecord]:
+    """profile.timed(stage), or a no-op when profiling is off."""
+    return profile.timed(stage) if profile else nullcontext(StageRecord())
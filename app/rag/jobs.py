@@ -0,0 +1,216 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Literal
+
+from app.core.models import IngestResult
+from app.rag.ingest_profile import IngestProfile
+
+# The service pulls in chromadb; jobs are created by the CLI after it is built
+if TYPE_CHECKING:
+    from app.rag.service import RAGService
+
+logger = logging.getLogger(__name__)
+
+JobState = Literal["running", "completed", "cancelled", "failed"]
+
+
+@dataclass(frozen=True)
+class IngestProgress:
+    files_done: int
+    files_total: int
+    chunks: int
+    skipped: int
+    suppressed: int
+    elapsed_seconds: float
+    eta_seconds: float | None
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+
+class IngestJob:
+    """A directory ingest running on a background thread.
+
+    Cancelling stops the ingest after its batch in flight; the checkpoint keeps
+    what was written, so the run can be continued with resume=True.
+    """
+
+    def __init__(
+        self,
+        job_id: int,
+        rag_service: "RAGService",
+        directory: str,
+        resume: bool = False,
+        profile: IngestProfile | None = None,
+        embed_threads: int = 0,
+    ):
+        self.id = job_id
+        self.directory = directory
+        self.resume = resume
+        self.profile = profile
+        self.state: JobState = "running"
+        self.error: str | None = None
+        self.results: list[IngestResult] = []
+        self.started_at = time.monotonic()
+        self.finished_at: float | None = None
+
+        self._rag_service = rag_service
+        self._embed_threads = embed_threads or max(1, (os.cpu_count() or 2) // 2)
+        # Raises ValueError for a missing directory before the thread starts
+        self._sizes = {
+            path.name: path.stat().st_size
+            for path in rag_service.find_documents(directory)
+        }
+        self._bytes_done = 0
+        self._bytes_skipped = 0
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run, name=f"ingest-job-{job_id}", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def cancel(self) -> bool:
+        """Request cancellation; False if the job has already finished."""
+        if self.state != "running":
+            return False
+        self._cancel.set()
+        return True
+
+    def wait(self, timeout: float | None = None) -> bool:
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    @property
+    def files_total(self) -> int:
+        return len(self._sizes)
+
+    def progress(self) -> IngestProgress:
+        with self._lock:
+            results = list(self.results)
+            bytes_done, bytes_skipped = self._bytes_done, self._bytes_skipped
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        elapsed = end - self.started_at
+
+        # Extrapolate from bytes actually ingested; skipped files cost almost nothing
+        eta = None
+        worked = bytes_done - bytes_skipped
+        if self.state == "running" and worked > 0:
+            remaining = sum(self._sizes.values()) - bytes_done
+            eta = remaining * elapsed / worked
+
+        return IngestProgress(
+            files_done=len(results),
+            files_total=self.files_total,
+            chunks=sum(r.chunks for r in results if not r.skipped),
+            skipped=sum(r.skipped for r in results),
+            suppressed=sum(r.suppressed for r in results),
+            elapsed_seconds=elapsed,
+            eta_seconds=eta,
+        )
+
+    def _run(self) -> None:
+        self._rag_service.ingest_profile = self.profile
+        state: JobState = "failed"
+        try:
+            for result in self._rag_service.ingest_directory(
+                self.directory,
+                resume=self.resume,
+                cancel=self._cancel,
+                embed_threads=self._embed_threads,
+            ):
+                size = self._sizes.get(result.filename, 0)
+                with self._lock:
+                    self.results.append(result)
+                    self._bytes_done += size
+                    if result.skipped:
+                        self._bytes_skipped += size
+            state = "cancelled" if self._cancel.is_set() else "completed"
+        except Exception as e:
+            logger.exception(f"Ingest job {self.id} failed")
+            self.error = str(e)
+        finally:
+            self._rag_service.ingest_profile = None
+            if self.profile:
+                self.profile.finish()
+            self.finished_at = time.monotonic()
+            # Last, so a finished job always has its end time
+            self.state = state
+
+
+class JobManager:
+    """Background ingest jobs of one CLI session, one running at a time."""
+
+    def __init__(self) -> None:
+        self._jobs: dict[int, IngestJob] = {}
+        self._announced: set[int] = set()
+        self._lock = threading.Lock()
+
+    def start_ingest(
+        self,
+        rag_service: "RAGService",
+        directory: str,
+        resume: bool = False,
+        profile: IngestProfile | None = None,
+        embed_threads: int = 0,
+    ) -> IngestJob:
+        """Start ingesting directory in the background.
+
+        Raises RuntimeError while another ingest job is running, since both would
+        write the same collection, and ValueError for an invalid directory.
+        """
+        with self._lock:
+            running = self._running_locked()
+            if running:
+                raise RuntimeError(f"Ingest job {running.id} is still running")
+            job = IngestJob(
+                len(self._jobs) + 1,
+                rag_service,
+                directory,
+                resume=resume,
+                profile=profile,
+                embed_threads=embed_threads,
+            )
+            self._jobs[job.id] = job
+        job.start()
+        return job
+
+    def get(self, job_id: int) -> IngestJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> list[IngestJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def newly_finished(self) -> list[IngestJob]:
+        """Finished jobs not returned by an earlier call, for completion notices."""
+        with self._lock:
+            finished = [
+                job
+                for job in self._jobs.values()
+                if job.state != "running" and job.id not in self._announced
+            ]
+            self._announced.update(job.id for job in finished)
+        return finished
+
+    def cancel_all(self, timeout: float | None = None) -> list[IngestJob]:
+        """Cancel running jobs and wait for them; returns the jobs cancelled."""
+        with self._lock:
+            running = [job for job in self._jobs.values() if job.state == "running"]
+        for job in running:
+            job.cancel()
+        for job in running:
+            job.wait(timeout)
+        return running
+
+    def _running_locked(self) -> IngestJob | None:
+        return next(
+            (job for job in self._jobs.values() if job.state == "running"), None
+        )
@@ -0,0 +1,356 @@
+import logging
+import math
+import os
+import re
+import threading
+from array import array
+from collections import Counter
+from collections.abc import Iterable, Iterator, Sequence
+from pathlib import Path
+
+import numpy as np
+
+from app.db.mmap_store import top_k_rows
+from app.db.vector import make_chunk_id
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"\w+")
+# Too common to rank anything; left out of the index and of queries
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "did", "do", "for", "from",
+    "had", "has", "have", "he", "her", "him", "his", "how", "i", "in", "is", "it",
+    "its", "me", "my", "not", "of", "on", "or", "she", "so", "that", "the", "their",
+    "them", "then", "there", "they", "this", "to", "was", "we", "were", "what", "when",
+    "where", "which", "who", "whom", "why", "will", "with", "you", "your",
+})  # fmt: skip
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Reciprocal rank fusion constant: a result's fused score is sum(1 / (RRF_K + rank))
+RRF_K = 60
+MAX_TERM_FREQUENCY = np.iinfo(np.uint16).max
+
+
+def tokenize(text: str) -> list[str]:
+    return [
+        word for word in WORD_PATTERN.findall(text.casefold()) if word not in STOPWORDS
+    ]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int) -> list[str]:
+    """The k best IDs by summed reciprocal rank over the rankings, best first."""
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, 1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (RRF_K + rank)
+    return sorted(scores, key=lambda item: -scores[item])[:k]
+
+
+class KeywordIndex:
+    """BM25 inverted index over chunk texts, for exact entity and keyword matches
+    that vector search misses.
+
+    Postings map each term to the chunks containing it and its frequency in each.
+    Chunks are staged per source as they are prepared for ingest, keyed by the
+    same IDs as the vector store, and replace the source's previous chunks on
+    commit(), once they are stored; until then searches do not see them.
+    save() writes the live postings to index_path as compressed CSR arrays; other
+    processes reload the file when it changes. Searching needs no embedding model.
+    """
+
+    def __init__(self, index_path: str | None = None):
+        self.index_path = Path(index_path) if index_path else None
+        self._lock = threading.Lock()
+        self._reset()
+        self._load()
+
+    def _reset(self) -> None:
+        self._ids: list[str] = []
+        self._sources: list[str] = []
+        self._lengths = array("I")
+        self._alive = bytearray()
+        self._postings: dict[str, tuple[array, array]] = {}
+        self._by_source: dict[str, list[int]] = {}
+        self._row_by_id: dict[str, int] = {}
+        # Rows indexed for a source but not yet committed; not alive until then
+        self._staged: dict[str, list[int]] = {}
+        self._live_docs = 0
+        self._live_tokens = 0
+        self._dirty = False
+        self._loaded_mtime: float | None = None
+        # Alive mask and BM25 length norms of every row, until the next change
+        self._row_arrays: tuple[np.ndarray, np.ndarray] | None = None
+
+    @property
+    def entries(self) -> int:
+        with self._lock:
+            return self._live_docs
+
+    def has_source(self, source: str) -> bool:
+        with self._lock:
+            self._refresh_locked()
+            return source in self._by_source
+
+    def index(self, source: str, chunks: Iterable[str]) -> Iterator[str]:
+        """Yield chunks unchanged as they arrive, staging each under source in place
+        of any chunks staged for it before."""
+        with self._lock:
+            self._refresh_locked()
+            staged = self._staged[source] = []
+        seen: set[str] = set()
+        for chunk in chunks:
+            chunk_id = make_chunk_id(source, chunk)
+            # The same chunk repeated within the source is indexed once
+            if chunk_id not in seen:
+                seen.add(chunk_id)
+                terms = Counter(tokenize(chunk))
+                with self._lock:
+                    staged.append(self._add_locked(chunk_id, source, terms))
+            yield chunk
+
+    def commit(self, source: str) -> None:
+        """Replace source's chunks with its staged ones, now that they are stored."""
+        with self._lock:
+            rows = self._staged.pop(source, [])
+            self._remove_source_locked(source)
+            for row in rows:
+                self._alive[row] = 1
+                self._live_docs += 1
+                self._live_tokens += self._lengths[row]
+                self._row_by_id[self._ids[row]] = row
+            self._by_source[source] = rows
+            self._dirty = True
+            self._row_arrays = None
+            self._compact_if_sparse_locked()
+
+    def discard(self, source: str | None = None) -> None:
+        """Drop the chunks staged for source, or for every source."""
+        with self._lock:
+            if source is None:
+                self._staged.clear()
+            else:
+                self._staged.pop(source, None)
+            self._compact_if_sparse_locked()
+
+    def search(self, query: str, k: int) -> list[tuple[str, float]]:
+        """(chunk ID, BM25 score) of the k best matching chunks, best first."""
+        terms = set(tokenize(query))
+        with self._lock:
+            self._refresh_locked()
+            live = self._live_docs
+            if not terms or not live:
+                return []
+            alive, length_norm = self._row_arrays_locked()
+            scores = np.zeros(len(self._ids), dtype=np.float32)
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                rows = np.array(postings[0], dtype=np.int64)
+                frequencies = np.array(postings[1], dtype=np.float32)
+                df = int(alive[rows].sum())
+                idf = math.log(1 + (live - df + 0.5) / (df + 0.5))
+                scores[rows] += (
+                    idf
+                    * frequencies
+                    * (BM25_K1 + 1)
+                    / (frequencies + length_norm[rows])
+                )
+            scores[~alive] = 0
+            top = top_k_rows(scores, k)
+            return [
+                (self._ids[row], float(scores[row])) for row in top if scores[row] > 0
+            ]
+
+    def _row_arrays_locked(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._row_arrays is None:
+            alive = np.frombuffer(bytes(self._alive), dtype=bool)
+            lengths = np.array(self._lengths, dtype=np.float32)
+            length_norm = BM25_K1 * (
+                1 - BM25_B + BM25_B * lengths / (self._live_tokens / self._live_docs)
+            )
+            self._row_arrays = alive, length_norm
+        return self._row_arrays
+
+    def save(self) -> None:
+        if self.index_path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            live = np.flatnonzero(np.frombuffer(bytes(self._alive), dtype=bool))
+            new_rows = np.full(len(self._ids), -1, dtype=np.int64)
+            new_rows[live] = np.arange(len(live))
+
+            terms = []
+            offsets = [0]
+            rows_parts = []
+            frequency_parts = []
+            for term in sorted(self._postings):
+                rows = np.array(self._postings[term][0], dtype=np.int64)
+                keep = new_rows[rows] >= 0
+                if not keep.any():
+                    continue
+                terms.append(term)
+                rows_parts.append(new_rows[rows[keep]].astype(np.uint32))
+                frequency_parts.append(
+                    np.array(self._postings[term][1], dtype=np.uint16)[keep]
+                )
+                offsets.append(offsets[-1] + int(keep.sum()))
+
+            sources = list(self._by_source)
+            source_numbers = {source: i for i, source in enumerate(sources)}
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix(".tmp.npz")
+            np.savez_compressed(
+                tmp_path,
+                ids=np.array([self._ids[row] for row in live], dtype="S"),
+                sources=np.array(sources, dtype=str),
+                doc_sources=np.array(
+                    [source_numbers[self._sources[row]] for row in live],
+                    dtype=np.uint32,
+                ),
+                lengths=np.array(self._lengths, dtype=np.uint32)[live],
+                terms=np.frombuffer("\n".join(terms).encode("utf-8"), dtype=np.uint8),
+                offsets=np.array(offsets, dtype=np.int64),
+                # Row gaps within each posting list, which compress to half the size
+                row_gaps=np.concatenate(
+                    [np.diff(rows, prepend=0) for rows in rows_parts]
+                )
+                if rows_parts
+                else np.zeros(0, np.uint32),
+                frequencies=np.concatenate(frequency_parts)
+                if frequency_parts
+                else np.zeros(0, np.uint16),
+            )
+            os.replace(tmp_path, self.index_path)
+            self._loaded_mtime = self.index_path.stat().st_mtime
+            self._dirty = False
+
+    def _refresh_locked(self) -> None:
+        """Reload the index if another process saved it since it was loaded."""
+        if self.index_path is None or self._dirty or self._staged:
+            return
+        try:
+            mtime = self.index_path.stat().st_mtime
+        except OSError:
+            return
+        if mtime != self._loaded_mtime:
+            self._reset()
+            self._load_locked()
+
+    def _load(self) -> None:
+        with self._lock:
+            self._load_locked()
+
+    def _load_locked(self) -> None:
+        if self.index_path is None or not self.index_path.exists():
+            return
+        try:
+            mtime = self.index_path.stat().st_mtime
+            with np.load(self.index_path) as data:
+                ids = [chunk_id.decode("ascii") for chunk_id in data["ids"].tolist()]
+                sources = data["sources"].tolist()
+                doc_sources = data["doc_sources"]
+                lengths = data["lengths"]
+                terms_blob = data["terms"].tobytes().decode("utf-8")
+                offsets = data["offsets"]
+                row_gaps = data["row_gaps"]
+                frequencies = data["frequencies"]
+            terms = terms_blob.split("\n") if terms_blob else []
+            if len(offsets) != len(terms) + 1 or len(lengths) != len(ids):
+                raise ValueError("inconsistent array lengths")
+            # Undo the gap encoding: running sums restarted at each posting list
+            sums = np.cumsum(row_gaps, dtype=np.int64)
+            starts = np.concatenate([[0], sums])[offsets[:-1]]
+            rows = sums - np.repeat(starts, np.diff(offsets))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable keyword index {self.index_path}: {e}")
+            return
+
+        self._ids = ids
+        self._sources = [sources[i] for i in doc_sources.tolist()]
+        self._lengths = array("I", lengths.astype(np.uint32).tobytes())
+        self._alive = bytearray(b"\x01" * len(ids))
+        self._row_by_id = {chunk_id: row for row, chunk_id in enumerate(ids)}
+        self._by_source = {source: [] for source in sources}
+        for row, source in enumerate(self._sources):
+            self._by_source[source].append(row)
+        self._live_docs = len(ids)
+        self._live_tokens = int(lengths.sum())
+        for i, term in enumerate(terms):
+            start, stop = int(offsets[i]), int(offsets[i + 1])
+            self._postings[term] = (
+                array("I", rows[start:stop].astype(np.uint32).tobytes()),
+                array("H", frequencies[start:stop].astype(np.uint16).tobytes()),
+            )
+        self._loaded_mtime = mtime
+
+    def _add_locked(self, chunk_id: str, source: str, terms: Counter[str]) -> int:
+        """Append a row for the chunk, not alive until its source is committed."""
+        row = len(self._ids)
+        self._ids.append(chunk_id)
+        self._sources.append(source)
+        self._lengths.append(sum(terms.values()))
+        self._alive.append(0)
+        self._row_arrays = None
+        all_postings = self._postings
+        for term, frequency in terms.items():
+            postings = all_postings.get(term)
+            if postings is None:
+                postings = all_postings[term] = (array("I"), array("H"))
+            postings[0].append(row)
+            postings[1].append(min(frequency, MAX_TERM_FREQUENCY))
+        return row
+
+    def _remove_source_locked(self, source: str) -> None:
+        # Tombstoned in place; searches skip them, save() and compaction drop them
+        self._row_arrays = None
+        for row in self._by_source.pop(source, []):
+            if self._alive[row]:
+                self._alive[row] = 0
+                self._live_docs -= 1
+                self._live_tokens -= self._lengths[row]
+                if self._row_by_id.get(self._ids[row]) == row:
+                    del self._row_by_id[self._ids[row]]
+
+    def _compact_if_sparse_locked(self) -> None:
+        """Drop replaced and discarded rows once they outnumber the rest, so a
+        long-running process does not grow with every re-ingest. Renumbering is
+        linear in the postings; halving the rows each time amortizes it."""
+        kept = np.zeros(len(self._ids), dtype=bool)
+        kept[np.frombuffer(bytes(self._alive), dtype=bool)] = True
+        for rows in self._staged.values():
+            kept[rows] = True
+        kept_count = int(kept.sum())
+        if len(self._ids) - kept_count <= kept_count:
+            return
+
+        new_rows = np.full(len(self._ids), -1, dtype=np.int64)
+        new_rows[kept] = np.arange(kept_count)
+        kept_rows = np.flatnonzero(kept).tolist()
+        self._ids = [self._ids[row] for row in kept_rows]
+        self._sources = [self._sources[row] for row in kept_rows]
+        self._lengths = array(
+            "I", np.array(self._lengths, dtype=np.uint32)[kept].tobytes()
+        )
+        self._alive = bytearray(
+            np.frombuffer(bytes(self._alive), dtype=np.uint8)[kept].tobytes()
+        )
+        for term, (posting_rows, frequencies) in list(self._postings.items()):
+            renumbered = new_rows[np.array(posting_rows, dtype=np.int64)]
+            keep = renumbered >= 0
+            if not keep.any():
+                del self._postings[term]
+                continue
+            self._postings[term] = (
+                array("I", renumbered[keep].astype(np.uint32).tobytes()),
+                array("H", np.array(frequencies, dtype=np.uint16)[keep].tobytes()),
+            )
+        for rows in (*self._by_source.values(), *self._staged.values()):
+            # In place: index() still appends to its staged list
+            rows[:] = new_rows[rows].tolist()
+        self._row_by_id = {
+            chunk_id: int(new_rows[row]) for chunk_id, row in self._row_by_id.items()
+        }
+        self._row_arrays = None
@@ -1,20 +1,121 @@
+import atexit
+import itertools
+import logging
+import multiprocessing
+import os
 import pypdf
 import re
+import threading
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from app.core.utils import validate_file_path
+from app.rag.embedding_cache import CacheStats
+from app.rag.ingest_profile import IngestProfile, timed_stage
+from app.rag.manifest import hash_file
+from app.rag.text_cache import TextCache
 
+logger = logging.getLogger(__name__)
 
-def load_document(file_path: str) -> str:
+# Bump whenever extraction or _clean_text changes, to invalidate cached text
+LOADER_VERSION = 1
+# Below this many pages a PDF is extracted in-process: the pool would cost more
+# than it saves
+PDF_PARALLEL_MIN_PAGES = 32
+# Characters read per block when streaming a text file
+STREAM_BLOCK_CHARS = 1 << 20
+NEWLINE_RUN = re.compile(r"\n+")
+
+_pdf_workers = 1
+_pdf_min_pages = PDF_PARALLEL_MIN_PAGES
+_pdf_pool: ProcessPoolExecutor | None = None
+_pdf_pool_lock = threading.Lock()
+_text_cache: TextCache | None = None
+
+
+def configure_text_cache(cache_dir: str | None, max_mb: int = 1024) -> None:
+    """Cache cleaned document text under cache_dir, or disable caching with None."""
+    global _text_cache
+    _text_cache = (
+        TextCache(cache_dir, LOADER_VERSION, max_bytes=max_mb * 1024 * 1024)
+        if cache_dir
+        else None
+    )
+
+
+def text_cache_stats() -> CacheStats | None:
+    return _text_cache.stats() if _text_cache else None
+
+
+def configure_pdf_extraction(
+    workers: int = 1, min_pages: int = PDF_PARALLEL_MIN_PAGES
+) -> None:
+    """Extract PDFs with at least min_pages pages on a pool of worker processes.
+
+    workers=1 extracts every PDF in-process; workers=0 uses one process per CPU.
+    """
+    global _pdf_workers, _pdf_min_pages
+    _shutdown_pdf_pool()
+    _pdf_workers = workers if workers > 0 else os.cpu_count() or 1
+    _pdf_min_pages = max(1, min_pages)
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # Forking a process that already runs ingestion and model threads is
+            # unsafe; spawned workers import only this module's dependencies
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=_pdf_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pdf_pool
+
+
+def _shutdown_pdf_pool() -> None:
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is not None:
+            _pdf_pool.shutdown(cancel_futures=True)
+            _pdf_pool = None
+
+
+atexit.register(_shutdown_pdf_pool)
+
+
+def load_document(file_path: str, profile: IngestProfile | None = None) -> str:
     """Load .txt/.pdf file and clean text (unwrap single newlines, preserve paragraphs)."""
     valid_path = validate_file_path(file_path, allowed_extensions=[".txt", ".pdf"])
 
+    # Hashing is far cheaper than parsing, so a cache hit skips the parser entirely
+    cache = _text_cache
+    content_hash = ""
+    if cache:
+        with timed_stage(profile, "text_cache") as stage:
+            content_hash = hash_file(valid_path)
+            cached = cache.get(content_hash)
+            if cached is not None:
+                stage.bytes = len(cached)
+                stage.items = 1
+                return cached
+
     text = ""
-    if valid_path.suffix.lower() == ".txt":
-        text = _load_txt(str(valid_path))
+    with timed_stage(profile, "parse") as stage:
+        stage.bytes = valid_path.stat().st_size
+        if valid_path.suffix.lower() == ".txt":
+            text = _load_txt(str(valid_path))
 
-    elif valid_path.suffix.lower() == ".pdf":
-        text = _load_pdf(str(valid_path))
+        elif valid_path.suffix.lower() == ".pdf":
+            text = _load_pdf(str(valid_path))
+        stage.items = 1
 
-    return _clean_text(text)
+    with timed_stage(profile, "clean") as stage:
+        stage.bytes = len(text)
+        cleaned = _clean_text(text)
+    if cache:
+        cache.put(content_hash, cleaned)
+    return cleaned
 
 
 def _load_txt(file_path: str) -> str:
@@ -23,17 +124,78 @@ def _load_txt(file_path: str) -> str:
 
 
 def _load_pdf(file_path: str) -> str:
-    text_content = []
     reader = pypdf.PdfReader(file_path)
-    for page in reader.pages:
-        page_text = page.extract_text()
-        if page_text:
-            text_content.append(page_text)
-    return "\n\n".join(text_content)
+    page_count = len(reader.pages)
+    if _pdf_workers <= 1 or page_count < _pdf_min_pages:
+        return _join_pages(_extract_pages(reader, 0, page_count))
+
+    # A few ranges per worker so one slow (e.g. image-heavy) range does not
+    # leave the other workers idle
+    range_count = min(page_count, _pdf_workers * 2)
+    bounds = [page_count * i // range_count for i in range(range_count + 1)]
+    try:
+        pool = _get_pdf_pool()
+        futures = [
+            pool.submit(_extract_page_range, file_path, start, stop)
+            for start, stop in itertools.pairwise(bounds)
+        ]
+        return _join_pages([text for future in futures for text in future.result()])
+    except BrokenProcessPool:
+        logger.warning(f"PDF worker pool failed; extracting {file_path} in-process")
+        _shutdown_pdf_pool()
+        return _join_pages(_extract_pages(reader, 0, page_count))
+
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> list[str]:
+    """Pool worker: open the PDF and extract pages [start, stop)."""
+    return _extract_pages(pypdf.PdfReader(file_path), start, stop)
+
+
+def _extract_pages(reader: pypdf.PdfReader, start: int, stop: int) -> list[str]:
+    return [reader.pages[i].extract_text() for i in range(start, stop)]
+
+
+def _join_pages(pages: list[str]) -> str:
+    return "\n\n".join(page for page in pages if page)
+
+
+def stream_document(file_path: str) -> Iterator[str]:
+    """Yield the cleaned text of a .txt file block by block.
+
+    The blocks concatenate to exactly what load_document returns, but memory stays
+    at one block however large the file. Streamed text bypasses the text cache.
+    """
+    valid_path = validate_file_path(file_path, allowed_extensions=[".txt"])
+    with open(valid_path, "r", encoding="utf-8") as f:
+        yield from _clean_blocks(iter(lambda: f.read(STREAM_BLOCK_CHARS), ""))
 
 
 def _clean_text(text: str) -> str:
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    paragraphs = text.split("\n\n")
-    cleaned_paragraphs = [para.replace("\n", " ") for para in paragraphs]
-    return "\n\n".join(cleaned_paragraphs)
+    """Unwrap single newlines into spaces; any longer run is one paragraph break."""
+    return NEWLINE_RUN.sub(_collapse_newlines, text)
+
+
+def _collapse_newlines(match: re.Match[str]) -> str:
+    return _newline_run(len(match.group()))
+
+
+def _newline_run(length: int) -> str:
+    if length == 0:
+        return ""
+    return " " if length == 1 else "\n\n"
+
+
+def _clean_blocks(blocks: Iterable[str]) -> Iterator[str]:
+    """_clean_text over text arriving in blocks, holding back newline runs that
+    may continue into the next block."""
+    pending_newlines = 0
+    for block in blocks:
+        body = block.lstrip("\n")
+        pending_newlines += len(block) - len(body)
+        if not body:
+            continue
+        trimmed = body.rstrip("\n")
+        yield _newline_run(pending_newlines) + _clean_text(trimmed)
+        pending_newlines = len(body) - len(trimmed)
+    if pending_newlines:
+        yield _newline_run(pending_newlines)
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+HASH_BLOCK_SIZE = 1024 * 1024
+# Recorded entries are written out at most this often, and by flush()
+FLUSH_INTERVAL_SECONDS = 5.0
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    size: int
+    mtime_ns: int
+    content_hash: str
+    chunk_size: int
+    chunk_overlap: int
+    chunk_count: int
+    splitter: str = "characters"
+
+
+@dataclass(frozen=True)
+class FileState:
+    size: int
+    mtime_ns: int
+    content_hash: str
+
+
+def file_state(path: Path) -> FileState:
+    """Size, mtime and content hash of the file as it is now."""
+    stat = path.stat()
+    return FileState(stat.st_size, stat.st_mtime_ns, hash_file(path))
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """Persistent record of ingested files, used to skip unchanged files on re-ingest.
+
+    Entries are grouped per vector store target so that ingesting into a different
+    collection or database directory never reuses another target's records. New
+    entries are written out every FLUSH_INTERVAL_SECONDS and by flush(), not once
+    per file.
+    """
+
+    def __init__(self, manifest_path: str, target: str):
+        self.manifest_path = Path(manifest_path)
+        self.target = target
+        self._lock = threading.Lock()
+        self._targets = self._read()
+        self._dirty = False
+        self._last_write = time.monotonic()
+
+    @property
+    def _entries(self) -> dict[str, dict]:
+        return self._targets.setdefault(self.target, {})
+
+    def _read(self) -> dict[str, dict[str, dict]]:
+        if not self.manifest_path.exists():
+            return {}
+
+        try:
+            data = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            logger.warning(f"Ignoring unreadable ingest manifest {self.manifest_path}")
+            return {}
+
+        if data.get("version") != MANIFEST_VERSION:
+            return {}
+        return dict(data.get("targets", {}))
+
+    def _write(self) -> None:
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps({"version": MANIFEST_VERSION, "targets": self._targets}),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, self.manifest_path)
+        self._dirty = False
+        self._last_write = time.monotonic()
+
+    def _changed_locked(self) -> None:
+        self._dirty = True
+        if time.monotonic() - self._last_write >= FLUSH_INTERVAL_SECONDS:
+            self._write()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._dirty:
+                self._write()
+
+    def get_unchanged(
+        self,
+        path: Path,
+        chunk_size: int,
+        chunk_overlap: int,
+        splitter: str = "characters",
+    ) -> ManifestEntry | None:
+        """Return the recorded entry if the file and chunking are unchanged, else None."""
+        key = str(path.resolve())
+        with self._lock:
+            raw = self._entries.get(key)
+        if raw is None:
+            return None
+
+        entry = ManifestEntry(**raw)
+        if (entry.splitter, entry.chunk_size, entry.chunk_overlap) != (
+            splitter,
+            chunk_size,
+            chunk_overlap,
+        ):
+            return None
+
+        stat = path.stat()
+        if stat.st_size != entry.size:
+            return None
+        if stat.st_mtime_ns == entry.mtime_ns:
+            return entry
+
+        # Touched but possibly identical (e.g. re-downloaded): fall back to the hash
+        if hash_file(path) != entry.content_hash:
+            return None
+
+        refreshed = ManifestEntry(**{**raw, "mtime_ns": stat.st_mtime_ns})
+        with self._lock:
+            self._entries[key] = asdict(refreshed)
+            self._changed_locked()
+        return refreshed
+
+    def record(
+        self,
+        path: Path,
+        chunk_count: int,
+        chunk_size: int,
+        chunk_overlap: int,
+        splitter: str = "characters",
+        state: FileState | None = None,
+    ) -> None:
+        """Record the file as ingested. state should be taken before the file was
+        read: if it changes during the ingest, the next run then sees the change."""
+        state = state or file_state(path)
+        entry = ManifestEntry(
+            size=state.size,
+            mtime_ns=state.mtime_ns,
+            content_hash=state.content_hash,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            chunk_count=chunk_count,
+            splitter=splitter,
+        )
+        with self._lock:
+            self._entries[str(path.resolve())] = asdict(entry)
+            self._changed_locked()
+
+    def forget(self, path: Path) -> None:
+        """Drop the file's entry, so the next ingest processes it again."""
+        with self._lock:
+            if self._entries.pop(str(path.resolve()), None) is not None:
+                self._changed_locked()
@@ -0,0 +1,340 @@
+import logging
+import queue
+import threading
+from collections import deque
+from collections.abc import Callable, Generator, Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, cast
+
+import numpy as np
+from chromadb.api.types import Metadata as ChromaMetadata
+from pypdf.errors import PyPdfError
+
+from app.core.models import IngestResult
+from app.core.utils import ValidationError
+from app.db.vector import VectorStore
+from app.rag.ingest_profile import IngestProfile, timed_stage
+
+logger = logging.getLogger(__name__)
+
+QUEUE_POLL_SECONDS = 0.1
+# Raised for a missing, unreadable or malformed document, which is reported as
+# failed; anything else is a bug or a store failure and stops the run
+LOAD_ERRORS = (OSError, ValueError, ValidationError, PyPdfError)
+
+
+@dataclass
+class PreparedDocument:
+    """A split document: chunks still needing embedding, IDs of stale chunks and
+    the number of duplicate chunks dropped before embedding. failed marks a
+    document that could not be read; it is neither written nor recorded.
+
+    chunks may be a one-shot iterator for a streamed document, read by the
+    embedder; the other fields are then final once it is exhausted.
+    """
+
+    chunks: list[str] | Iterator[str]
+    chunk_count: int
+    stale_ids: list[str] = field(default_factory=list)
+    suppressed: int = 0
+    failed: bool = False
+
+
+@dataclass
+class _LoadedDocument:
+    path: Path
+    prepared: PreparedDocument
+    skipped: bool = False
+
+
+@dataclass
+class _Batch:
+    texts: list[str] = field(default_factory=list)
+    metadatas: list[ChromaMetadata] = field(default_factory=list)
+    embeddings: np.ndarray | None = None
+    completed: list[_LoadedDocument] = field(default_factory=list)
+    written: dict[Path, int] = field(default_factory=dict)
+
+
+@dataclass
+class _StageError:
+    error: BaseException
+
+
+_DONE = object()
+
+
+class IngestionPipeline:
+    """Overlapped ingestion: loader workers -> batching embedder -> upsert writer.
+
+    Stages run on their own threads and are linked by bounded queues, so PDF
+    parsing, embedding and upserts proceed concurrently while memory stays capped.
+    """
+
+    def __init__(
+        self,
+        prepare: Callable[[str], PreparedDocument],
+        embed: Callable[[list[str]], np.ndarray],
+        vector_store: VectorStore,
+        loader_workers: int = 4,
+        embed_batch_size: int = 256,
+        queue_size: int = 8,
+        skip: Callable[[Path], int | None] | None = None,
+        on_complete: Callable[[Path, int], None] | None = None,
+        on_batch: Callable[[dict[Path, int]], None] | None = None,
+        profile: IngestProfile | None = None,
+        write_concurrency: int = 1,
+    ):
+        """skip returns a previously ingested chunk count for files that need no work;
+        on_complete runs once all of a file's chunks have been written, including
+        files whose chunks were all suppressed as duplicates, and on_batch
+        after each upsert with the number of chunks it wrote per file. Upserts are
+        timed into profile, if given. Up to write_concurrency upserts are kept in
+        flight, for stores where a write is mostly a network round trip."""
+        self.prepare = prepare
+        self.embed = embed
+        self.vector_store = vector_store
+        self.skip = skip
+        self.on_complete = on_complete
+        self.on_batch = on_batch
+        self.profile = profile
+        self.loader_workers = max(1, loader_workers)
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.queue_size = max(1, queue_size)
+        self.write_concurrency = max(1, write_concurrency)
+
+    def run(
+        self, paths: Sequence[Path], cancel: threading.Event | None = None
+    ) -> Generator[IngestResult, None, None]:
+        """Ingest files concurrently. Yields an IngestResult per file in input order.
+
+        Setting cancel stops the run after the batch in flight, without waiting for
+        the current file to finish.
+        """
+        stop = threading.Event()
+        loaded: queue.Queue[Any] = queue.Queue(maxsize=self.queue_size)
+        batches: queue.Queue[Any] = queue.Queue(maxsize=self.queue_size)
+        results: queue.Queue[Any] = queue.Queue()
+
+        stages = [
+            (self._load_stage, (paths, loaded, stop)),
+            (self._embed_stage, (loaded, batches, stop)),
+            (self._write_stage, (batches, results, stop)),
+        ]
+        threads = [
+            threading.Thread(
+                target=self._run_stage,
+                args=(stage, args, results, stop),
+                name=f"ingest-{stage.__name__.strip('_')}",
+                daemon=True,
+            )
+            for stage, args in stages
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                if cancel is None:
+                    item = results.get()
+                else:
+                    item = _get(results, cancel)
+                    if item is None:
+                        logger.info("Ingestion cancelled")
+                        return
+                if item is _DONE:
+                    break
+                if isinstance(item, _StageError):
+                    raise item.error
+                yield cast(IngestResult, item)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def _run_stage(
+        self,
+        stage: Callable[..., None],
+        args: tuple[Any, ...],
+        results: queue.Queue[Any],
+        stop: threading.Event,
+    ) -> None:
+        try:
+            stage(*args)
+        except Exception as e:  # noqa: BLE001 - re-raised by run()
+            if not stop.is_set():
+                stop.set()
+                results.put(_StageError(e))
+
+    def _load_document(self, path: Path) -> _LoadedDocument:
+        previous_count = self.skip(path) if self.skip else None
+        if previous_count is not None:
+            return _LoadedDocument(
+                path, PreparedDocument([], previous_count), skipped=True
+            )
+        try:
+            prepared = self.prepare(str(path))
+        except LOAD_ERRORS:
+            logger.exception(f"Failed to load {path}")
+            prepared = PreparedDocument([], 0, failed=True)
+        return _LoadedDocument(path, prepared)
+
+    def _load_stage(
+        self, paths: Sequence[Path], loaded: queue.Queue[Any], stop: threading.Event
+    ) -> None:
+        # Bound in-flight work so fast loaders cannot run far ahead of the embedder
+        max_in_flight = self.loader_workers + self.queue_size
+        pending: deque[Future[_LoadedDocument]] = deque()
+
+        with ThreadPoolExecutor(max_workers=self.loader_workers) as executor:
+            try:
+                for path in paths:
+                    pending.append(executor.submit(self._load_document, path))
+                    if len(pending) >= max_in_flight and not _put(
+                        loaded, pending.popleft().result(), stop
+                    ):
+                        return
+                while pending:
+                    if not _put(loaded, pending.popleft().result(), stop):
+                        return
+            finally:
+                for future in pending:
+                    future.cancel()
+
+        _put(loaded, _DONE, stop)
+
+    def _embed_stage(
+        self, loaded: queue.Queue[Any], batches: queue.Queue[Any], stop: threading.Event
+    ) -> None:
+        batch = _Batch()
+
+        def flush() -> bool:
+            nonlocal batch
+            if batch.texts:
+                batch.embeddings = self.embed(batch.texts)
+            ready, batch = batch, _Batch()
+            return _put(batches, ready, stop)
+
+        while True:
+            item = _get(loaded, stop)
+            if item is None:
+                return
+            if item is _DONE:
+                break
+
+            document = cast(_LoadedDocument, item)
+            if not document.skipped:
+                metadata = cast(ChromaMetadata, {"source": str(document.path)})
+                for chunk in document.prepared.chunks:
+                    batch.texts.append(chunk)
+                    batch.metadatas.append(metadata)
+                    batch.written[document.path] = (
+                        batch.written.get(document.path, 0) + 1
+                    )
+                    if len(batch.texts) >= self.embed_batch_size and not flush():
+                        return
+            batch.completed.append(document)
+
+        if flush():
+            _put(batches, _DONE, stop)
+
+    def _write_stage(
+        self,
+        batches: queue.Queue[Any],
+        results: queue.Queue[Any],
+        stop: threading.Event,
+    ) -> None:
+        in_flight: deque[tuple[_Batch, Future[None]]] = deque()
+
+        with ThreadPoolExecutor(
+            max_workers=self.write_concurrency, thread_name_prefix="ingest-upsert"
+        ) as executor:
+            try:
+                while True:
+                    item = _get(batches, stop)
+                    if item is None:
+                        return
+                    if item is _DONE:
+                        break
+
+                    batch = cast(_Batch, item)
+                    in_flight.append((batch, executor.submit(self._write_batch, batch)))
+                    # Batches finish in order, so checkpoints and stale chunk deletes
+                    # never run ahead of an upsert still in flight
+                    while in_flight and (
+                        len(in_flight) >= self.write_concurrency
+                        or in_flight[0][1].done()
+                    ):
+                        self._finish_batch(*in_flight.popleft(), results)
+                while in_flight:
+                    self._finish_batch(*in_flight.popleft(), results)
+            finally:
+                for _, future in in_flight:
+                    future.cancel()
+
+        results.put(_DONE)
+
+    def _write_batch(self, batch: _Batch) -> None:
+        if not batch.texts:
+            return
+        with timed_stage(self.profile, "upsert") as stage:
+            stage.bytes = sum(len(text) for text in batch.texts)
+            self.vector_store.add_documents(
+                texts=batch.texts,
+                metadatas=batch.metadatas,
+                doc_embeddings=batch.embeddings,
+            )
+            stage.items = len(batch.texts)
+
+    def _finish_batch(
+        self, batch: _Batch, written: Future[None], results: queue.Queue[Any]
+    ) -> None:
+        written.result()
+        if batch.texts and self.on_batch:
+            self.on_batch(batch.written)
+        for document in batch.completed:
+            prepared = document.prepared
+            if document.skipped:
+                results.put(
+                    IngestResult(document.path.name, prepared.chunk_count, True)
+                )
+                continue
+
+            if prepared.failed:
+                results.put(IngestResult(document.path.name, 0, failed=True))
+                continue
+
+            # Stale chunks go only after their replacements are written
+            self.vector_store.delete(prepared.stale_ids)
+            if self.on_complete:
+                self.on_complete(document.path, prepared.chunk_count)
+            results.put(
+                IngestResult(
+                    document.path.name,
+                    prepared.chunk_count,
+                    suppressed=prepared.suppressed,
+                )
+            )
+
+
+def _put(q: queue.Queue[Any], item: Any, stop: threading.Event) -> bool:
+    """Blocking put that gives up once the pipeline is stopped."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=QUEUE_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue[Any], stop: threading.Event) -> Any | None:
+    """Blocking get that returns None once the pipeline is stopped."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=QUEUE_POLL_SECONDS)
+        except queue.Empty:
+            continue
+    return None
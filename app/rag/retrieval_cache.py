@@ -0,0 +1,171 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+import numpy as np
+
+from app.types import Metadata
+
+SearchResults = list[tuple[str, Metadata, float]]
+V = TypeVar("V")
+
+
+@dataclass(frozen=True)
+class RetrievalCacheStats:
+    embedding_hits: int
+    embedding_misses: int
+    result_hits: int
+    result_misses: int
+    saved_ms: float
+    collection_version: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.result_hits + self.result_misses
+        return self.result_hits / lookups if lookups else 0.0
+
+
+def normalize_query(query: str) -> str:
+    # all-MiniLM-L6-v2 is uncased, so case and whitespace do not change the vector
+    return " ".join(query.split()).casefold()
+
+
+class _LRU(Generic[V]):
+    """Size-bounded LRU map that remembers how long each value took to compute."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries: OrderedDict[object, tuple[V, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: object) -> tuple[V, float] | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: object, value: V, cost_ms: float) -> None:
+        if self.max_size <= 0:
+            return
+        self.entries[key] = (value, cost_ms)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+
+class RetrievalCache:
+    """Two-level retrieval cache: normalized query -> embedding, and
+    (embedding key, k, collection version) -> search results.
+
+    Bumping the collection version on ingest invalidates all cached results while
+    keeping query embeddings, which do not depend on the collection.
+    """
+
+    def __init__(self, max_queries: int = 1024, max_results: int = 1024):
+        self._lock = threading.Lock()
+        self._embeddings: _LRU[np.ndarray] = _LRU(max_queries)
+        self._results: _LRU[SearchResults] = _LRU(max_results)
+        self.collection_version = 0
+        self.saved_ms = 0.0
+
+    def embedding(
+        self, query: str, embed: Callable[[str], np.ndarray]
+    ) -> tuple[str, np.ndarray]:
+        """Return (embedding key, vector) for a query, embedding it on a miss."""
+        return self.embeddings_many([query], lambda texts: np.stack([embed(texts[0])]))[
+            0
+        ]
+
+    def embeddings_many(
+        self, queries: list[str], embed_many: Callable[[list[str]], np.ndarray]
+    ) -> list[tuple[str, np.ndarray]]:
+        """Return (embedding key, vector) per query, embedding all misses in one call."""
+        normalized = [normalize_query(query) for query in queries]
+        keys = [
+            hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+            for text in normalized
+        ]
+
+        vectors: dict[str, np.ndarray] = {}
+        missing: dict[str, str] = {}
+        with self._lock:
+            for key, text in zip(keys, normalized):
+                if key in vectors or key in missing:
+                    continue
+                cached = self._embeddings.get(key)
+                if cached:
+                    self.saved_ms += cached[1]
+                    vectors[key] = cached[0]
+                else:
+                    missing[key] = text
+
+        if missing:
+            start = time.perf_counter()
+            computed = embed_many(list(missing.values()))
+            cost_ms = (time.perf_counter() - start) * 1000 / len(missing)
+            with self._lock:
+                for key, vector in zip(missing, computed):
+                    self._embeddings.put(key, vector, cost_ms)
+                    vectors[key] = vector
+        return [(key, vectors[key]) for key in keys]
+
+    def results(
+        self, embedding_key: str, k: int, search: Callable[[], SearchResults]
+    ) -> SearchResults:
+        return self.results_many([embedding_key], k, lambda keys: [search()])[0]
+
+    def results_many(
+        self,
+        embedding_keys: list[str],
+        k: int,
+        search_many: Callable[[list[str]], list[SearchResults]],
+    ) -> list[SearchResults]:
+        """Return results per embedding key; search_many receives the uncached keys."""
+        found: dict[str, SearchResults] = {}
+        missing: list[str] = []
+        with self._lock:
+            version = self.collection_version
+            for key in dict.fromkeys(embedding_keys):
+                cached = self._results.get((key, k, version))
+                if cached:
+                    self.saved_ms += cached[1]
+                    found[key] = cached[0]
+                else:
+                    missing.append(key)
+
+        if missing:
+            start = time.perf_counter()
+            computed = search_many(missing)
+            cost_ms = (time.perf_counter() - start) * 1000 / len(missing)
+            with self._lock:
+                for key, results in zip(missing, computed):
+                    found[key] = results
+                    # Drop results computed against a collection that changed meanwhile
+                    if version == self.collection_version:
+                        self._results.put((key, k, version), list(results), cost_ms)
+        return [list(found[key]) for key in embedding_keys]
+
+    def invalidate(self) -> None:
+        """Bump the collection version after an ingest and drop cached results."""
+        with self._lock:
+            self.collection_version += 1
+            self._results.entries.clear()
+
+    def stats(self) -> RetrievalCacheStats:
+        with self._lock:
+            return RetrievalCacheStats(
+                embedding_hits=self._embeddings.hits,
+                embedding_misses=self._embeddings.misses,
+                result_hits=self._results.hits,
+                result_misses=self._results.misses,
+                saved_ms=self.saved_ms,
+                collection_version=self.collection_version,
+            )
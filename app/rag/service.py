@@ -1,13 +1,34 @@
 from typing import cast
-from collections.abc import Generator
+from functools import partial
+from itertools import islice
+from collections.abc import Generator, Iterator
+from contextlib import contextmanager
+from pathlib import Path
 from chromadb.api.types import Metadata as ChromaMetadata
+import numpy as np
 from app.types import Metadata
-from app.rag.loader import load_document
-from app.rag.splitter import split_text
-from app.db.vector import ChromaVectorStore
+from app.rag import embeddings
+from app.rag.checkpoint import IngestCheckpoint
+from app.rag.dedup import ChunkDeduplicator, minhash_signature
+from app.rag.ingest_profile import IngestProfile, timed_stage
+from app.rag.keyword_index import KeywordIndex, reciprocal_rank_fusion
+from app.rag.loader import (
+    configure_pdf_extraction,
+    configure_text_cache,
+    load_document,
+    stream_document,
+)
+from app.rag.manifest import FileState, IngestManifest, file_state
+from app.rag.pipeline import IngestionPipeline, PreparedDocument
+from app.rag.retrieval_cache import RetrievalCache
+from app.rag.splitter import iter_split_text, split_text, split_text_by_tokens
+from app.db.mmap_store import MmapVectorStore, normalize_rows
+from app.db.vector import ADD_WINDOW, ChromaVectorStore, VectorStore, make_chunk_id
 from app.core.config import Settings
 from app.core.utils import validate_directory_path
-from app.core.models import RetrievalResult
+from app.core.models import IngestResult, RetrievalResult
+import re
+import threading
 import time
 import logging
 
@@ -21,25 +42,93 @@ RAG_CONTEXT_TEMPLATE = (
     "{context}"
 )
 RAG_DISTANCE_THRESHOLD = 1.0
+# Hybrid retrieval fuses this many times k candidates from each ranking
+HYBRID_CANDIDATE_MULTIPLIER = 3
 
 
 class RAGService:
     def __init__(
         self,
-        vector_store: ChromaVectorStore | None = None,
+        vector_store: VectorStore | None = None,
         settings: Settings | None = None,
     ):
         self.settings = settings or Settings()
-        self.vector_store: ChromaVectorStore = (
+        self.vector_store: VectorStore = (
             vector_store if vector_store else self._create_vector_store()
         )
+        embeddings.configure_server(self.settings.EMBEDDING_SERVER_SOCKET)
+        embeddings.configure_batching(self.settings.EMBEDDING_BATCH_TOKENS)
+        configure_pdf_extraction(
+            self.settings.PDF_WORKERS, self.settings.PDF_PARALLEL_MIN_PAGES
+        )
+        configure_text_cache(
+            self.settings.TEXT_CACHE_DIR, max_mb=self.settings.TEXT_CACHE_MAX_MB
+        )
+        embeddings.configure_cache(
+            self.settings.EMBEDDING_CACHE_DIR,
+            max_entries=self.settings.EMBEDDING_CACHE_MAX_ENTRIES,
+            dtype=self.settings.EMBEDDING_CACHE_DTYPE,
+        )
+        self.retrieval_cache = RetrievalCache(
+            max_queries=self.settings.RETRIEVAL_CACHE_SIZE,
+            max_results=self.settings.RETRIEVAL_CACHE_SIZE,
+        )
+        self.manifest = (
+            IngestManifest(self.settings.INGEST_MANIFEST_PATH, self.vector_store.target)
+            if self.settings.INGEST_MANIFEST_PATH
+            else None
+        )
+        self.deduplicator = (
+            ChunkDeduplicator(
+                self._index_path(self.settings.DEDUP_INDEX_DIR),
+                threshold=self.settings.DEDUP_THRESHOLD,
+            )
+            if self.settings.DEDUP_INDEX_DIR
+            else None
+        )
+        self.keyword_index = (
+            KeywordIndex(self._index_path(self.settings.KEYWORD_INDEX_DIR))
+            if self.settings.KEYWORD_INDEX_DIR
+            else None
+        )
+        # Embedding throughput of this service, to estimate time saved by dedup
+        self.embed_seconds = 0.0
+        self.embedded_chunks = 0
+        # Set to an IngestProfile to record per-stage timings of ingest runs
+        self.ingest_profile: IngestProfile | None = None
+        # One ingest at a time: runs share the manifest, dedup and keyword indexes
+        self._ingest_lock = threading.Lock()
+        # Per file being ingested, its state when it was read, for the manifest
+        self._file_states: dict[str, FileState] = {}
+
+    def _index_path(self, index_dir: str) -> str:
+        # One index per vector store target, like the ingest manifest
+        safe_target = re.sub(r"[^A-Za-z0-9._-]", "_", self.vector_store.target)
+        return str(Path(index_dir) / f"{safe_target}.npz")
+
+    def _create_vector_store(self) -> VectorStore:
+        if self.settings.VECTOR_BACKEND == "mmap":
+            return MmapVectorStore(
+                index_directory=self.settings.MMAP_INDEX_DIR,
+                quantization=self.settings.VECTOR_QUANTIZATION,
+                rescore_multiplier=self.settings.QUANTIZATION_RESCORE_MULTIPLIER,
+                ivf_lists=self.settings.IVF_LISTS,
+                nprobe=self.settings.IVF_NPROBE,
+            )
 
-    def _create_vector_store(self) -> ChromaVectorStore:
         use_http_mode = self.settings.CHROMA_HOST is not None
         return ChromaVectorStore(
             persist_directory=None if use_http_mode else self.settings.CHROMA_DB_DIR,
             host=self.settings.CHROMA_HOST,
             port=self.settings.CHROMA_PORT,
+            upsert_batch_size=self.settings.CHROMA_UPSERT_BATCH_SIZE,
+            chunk_store_dir=self.settings.CHUNK_STORE_DIR,
+        )
+
+    def warm_up(self) -> None:
+        """Load the embedding model and the vector index ahead of the first query."""
+        self.vector_store.similarity_search_by_vector(
+            embeddings.embed_query("warm up"), k=1
         )
 
     def retrieve_context(self, query: str) -> RetrievalResult:
@@ -64,53 +153,543 @@ class RAGService:
             is_success=rag_success,
         )
 
-    def ingest_directory(
-        self, directory_path: str
-    ) -> Generator[tuple[str, int], None, None]:
-        """Ingest all .txt/.pdf files from directory. Yields (filename, chunk_count) per file."""
+    def find_documents(self, directory_path: str) -> list[Path]:
+        """The .txt/.pdf files ingest_directory would ingest, in ingest order."""
         valid_dir = validate_directory_path(directory_path)
-
-        files = sorted(
+        return sorted(
             [
-                f.name
+                f
                 for f in valid_dir.iterdir()
                 if f.is_file() and f.suffix.lower() in (".txt", ".pdf")
             ]
         )
 
-        for filename in files:
-            filepath = valid_dir / filename
-            chunks = self.ingest(str(filepath))
-            yield (filename, chunks)
+    def ingest_directory(
+        self,
+        directory_path: str,
+        resume: bool = False,
+        cancel: threading.Event | None = None,
+        embed_threads: int = 0,
+    ) -> Generator[IngestResult, None, None]:
+        """Ingest all .txt/.pdf files from directory, skipping files unchanged since the last run.
+
+        Yields an IngestResult per file, which unpacks as (filename, chunk_count);
+        skipped, suppressed and failed say what happened to it. Progress is
+        checkpointed per batch; resume=True continues the latest interrupted run
+        over this directory from its last committed batch. Setting cancel stops
+        the run early, leaving it resumable. embed_threads > 0 embeds the documents
+        in a worker process limited to that many torch threads, so queries
+        embedded meanwhile keep this process's threads.
+        Raises RuntimeError if another ingest is running.
+        """
+        valid_dir = validate_directory_path(directory_path)
+        files = self.find_documents(directory_path)
+
+        with self._exclusive_ingest():
+            yield from self._ingest_files(
+                valid_dir, files, resume, cancel, embed_threads
+            )
+
+    def _ingest_files(
+        self,
+        valid_dir: Path,
+        files: list[Path],
+        resume: bool,
+        cancel: threading.Event | None,
+        embed_threads: int,
+    ) -> Generator[IngestResult, None, None]:
+        checkpoint = self._start_checkpoint(valid_dir, resume)
+        try:
+            with embeddings.process_pool(*self._pool_size(embed_threads)) as pool:
+                pipeline = IngestionPipeline(
+                    prepare=partial(self._prepare_resumed, checkpoint),
+                    embed=self._embed_documents,
+                    vector_store=self.vector_store,
+                    loader_workers=self.settings.INGEST_LOADER_WORKERS,
+                    # Large enough to give every pool worker a full shard
+                    embed_batch_size=max(
+                        self.settings.INGEST_EMBED_BATCH_SIZE,
+                        pool.batch_size if pool else 0,
+                    ),
+                    queue_size=self.settings.INGEST_QUEUE_SIZE,
+                    skip=partial(self._completed_chunk_count, checkpoint),
+                    on_complete=partial(self._record_completed, checkpoint),
+                    on_batch=checkpoint.record_batch if checkpoint else None,
+                    profile=self.ingest_profile,
+                    write_concurrency=self._write_concurrency,
+                )
+                yield from pipeline.run(files, cancel=cancel)
+            # Not reached when interrupted, so the run stays resumable
+            if checkpoint and not (cancel and cancel.is_set()):
+                checkpoint.finish()
+        finally:
+            # States of files not completed by a failed or cancelled run
+            self._file_states.clear()
+            embeddings.flush_cache()
+            if self.manifest:
+                self.manifest.flush()
+            if self.deduplicator:
+                # Chunks of files not completed by a failed or cancelled run
+                self.deduplicator.discard()
+                self.deduplicator.save()
+            if self.keyword_index:
+                self.keyword_index.discard()
+                self.keyword_index.save()
+            if checkpoint:
+                checkpoint.close()
+
+    @contextmanager
+    def _exclusive_ingest(self) -> Iterator[None]:
+        if not self._ingest_lock.acquire(blocking=False):
+            raise RuntimeError(
+                "Another ingest is running; wait for it or cancel it first"
+            )
+        try:
+            yield
+        finally:
+            self._ingest_lock.release()
+
+    def _pool_size(self, embed_threads: int) -> tuple[int, int]:
+        """Embedding pool workers and torch threads per worker for a directory ingest."""
+        workers = self.settings.EMBEDDING_POOL_WORKERS
+        # The embedding server is its own process already
+        if workers > 0 or embed_threads <= 0 or embeddings.server_running():
+            return workers, self.settings.EMBEDDING_POOL_THREADS
+        # torch threads are process-wide: capping them here would slow queries too
+        return 1, embed_threads
+
+    @property
+    def _write_concurrency(self) -> int:
+        # Local stores write to disk under one lock; HTTP round trips can overlap
+        if self.settings.VECTOR_BACKEND == "chroma" and self.settings.CHROMA_HOST:
+            return self.settings.CHROMA_UPSERT_CONCURRENCY
+        return 1
+
+    def _start_checkpoint(
+        self, directory: Path, resume: bool
+    ) -> IngestCheckpoint | None:
+        if not self.settings.INGEST_CHECKPOINT_DB:
+            if resume:
+                logger.warning("INGEST_CHECKPOINT_DB is not set; starting over")
+            return None
+
+        checkpoint = IngestCheckpoint(
+            self.settings.INGEST_CHECKPOINT_DB,
+            self.vector_store.target,
+            str(directory.resolve()),
+        )
+        if checkpoint.start(resume):
+            logger.info(f"Resuming ingest run {checkpoint.run_id} of {directory}")
+        return checkpoint
+
+    def _prepare_resumed(
+        self, checkpoint: IngestCheckpoint | None, path: str
+    ) -> PreparedDocument:
+        prepared = self._prepare_document(path)
+        # Incremental mode already skips chunks stored before the interruption
+        if checkpoint and not self.settings.INGEST_INCREMENTAL:
+            written = checkpoint.written_chunks(Path(path))
+            prepared.chunks = (
+                prepared.chunks[written:]
+                if isinstance(prepared.chunks, list)
+                else islice(prepared.chunks, written, None)
+            )
+        return prepared
+
+    def _completed_chunk_count(
+        self, checkpoint: IngestCheckpoint | None, path: Path
+    ) -> int | None:
+        if checkpoint:
+            count = checkpoint.completed_chunk_count(path)
+            if count is not None:
+                return count
+        return self._previous_chunk_count(path)
+
+    def _record_completed(
+        self, checkpoint: IngestCheckpoint | None, path: Path, chunk_count: int
+    ) -> None:
+        self._record_ingested(str(path), chunk_count)
+        if checkpoint:
+            checkpoint.record_file(path, chunk_count)
 
     def ingest(self, path: str) -> int:
-        text = load_document(path)
+        """Ingest one file; raises RuntimeError if another ingest is running."""
+        with self._exclusive_ingest():
+            return self._ingest_file(path)
+
+    def _ingest_file(self, path: str) -> int:
+        try:
+            prepared = self._prepare_document(path)
+
+            # Window by window, so a streamed document is never held in memory whole
+            chunks = iter(prepared.chunks)
+            metadata = cast(ChromaMetadata, {"source": path})
+            while window := list(islice(chunks, ADD_WINDOW)):
+                self.vector_store.add_documents(
+                    texts=window,
+                    metadatas=[metadata] * len(window),
+                )
+
+            if prepared.failed:
+                return 0
+            # Also when every chunk is now suppressed or the document is empty
+            self.vector_store.delete(prepared.stale_ids)
+            self._record_ingested(path, prepared.chunk_count)
+        finally:
+            self._file_states.pop(path, None)
+            if self.manifest:
+                self.manifest.flush()
+            embeddings.flush_cache()
+            if self.deduplicator:
+                self.deduplicator.discard(path)
+                self.deduplicator.save()
+            if self.keyword_index:
+                self.keyword_index.discard(path)
+                self.keyword_index.save()
+
+        return prepared.chunk_count
+
+    def _prepare_document(self, path: str) -> PreparedDocument:
+        """Split a document and, in incremental mode, diff it against stored chunks.
+
+        Only chunks whose IDs are not already stored for this source need embedding;
+        stored IDs that no longer occur in the document are returned as stale.
+        """
+        if self.manifest:
+            # Before reading: an edit made while the file is ingested must not be
+            # recorded with the chunks of the earlier version
+            self._file_states[path] = file_state(Path(path))
+        if self._should_stream(path):
+            stream = iter_split_text(
+                stream_document(path), DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP
+            )
+            return self._prepare_lazily(
+                path,
+                self.deduplicator.classify(path, stream)
+                if self.deduplicator
+                else ((chunk, False) for chunk in stream),
+            )
+
+        raw_chunks = self._load_chunks(path)
+        if self.deduplicator:
+            with timed_stage(self.ingest_profile, "dedup") as stage:
+                stage.bytes = sum(len(chunk) for chunk in raw_chunks)
+                signatures = [minhash_signature(chunk) for chunk in raw_chunks]
+                stage.items = len(raw_chunks)
+            # Duplicates are decided as the pipeline reads the chunks, which it
+            # does in input order, so the first file to hold a passage keeps it
+            # however the loader threads interleave
+            return self._prepare_lazily(
+                path,
+                self.deduplicator.classify_signed(path, zip(raw_chunks, signatures)),
+            )
+        if self.keyword_index:
+            # Every kept chunk, including those already stored, replaces the
+            # document's previous postings once it is recorded as ingested
+            raw_chunks = list(self.keyword_index.index(path, raw_chunks))
+        if not self.settings.INGEST_INCREMENTAL:
+            return PreparedDocument(raw_chunks, len(raw_chunks))
+
+        existing_ids = self.vector_store.get_ids_by_source(path)
+        new_chunks_by_id = {make_chunk_id(path, chunk): chunk for chunk in raw_chunks}
 
-        raw_chunks = split_text(
-            text, chunk_size=DEFAULT_CHUNK_SIZE, chunk_overlap=DEFAULT_CHUNK_OVERLAP
+        return PreparedDocument(
+            chunks=[
+                chunk
+                for chunk_id, chunk in new_chunks_by_id.items()
+                if chunk_id not in existing_ids
+            ],
+            chunk_count=len(raw_chunks),
+            stale_ids=sorted(existing_ids - new_chunks_by_id.keys()),
         )
 
-        if not raw_chunks:
-            return 0
+    def _should_stream(self, path: str) -> bool:
+        if self.settings.SPLITTER_MODE != "characters" or not path.lower().endswith(
+            ".txt"
+        ):
+            return False
+        try:
+            size = Path(path).stat().st_size
+        except OSError:
+            return False  # reported by the regular loader
+        return size >= self.settings.INGEST_STREAM_MIN_MB * 1024 * 1024
+
+    def _prepare_lazily(
+        self, path: str, classified: Iterator[tuple[str, bool]]
+    ) -> PreparedDocument:
+        """Like _prepare_document, but chunks are classified as duplicates or kept
+        while the pipeline consumes them. For a streamed document they are also
+        produced then, so memory stays constant however large the file.
+
+        chunk_count, stale_ids and suppressed are final once chunks is exhausted.
+        """
+        prepared = PreparedDocument(chunks=[], chunk_count=0)
+        existing_ids = (
+            self.vector_store.get_ids_by_source(path)
+            if self.settings.INGEST_INCREMENTAL
+            else set()
+        )
+
+        def chunks() -> Iterator[str]:
+            def kept() -> Iterator[str]:
+                for chunk, duplicate in classified:
+                    if duplicate:
+                        prepared.suppressed += 1
+                    else:
+                        yield chunk
+
+            # Only IDs already stored are remembered, not one per chunk
+            kept_ids: set[str] = set()
+            try:
+                for chunk in (
+                    self.keyword_index.index(path, kept())
+                    if self.keyword_index
+                    else kept()
+                ):
+                    prepared.chunk_count += 1
+                    if existing_ids:
+                        chunk_id = make_chunk_id(path, chunk)
+                        if chunk_id in existing_ids:
+                            kept_ids.add(chunk_id)
+                            continue
+                    yield chunk
+            except (OSError, ValueError):
+                # Reported as failed, like a document the loader cannot read; it
+                # is not recorded as ingested, so the next run retries it
+                logger.exception(f"Failed to stream {path}")
+                prepared.failed = True
+                if self.deduplicator:
+                    self.deduplicator.discard(path)
+                if self.keyword_index:
+                    # Keeps the previous postings rather than a truncated set
+                    self.keyword_index.discard(path)
+                return
+            prepared.stale_ids = sorted(existing_ids - kept_ids)
+
+        prepared.chunks = chunks()
+        return prepared
 
-        metadatas: list[ChromaMetadata] = [
-            cast(ChromaMetadata, {"source": path})
-        ] * len(raw_chunks)
+    def _embed_documents(self, texts: list[str]) -> np.ndarray:
+        start = time.perf_counter()
+        with timed_stage(self.ingest_profile, "embed") as stage:
+            stage.bytes = sum(len(text) for text in texts)
+            vectors = embeddings.embed_documents(texts)
+            stage.items = len(vectors)
+        self.embed_seconds += time.perf_counter() - start
+        self.embedded_chunks += len(texts)
+        return vectors
 
-        self.vector_store.add_documents(
-            texts=raw_chunks,
-            metadatas=metadatas,
+    @property
+    def embed_seconds_per_chunk(self) -> float:
+        return (
+            self.embed_seconds / self.embedded_chunks if self.embedded_chunks else 0.0
         )
 
-        return len(raw_chunks)
+    def _previous_chunk_count(self, path: Path) -> int | None:
+        """Chunk count from the manifest if the file is unchanged since it was ingested
+        and its chunks are still stored."""
+        if not self.manifest:
+            return None
+        # Documents ingested before the keyword index existed are indexed once
+        if self.keyword_index and not self.keyword_index.has_source(str(path)):
+            return None
 
-    def retrieve(self, query: str) -> list[tuple[str, Metadata, float]]:
+        entry = self.manifest.get_unchanged(path, *self._chunking)
+        if entry is None:
+            return None
+        # The collection may have been dropped or recreated since it was recorded
+        if entry.chunk_count and not self.vector_store.get_ids_by_source(str(path)):
+            return None
+        return entry.chunk_count
+
+    def _record_ingested(self, source: str, chunk_count: int) -> None:
+        self.retrieval_cache.invalidate()
+        if self.deduplicator:
+            recheck = self.deduplicator.commit(source)
+            if recheck and self.manifest:
+                # Chunks they had suppressed against source may be gone from it
+                logger.info(
+                    f"{len(recheck)} files with passages deduplicated against "
+                    f"{source} will be ingested again next time"
+                )
+                for dependent in recheck:
+                    self.manifest.forget(Path(dependent))
+        if self.keyword_index:
+            self.keyword_index.commit(source)
+        if self.manifest:
+            self.manifest.record(
+                Path(source),
+                chunk_count,
+                *self._chunking,
+                state=self._file_states.pop(source, None),
+            )
+
+    @property
+    def _chunking(self) -> tuple[int, int, str]:
+        """(chunk size, overlap, splitter mode) as recorded in the ingest manifest."""
+        if self.settings.SPLITTER_MODE == "tokens":
+            return (
+                self.settings.CHUNK_TOKENS,
+                self.settings.CHUNK_OVERLAP_TOKENS,
+                "tokens",
+            )
+        return DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP, "characters"
+
+    def _load_chunks(self, path: str) -> list[str]:
+        text = load_document(path, profile=self.ingest_profile)
+        with timed_stage(self.ingest_profile, "split") as stage:
+            stage.bytes = len(text)
+            if self.settings.SPLITTER_MODE == "tokens":
+                spans = split_text_by_tokens(
+                    text,
+                    embeddings.get_tokenizer(),
+                    chunk_tokens=self.settings.CHUNK_TOKENS,
+                    overlap_tokens=self.settings.CHUNK_OVERLAP_TOKENS,
+                )
+                chunks = [text[span.start : span.end] for span in spans]
+            else:
+                chunks = split_text(
+                    text,
+                    chunk_size=DEFAULT_CHUNK_SIZE,
+                    chunk_overlap=DEFAULT_CHUNK_OVERLAP,
+                )
+            stage.items = len(chunks)
+        return chunks
+
+    def retrieve(self, query: str, k: int = 10) -> list[tuple[str, Metadata, float]]:
+        """Vector or hybrid search through the query-embedding and result caches."""
         start_time = time.time()
 
-        results = self.vector_store.similarity_search(query=query, k=10)
+        embedding_key, query_vector = self.retrieval_cache.embedding(
+            query, embeddings.embed_query
+        )
+        if self._hybrid:
+            results = self.retrieval_cache.results(
+                f"hybrid:{embedding_key}",
+                k,
+                lambda: self._fuse(
+                    query,
+                    query_vector,
+                    self.vector_store.similarity_search_by_vector(
+                        query_vector, k=k * HYBRID_CANDIDATE_MULTIPLIER
+                    ),
+                    k,
+                ),
+            )
+        else:
+            results = self.retrieval_cache.results(
+                embedding_key,
+                k,
+                lambda: self.vector_store.similarity_search_by_vector(
+                    query_vector, k=k
+                ),
+            )
 
         duration = time.time() - start_time
         if duration > 0.3:
             logger.warning(f"Retrieval took {duration:.2f}s")
 
         return results
+
+    def retrieve_many(
+        self, queries: list[str], k: int = 10
+    ) -> list[list[tuple[str, Metadata, float]]]:
+        """Retrieve for several queries with one embedding batch and one vector search
+        for the queries not already cached. Results are in input order."""
+        start_time = time.time()
+
+        keyed_vectors = self.retrieval_cache.embeddings_many(
+            queries, embeddings.embed_queries
+        )
+        vector_by_key = dict(keyed_vectors)
+        if self._hybrid:
+            query_by_key = {
+                f"hybrid:{key}": (query, vector)
+                for query, (key, vector) in zip(queries, keyed_vectors)
+            }
+
+            def search_hybrid(
+                keys: list[str],
+            ) -> list[list[tuple[str, Metadata, float]]]:
+                vector_hits = self.vector_store.similarity_search_by_vectors(
+                    np.stack([query_by_key[key][1] for key in keys]),
+                    k=k * HYBRID_CANDIDATE_MULTIPLIER,
+                )
+                return [
+                    self._fuse(*query_by_key[key], hits, k)
+                    for key, hits in zip(keys, vector_hits)
+                ]
+
+            results = self.retrieval_cache.results_many(
+                [f"hybrid:{key}" for key, _ in keyed_vectors], k, search_hybrid
+            )
+        else:
+            results = self.retrieval_cache.results_many(
+                [key for key, _ in keyed_vectors],
+                k,
+                lambda keys: self.vector_store.similarity_search_by_vectors(
+                    np.stack([vector_by_key[key] for key in keys]), k=k
+                ),
+            )
+
+        duration = time.time() - start_time
+        if duration > 0.3:
+            logger.warning(f"Retrieval of {len(queries)} queries took {duration:.2f}s")
+
+        return results
+
+    @property
+    def _hybrid(self) -> bool:
+        return (
+            self.settings.RETRIEVAL_MODE == "hybrid" and self.keyword_index is not None
+        )
+
+    def _fuse(
+        self,
+        query: str,
+        query_vector: np.ndarray,
+        vector_hits: list[tuple[str, Metadata, float]],
+        k: int,
+    ) -> list[tuple[str, Metadata, float]]:
+        """Fuse vector and BM25 rankings with reciprocal rank fusion.
+
+        Chunks found only by BM25 are fetched from the vector store, with their
+        distance to the query computed from the stored vector.
+        """
+        assert self.keyword_index is not None
+        keyword_hits = self.keyword_index.search(query, k * HYBRID_CANDIDATE_MULTIPLIER)
+        by_id = {
+            make_chunk_id(str(meta.get("source", "")), text): (text, meta, distance)
+            for text, meta, distance in vector_hits
+        }
+        fused = reciprocal_rank_fusion(
+            [list(by_id), [chunk_id for chunk_id, _ in keyword_hits]], k
+        )
+
+        missing = [chunk_id for chunk_id in fused if chunk_id not in by_id]
+        if missing:
+            query_unit = normalize_rows(query_vector)
+            for chunk_id, document in zip(
+                missing, self.vector_store.get_documents(missing)
+            ):
+                # Indexed at prepare time, so possibly not written yet
+                if document is not None:
+                    text, meta, vector = document
+                    cosine = float(normalize_rows(vector) @ query_unit)
+                    by_id[chunk_id] = (text, meta, 2.0 - 2.0 * cosine)
+        return [by_id[chunk_id] for chunk_id in fused if chunk_id in by_id]
+
+    def keyword_search(
+        self, query: str, k: int = 10
+    ) -> list[tuple[str, Metadata, float]]:
+        """BM25 lookup without the embedding model. The third element of each result
+        is its BM25 score (higher is better), not a distance."""
+        if self.keyword_index is None:
+            raise ValueError("KEYWORD_INDEX_DIR is not set")
+        hits = self.keyword_index.search(query, k)
+        documents = self.vector_store.get_documents([chunk_id for chunk_id, _ in hits])
+        return [
+            (document[0], document[1], score)
+            for (_, score), document in zip(hits, documents)
+            if document is not None
+        ]
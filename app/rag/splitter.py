@@ -1,3 +1,10 @@
+from collections.abc import Iterable, Iterator
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from transformers import PreTrainedTokenizerFast
+
+
 def split_text(
     text: str, chunk_size: int = 1500, chunk_overlap: int = 300
 ) -> list[str]:
@@ -14,3 +21,119 @@ def split_text(
         start += chunk_size - chunk_overlap
 
     return chunks
+
+
+def iter_split_text(
+    pieces: Iterable[str], chunk_size: int = 1500, chunk_overlap: int = 300
+) -> Iterator[str]:
+    """split_text over text arriving in pieces, yielding the same chunks as
+    split_text("".join(pieces)) while buffering about one chunk of text."""
+    step = chunk_size - chunk_overlap
+    buffer = ""
+    for piece in pieces:
+        buffer += piece
+        # A chunk is final only at the end of the text, so emit it once text
+        # beyond it has arrived
+        start = 0
+        while start + chunk_size < len(buffer):
+            yield buffer[start : start + chunk_size]
+            start += step
+        buffer = buffer[start:]
+    yield buffer
+
+
+class TextSpan(NamedTuple):
+    """Character range [start, end) of a chunk in the source text."""
+
+    start: int
+    end: int
+
+
+# Preference when choosing where to cut, highest first
+PARAGRAPH_BREAK = 3
+SENTENCE_BREAK = 2
+WORD_BREAK = 1
+SENTENCE_END = ".!?"
+CLOSING_PUNCTUATION = "\"')]”’"
+
+
+def _boundary_strengths(text: str, offsets: list[tuple[int, int]]) -> list[int]:
+    """How good a cut just before each token is: a paragraph, sentence or word
+    break, or 0 inside a word (e.g. before a '##' word-piece or attached punctuation)."""
+    strengths = [PARAGRAPH_BREAK] + [0] * (len(offsets) - 1)
+    for i in range(1, len(offsets)):
+        prev_end, start = offsets[i - 1][1], offsets[i][0]
+        if start <= prev_end:
+            continue
+        if text.count("\n", prev_end, start) >= 2:
+            strengths[i] = PARAGRAPH_BREAK
+            continue
+        tail = text[max(0, prev_end - 3) : prev_end].rstrip(CLOSING_PUNCTUATION)
+        strengths[i] = SENTENCE_BREAK if tail[-1:] in SENTENCE_END else WORD_BREAK
+    return strengths
+
+
+def split_token_spans(
+    text: str,
+    offsets: list[tuple[int, int]],
+    chunk_tokens: int = 254,
+    overlap_tokens: int = 32,
+    snap_fraction: float = 0.25,
+) -> list[TextSpan]:
+    """Split text into spans of at most chunk_tokens tokens, given the character
+    offsets of its tokens (one tokenizer pass over the whole document).
+
+    A chunk ends at the strongest paragraph, sentence or word break among its last
+    snap_fraction of tokens, and the next one starts overlap_tokens earlier,
+    moved forward to the next word start. Returns character spans.
+    """
+    if chunk_tokens <= 0:
+        raise ValueError("chunk_tokens must be positive")
+    if not 0 <= overlap_tokens < chunk_tokens:
+        raise ValueError("overlap_tokens must be in [0, chunk_tokens)")
+
+    # Special tokens and whitespace-only tokens have empty offsets
+    offsets = [(s, e) for s, e in offsets if e > s]
+    if not offsets:
+        return []
+
+    strengths = _boundary_strengths(text, offsets)
+    snap_window = max(1, int(chunk_tokens * snap_fraction))
+    spans = []
+    start = 0
+    while True:
+        end = min(start + chunk_tokens, len(offsets))
+        if end < len(offsets):
+            lowest = max(start + 1, end - snap_window + 1)
+            # Latest cut with the strongest break in the window; a mid-word cut
+            # only when the window has no break at all
+            end = max(range(lowest, end + 1), key=lambda i: (strengths[i], i))
+
+        spans.append(TextSpan(offsets[start][0], offsets[end - 1][1]))
+        if end == len(offsets):
+            return spans
+
+        # Without a word start in the overlap, start cleanly at the cut instead
+        overlap_start = max(start + 1, end - overlap_tokens)
+        start = next((i for i in range(overlap_start, end) if strengths[i]), end)
+
+
+def split_text_by_tokens(
+    text: str,
+    tokenizer: "PreTrainedTokenizerFast",
+    chunk_tokens: int = 254,
+    overlap_tokens: int = 32,
+) -> list[TextSpan]:
+    """Tokenize the document once with a fast tokenizer and split it on token
+    budgets. chunk_tokens should leave room for the model's special tokens."""
+    encoding = tokenizer(
+        text,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        return_attention_mask=False,
+        truncation=False,
+        verbose=False,
+    )
+    return split_token_spans(
+        text, encoding["offset_mapping"], chunk_tokens, overlap_tokens
+    )
@@ -0,0 +1,115 @@
+import logging
+import os
+import threading
+import zlib
+from pathlib import Path
+
+from app.rag.embedding_cache import CacheStats
+
+logger = logging.getLogger(__name__)
+
+ENTRY_SUFFIX = ".txt.z"
+COMPRESSION_LEVEL = 6
+# Eviction frees this much headroom below the cap so it does not run on every put
+EVICTION_TARGET = 0.9
+
+
+class TextCache:
+    """Persistent cache of extracted document text, zlib-compressed, one file per
+    entry, with LRU eviction once the entries exceed max_bytes.
+
+    Entries are keyed by the source file's content hash and the loader version,
+    so edited files and loader changes both miss. File mtimes record last use.
+    """
+
+    def __init__(self, cache_dir: str, version: int, max_bytes: int = 1 << 30):
+        self.directory = Path(cache_dir)
+        self.version = version
+        self.max_bytes = max(1, max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._sizes: dict[Path, int] = {}
+        self._total_bytes = 0
+        self._load()
+
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, self.evictions, len(self._sizes))
+
+    def get(self, content_hash: str) -> str | None:
+        path = self._entry_path(content_hash)
+        try:
+            data = path.read_bytes()
+            text = zlib.decompress(data).decode("utf-8")
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except (OSError, zlib.error, UnicodeDecodeError) as e:
+            logger.warning(f"Discarding unreadable text cache entry {path}: {e}")
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+            if path not in self._sizes:  # written by another process
+                self._sizes[path] = len(data)
+                self._total_bytes += len(data)
+        return text
+
+    def put(self, content_hash: str, text: str) -> None:
+        path = self._entry_path(content_hash)
+        data = zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._total_bytes += len(data) - self._sizes.get(path, 0)
+            self._sizes[path] = len(data)
+            if self._total_bytes > self.max_bytes:
+                self._evict_locked()
+
+    def _entry_path(self, content_hash: str) -> Path:
+        return self.directory / f"v{self.version}-{content_hash}{ENTRY_SUFFIX}"
+
+    def _load(self) -> None:
+        if not self.directory.exists():
+            return
+        for path in self.directory.glob(f"*{ENTRY_SUFFIX}"):
+            try:
+                self._sizes[path] = path.stat().st_size
+            except OSError:
+                continue
+        self._total_bytes = sum(self._sizes.values())
+
+    def _evict_locked(self) -> None:
+        """Delete least recently used entries until the cache is below its target."""
+
+        def last_used(path: Path) -> float:
+            try:
+                return path.stat().st_mtime
+            except OSError:
+                return 0.0
+
+        target = self.max_bytes * EVICTION_TARGET
+        for path in sorted(self._sizes, key=last_used):
+            if self._total_bytes <= target:
+                break
+            self._total_bytes -= self._sizes.pop(path)
+            path.unlink(missing_ok=True)
+            self.evictions += 1
+
+    def _remove(self, path: Path) -> None:
+        path.unlink(missing_ok=True)
+        with self._lock:
+            self._total_bytes -= self._sizes.pop(path, 0)
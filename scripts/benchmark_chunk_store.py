@@ -0,0 +1,121 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Ensure app is in path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__))))
+
+from benchmark_ingest import SEED, environment
+from benchmark_upsert import make_documents, random_embed
+
+from app.db.vector import ChromaVectorStore
+
+
+def directory_bytes(path: str) -> int:
+    return sum(p.stat().st_size for p in Path(path).rglob("*") if p.is_file())
+
+
+def query_latency(
+    store: ChromaVectorStore, queries: np.ndarray, k: int, batch: int
+) -> float:
+    """Median milliseconds per search call of `batch` query vectors."""
+    timings = []
+    for i in range(0, len(queries), batch):
+        start = time.perf_counter()
+        store.similarity_search_by_vectors(queries[i : i + batch], k=k)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Disk footprint and query latency of a local Chroma collection "
+        "holding chunk texts, and of one holding only vectors with the texts in "
+        "the compressed chunk store."
+    )
+    parser.add_argument("--files", type=int, default=400, help="Files to ingest.")
+    parser.add_argument("--chunks-per-file", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=200, help="Timed queries.")
+    parser.add_argument("--k", type=int, default=5, help="Results per query.")
+    parser.add_argument("--output", help="Write JSON results to this file.")
+    args = parser.parse_args()
+
+    documents = make_documents(args.files, args.chunks_per_file)
+    texts = [chunk for chunks in documents.values() for chunk in chunks]
+    metadatas = [
+        {"source": name, "chunk": i}
+        for name, chunks in documents.items()
+        for i in range(len(chunks))
+    ]
+    vectors = random_embed(texts)
+    queries = random_embed(["query"] * args.queries)
+    text_bytes = sum(len(t.encode("utf-8")) for t in texts)
+    print(f"{len(texts)} chunks, {text_bytes / 2**20:.1f} MB of text")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for mode in ("texts in chroma", "chunk store"):
+            root = os.path.join(tmp_dir, mode.replace(" ", "_"))
+            chroma_dir = os.path.join(root, "chroma")
+            chunk_dir = os.path.join(root, "chunks")
+            store = ChromaVectorStore(
+                persist_directory=chroma_dir,
+                chunk_store_dir=chunk_dir if mode == "chunk store" else None,
+            )
+            start = time.perf_counter()
+            for i in range(0, len(texts), 1024):
+                store.add_documents(
+                    texts[i : i + 1024], metadatas[i : i + 1024], vectors[i : i + 1024]
+                )
+            write_seconds = time.perf_counter() - start
+
+            store.similarity_search_by_vectors(queries[:8], k=args.k)  # warm up
+            chroma_bytes = directory_bytes(chroma_dir)
+            chunk_bytes = directory_bytes(chunk_dir) if os.path.exists(chunk_dir) else 0
+            results[mode] = {
+                "chroma_bytes": chroma_bytes,
+                "chunk_store_bytes": chunk_bytes,
+                "total_bytes": chroma_bytes + chunk_bytes,
+                "write_seconds": write_seconds,
+                "query_ms": query_latency(store, queries, args.k, 1),
+                "batch_query_ms": query_latency(store, queries, args.k, 32),
+            }
+
+    print("-" * 72)
+    print(
+        f"{'Mode':<18}{'Chroma MB':>11}{'Chunks MB':>11}{'Total MB':>10}"
+        f"{'Write s':>9}{'Query ms':>10}{'32 q ms':>9}"
+    )
+    for mode, r in results.items():
+        print(
+            f"{mode:<18}{r['chroma_bytes'] / 2**20:>11.1f}"
+            f"{r['chunk_store_bytes'] / 2**20:>11.1f}"
+            f"{r['total_bytes'] / 2**20:>10.1f}{r['write_seconds']:>9.2f}"
+            f"{r['query_ms']:>10.2f}{r['batch_query_ms']:>9.2f}"
+        )
+
+    if args.output:
+        result = {
+            "environment": environment(),
+            "config": {
+                "chunks": len(texts),
+                "text_bytes": text_bytes,
+                "k": args.k,
+                "seed": SEED,
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
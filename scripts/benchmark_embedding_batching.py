@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Ensure app is in path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__))))
+
+from benchmark_ingest import SEED, environment, make_text, make_vocabulary
+
+from app.rag import embeddings
+from app.rag.embedding_batches import plan_batches
+from app.rag.splitter import split_text
+
+# The model's own batching: texts sorted by characters, 32 per batch
+MODEL_BATCH_SIZE = 32
+
+
+def make_mixed_chunks(count: int, short_fraction: float) -> list[str]:
+    """Full-size text chunks interleaved with short ones, like PDF page tails,
+    headings and notes, in a fixed random document order."""
+    rng = random.Random(SEED)
+    vocabulary = make_vocabulary(rng)
+    text = make_text(rng, vocabulary, "", count * 1500)
+    full = iter(split_text(text))
+    chunks = []
+    for _ in range(count):
+        if rng.random() < short_fraction:
+            size = rng.randint(40, 600)
+            start = rng.randrange(len(text) - size)
+            chunks.append(text[start : start + size])
+        else:
+            chunks.append(next(full))
+    return chunks
+
+
+def build_random_model(directory: str, vocabulary: list[str]):
+    """A randomly initialized model of the embedding model's shape (6 layers,
+    384 hidden), so timings are realistic without downloading the weights."""
+    from sentence_transformers import SentenceTransformer
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    vocab_path = os.path.join(directory, "vocab.txt")
+    specials = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    with open(vocab_path, "w") as f:
+        f.write("\n".join(specials + [".", "?", "!"] + sorted(set(vocabulary))))
+    BertTokenizerFast(vocab_file=vocab_path).save_pretrained(directory)
+    config = BertConfig(
+        vocab_size=len(specials) + 3 + len(set(vocabulary)),
+        hidden_size=384,
+        num_hidden_layers=6,
+        num_attention_heads=12,
+        intermediate_size=1536,
+    )
+    BertModel(config).save_pretrained(directory)
+    model = SentenceTransformer(directory, device="cpu")
+    model.max_seq_length = embeddings.MAX_SEQ_TOKENS
+    return model
+
+
+def padded_tokens(lengths: list[int], chars: list[int], batch_tokens: int) -> int:
+    """Tokens the model processes, padding included, for one encode call."""
+    if batch_tokens > 0:
+        batches = plan_batches(lengths, batch_tokens, embeddings.MAX_BATCH_TEXTS)
+    else:
+        order = np.argsort([-c for c in chars], kind="stable")
+        batches = [
+            order[i : i + MODEL_BATCH_SIZE]
+            for i in range(0, len(order), MODEL_BATCH_SIZE)
+        ]
+    return sum(len(batch) * max(lengths[i] for i in batch) for batch in batches)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Embedding throughput on a mixed-length corpus with the model's "
+        "fixed batches and with length-bucketed, token-budgeted batches."
+    )
+    parser.add_argument("--chunks", type=int, default=1024, help="Chunks to embed.")
+    parser.add_argument(
+        "--short-fraction",
+        type=float,
+        default=0.5,
+        help="Share of short (40-600 character) chunks.",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=256, help="Chunks per encode call."
+    )
+    parser.add_argument(
+        "--batch-tokens",
+        type=int,
+        default=embeddings.BATCH_TOKENS,
+        help="Padded-token budget of the bucketed batches.",
+    )
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per mode.")
+    parser.add_argument(
+        "--model",
+        choices=["real", "random"],
+        default="real",
+        help="'random' uses random weights of the same shape; no download needed.",
+    )
+    parser.add_argument("--output", help="Write JSON results to this file.")
+    args = parser.parse_args()
+
+    chunks = make_mixed_chunks(args.chunks, args.short_fraction)
+    with tempfile.TemporaryDirectory() as model_dir:
+        if args.model == "random":
+            model = build_random_model(model_dir, make_vocabulary(random.Random(SEED)))
+            embeddings._get_model = lambda: model
+        model = embeddings._get_model()
+        lengths = embeddings._token_lengths(model, chunks)
+        print(
+            f"{len(chunks)} chunks, {args.model} model; tokens per chunk: "
+            f"median {statistics.median(lengths):.0f}, min {min(lengths)}, "
+            f"max {max(lengths)}"
+        )
+
+        embeddings.encode_locally(chunks[:64], batch_tokens=0)  # warm up
+        modes = {
+            "model batches": 0,
+            "length-bucketed": args.batch_tokens,
+        }
+        results = {}
+        for mode, batch_tokens in modes.items():
+            padded = 0
+            for i in range(0, len(chunks), args.batch_size):
+                batch = slice(i, i + args.batch_size)
+                padded += padded_tokens(
+                    lengths[batch], [len(c) for c in chunks[batch]], batch_tokens
+                )
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                for i in range(0, len(chunks), args.batch_size):
+                    embeddings.encode_locally(
+                        chunks[i : i + args.batch_size], batch_tokens=batch_tokens
+                    )
+                timings.append(time.perf_counter() - start)
+            seconds = statistics.median(timings)
+            results[mode] = {
+                "batch_tokens": batch_tokens,
+                "seconds": seconds,
+                "chunks_per_second": len(chunks) / seconds,
+                "padded_tokens": padded,
+                "padding_share": 1 - sum(lengths) / padded,
+            }
+
+    baseline = results["model batches"]["chunks_per_second"]
+    print("-" * 62)
+    print(f"{'Mode':<18}{'Chunks/s':>10}{'Speedup':>10}{'Padded tokens':>15}{'Pad':>8}")
+    for mode, r in results.items():
+        print(
+            f"{mode:<18}{r['chunks_per_second']:>10.1f}"
+            f"{r['chunks_per_second'] / baseline:>9.2f}x"
+            f"{r['padded_tokens']:>15}{r['padding_share']:>8.0%}"
+        )
+
+    if args.output:
+        result = {
+            "environment": environment(),
+            "config": {
+                "chunks": len(chunks),
+                "short_fraction": args.short_fraction,
+                "batch_size": args.batch_size,
+                "model": args.model,
+                "seed": SEED,
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+# Ensure app is in path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__))))
+
+from benchmark_ingest import (
+    SEED,
+    environment,
+    hash_embed_documents,
+    make_text,
+    make_vocabulary,
+)
+
+from app.rag import embeddings
+from app.rag.embedding_pool import EmbeddingPool
+from app.rag.splitter import split_text
+
+# Elementwise passes per synthetic encode: single-threaded work of a few
+# milliseconds per chunk, so worker scaling is measured without the model
+SYNTHETIC_ROUNDS = 4000
+
+
+def synthetic_encode(texts: list[str]) -> np.ndarray:
+    """CPU-bound stand-in for the model; module-level so pool workers can run it."""
+    vectors = hash_embed_documents(texts)
+    for _ in range(SYNTHETIC_ROUNDS):
+        vectors = np.tanh(vectors * 1.01)
+    return vectors
+
+
+def make_chunks(count: int) -> list[str]:
+    rng = random.Random(SEED)
+    text = make_text(rng, make_vocabulary(rng), "", count * 1200)
+    return split_text(text)[:count]
+
+
+def time_encode(encode, chunks: list[str], batch_size: int) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(chunks), batch_size):
+        encode(chunks[i : i + batch_size])
+    return time.perf_counter() - start
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(
+        description="Chunks/sec of document embedding in-process and on embedding "
+        "pools of 1 to N worker processes."
+    )
+    parser.add_argument(
+        "--workers",
+        default=",".join(str(1 << i) for i in range(cpus.bit_length())),
+        help="Comma-separated pool sizes (default: powers of two up to the CPUs).",
+    )
+    parser.add_argument(
+        "--threads", type=int, default=1, help="Torch threads per worker."
+    )
+    parser.add_argument("--chunks", type=int, default=2048, help="Chunks to embed.")
+    parser.add_argument(
+        "--batch-size", type=int, default=256, help="Chunks per encode call."
+    )
+    parser.add_argument(
+        "--embedder",
+        choices=["model", "synthetic"],
+        default="model",
+        help="'synthetic' needs no model or network.",
+    )
+    parser.add_argument("--output", help="Write JSON results to this file.")
+    args = parser.parse_args()
+
+    encode = embeddings.encode_locally if args.embedder == "model" else synthetic_encode
+    chunks = make_chunks(args.chunks)
+    print(
+        f"{len(chunks)} chunks, {args.embedder} embedder, {cpus} CPUs, "
+        f"{args.threads} thread(s) per worker"
+    )
+
+    encode(chunks[:8])  # warm up
+    baseline = len(chunks) / time_encode(encode, chunks, args.batch_size)
+    rows = [{"workers": 0, "startup_seconds": 0.0, "chunks_per_second": baseline}]
+
+    for workers in (int(w) for w in args.workers.split(",")):
+        pool = EmbeddingPool(workers, args.threads, encode)
+        try:
+            start = time.perf_counter()
+            pool.start()
+            startup = time.perf_counter() - start
+            batch_size = max(args.batch_size, pool.batch_size)
+            seconds = time_encode(pool.encode, chunks, batch_size)
+        finally:
+            pool.shutdown()
+        rows.append(
+            {
+                "workers": workers,
+                "startup_seconds": startup,
+                "chunks_per_second": len(chunks) / seconds,
+            }
+        )
+
+    single = next((r for r in rows if r["workers"] == 1), rows[0])
+    print("-" * 62)
+    print(
+        f"{'Workers':<14}{'Startup (s)':>12}{'Chunks/s':>12}{'Speedup':>10}{'Eff.':>8}"
+    )
+    for row in rows:
+        speedup = row["chunks_per_second"] / single["chunks_per_second"]
+        row["speedup"] = speedup
+        label = str(row["workers"]) if row["workers"] else "in-process"
+        efficiency = f"{speedup / row['workers']:.0%}" if row["workers"] else "-"
+        print(
+            f"{label:<14}{row['startup_seconds']:>12.2f}"
+            f"{row['chunks_per_second']:>12.1f}{speedup:>9.2f}x{efficiency:>8}"
+        )
+
+    if args.output:
+        result = {
+            "environment": environment(),
+            "config": {
+                "chunks": len(chunks),
+                "embedder": args.embedder,
+                "threads_per_worker": args.threads,
+                "batch_size": args.batch_size,
+            },
+            "runs": rows,
+        }
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
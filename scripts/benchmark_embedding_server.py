@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+# Ensure app is in path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__))))
+
+from benchmark_vector_store import EVAL_SET_PATH
+
+from app.core.config import Settings
+from app.rag.embedding_server import EmbeddingClient, EmbeddingServer
+
+# Cold-start probe: first query embedding in a fresh process, then its peak RSS
+COLD_START_CODE = """
+import resource, sys, time
+start = time.perf_counter()
+from app.rag import embeddings
+embeddings.configure_server(sys.argv[1] or None)
+embeddings.embed_query("warm up")
+print(time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+"""
+
+
+def run_load(encode_one, texts: list[str], clients: int, requests: int) -> dict:
+    """Issue single-text encodes from concurrent client threads."""
+    latencies: list[float] = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients)
+
+    def client(offset: int) -> None:
+        barrier.wait()
+        local = []
+        for i in range(requests):
+            start = time.perf_counter()
+            encode_one(texts[(offset + i) % len(texts)])
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "qps": len(latencies) / elapsed,
+    }
+
+
+def serve_and_load(
+    socket_path: str, encode, texts: list[str], args, **server_kwargs
+) -> dict:
+    server = EmbeddingServer(socket_path, encode, **server_kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    while not os.path.exists(socket_path):
+        time.sleep(0.01)
+    try:
+        client = EmbeddingClient(socket_path)
+        result = run_load(
+            lambda t: client.encode([t]), texts, args.clients, args.requests
+        )
+        result["avg_batch"] = server.requests / max(1, server.batches)
+        return result
+    finally:
+        server.shutdown()
+
+
+def cold_start(socket_path: str) -> tuple[float, float]:
+    output = subprocess.run(
+        [sys.executable, "-c", COLD_START_CODE, socket_path],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ).stdout
+    seconds, rss_mb = output.split()
+    return float(seconds), float(rss_mb)
+
+
+def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser(
+        description="Latency of concurrent query embeddings with and without the "
+        "micro-batching embedding server."
+    )
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent clients.")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per client.")
+    parser.add_argument(
+        "--max-wait-ms",
+        type=float,
+        default=settings.EMBEDDING_SERVER_MAX_WAIT_MS,
+        help="Batching window of the batched server.",
+    )
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    from app.rag.embeddings import MODEL_NAME
+
+    with open(EVAL_SET_PATH) as f:
+        texts = [item["question"] for item in json.load(f)]
+    model = SentenceTransformer(MODEL_NAME)
+
+    def encode(batch: list[str]) -> np.ndarray:
+        return np.asarray(model.encode(batch))
+
+    encode(texts)  # warm up
+
+    print(f"{args.clients} clients x {args.requests} single-query encodes")
+    results = {
+        "in-process": run_load(
+            lambda t: encode([t]), texts, args.clients, args.requests
+        )
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        socket_path = os.path.join(tmp_dir, "embed.sock")
+        results["server, no batching"] = serve_and_load(
+            socket_path, encode, texts, args, max_batch_size=1, max_wait_ms=0
+        )
+        results["server, batching"] = serve_and_load(
+            socket_path,
+            encode,
+            texts,
+            args,
+            max_batch_size=settings.EMBEDDING_SERVER_MAX_BATCH,
+            max_wait_ms=args.max_wait_ms,
+        )
+
+        print("-" * 66)
+        print(
+            f"{'Mode':<22}{'p50 (ms)':>10}{'p99 (ms)':>10}{'q/s':>10}{'Avg batch':>12}"
+        )
+        for mode, r in results.items():
+            avg_batch = f"{r['avg_batch']:.1f}" if "avg_batch" in r else "-"
+            print(
+                f"{mode:<22}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+                f"{r['qps']:>10.1f}{avg_batch:>12}"
+            )
+
+        # Cold start of a fresh client process, with the model loaded locally or
+        # borrowed from a running server
+        server = EmbeddingServer(socket_path, encode)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        while not os.path.exists(socket_path):
+            time.sleep(0.01)
+        local_s, local_rss = cold_start("")
+        served_s, served_rss = cold_start(socket_path)
+        server.shutdown()
+
+    print("-" * 66)
+    print(f"Cold start, local model:  {local_s:6.2f}s, peak RSS {local_rss:7.1f} MB")
+    print(f"Cold start, via server:   {served_s:6.2f}s, peak RSS {served_rss:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Ensure app is in path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__))))
+
+from benchmark_ingest import environment, hash_embed_documents
+from benchmark_vector_store import EVAL_SET_PATH
+
+from app.core.config import Settings
+from app.rag import embeddings
+from app.rag.service import RAGService
+
+MODES = ["vector", "keyword", "hybrid"]
+
+
+def found_keyword(texts: list[str], item: dict) -> bool:
+    """An expected keyword in the top results, as in tests/test_rag_evaluation.py."""
+    combined = " ".join(texts).lower()
+    return any(kw.lower() in combined for kw in item["expected_keywords"])
+
+
+def evaluate(service: RAGService, mode: str, questions: list[dict], k: int) -> dict:
+    service.settings.RETRIEVAL_MODE = "hybrid" if mode == "hybrid" else "vector"
+    search = service.keyword_search if mode == "keyword" else service.retrieve
+    latencies = []
+    successes: dict[str, list[bool]] = {}
+    for item in questions:
+        start = time.perf_counter()
+        results = search(item["question"], k=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        question_type = item.get("question_type", "factual")
+        successes.setdefault(question_type, []).append(
+            found_keyword([text for text, _, _ in results], item)
+        )
+
+    all_successes = [s for group in successes.values() for s in group]
+    return {
+        "accuracy": sum(all_successes) / len(all_successes),
+        "accuracy_by_type": {
+            question_type: sum(group) / len(group)
+            for question_type, group in successes.items()
+        },
+        "median_ms": statistics.median(latencies),
+        "p95_ms": sorted(latencies)[int(len(latencies) * 0.95)],
+    }
+
+
+def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser(
+        description="Evaluation-set accuracy by question type and retrieval latency "
+        "of vector search, BM25 keyword search and their hybrid (RRF) fusion."
+    )
+    parser.add_argument(
+        "--corpus", default=settings.CORPUS_DIR, help="Corpus directory."
+    )
+    parser.add_argument("--k", type=int, default=5, help="Results per question.")
+    parser.add_argument(
+        "--embedder",
+        choices=["model", "hash"],
+        default="model",
+        help="'hash' uses bag-of-words vectors; no model download needed.",
+    )
+    parser.add_argument("--output", help="Write JSON results to this file.")
+    args = parser.parse_args()
+
+    if args.embedder == "hash":
+        embeddings.embed_documents = hash_embed_documents
+        embeddings.embed_query = lambda text: hash_embed_documents([text])[0]
+
+    with open(EVAL_SET_PATH) as f:
+        questions = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        service = RAGService(
+            settings=Settings(
+                VECTOR_BACKEND="mmap",
+                MMAP_INDEX_DIR=os.path.join(tmp_dir, "index"),
+                KEYWORD_INDEX_DIR=os.path.join(tmp_dir, "keywords"),
+                INGEST_MANIFEST_PATH=None,
+                INGEST_CHECKPOINT_DB=None,
+                RETRIEVAL_CACHE_SIZE=0,
+            )
+        )
+        start = time.perf_counter()
+        chunks = sum(result.chunks for result in service.ingest_directory(args.corpus))
+        print(
+            f"Ingested {chunks} chunks from {args.corpus} in "
+            f"{time.perf_counter() - start:.1f}s"
+        )
+        service.warm_up()
+
+        results = {mode: evaluate(service, mode, questions, args.k) for mode in MODES}
+
+    types = sorted({t for r in results.values() for t in r["accuracy_by_type"]})
+    print("-" * (30 + 14 * len(types)))
+    print(
+        f"{'Mode':<10}{'Accuracy':>10}"
+        + "".join(f"{t.capitalize():>14}" for t in types)
+        + f"{'p50 ms':>10}{'p95 ms':>10}"
+    )
+    for mode, r in results.items():
+        print(
+            f"{mode:<10}{r['accuracy']:>10.1%}"
+            + "".join(f"{r['accuracy_by_type'].get(t, 0):>14.1%}" for t in types)
+            + f"{r['median_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+        )
+
+    if args.output:
+        result = {
+            "environment": environment(),
+            "config": {
+                "corpus": args.corpus,
+                "chunks": chunks,
+                "k": args.k,
+                "embedder": args.embedder,
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
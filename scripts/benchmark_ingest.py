@@ -0,0 +1,294 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import zlib
+from datetime import UTC, datetime
+from pathlib import Path
+
+import numpy as np
+
+# Ensure app is in path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.config import Settings
+from app.rag import embeddings
+from app.rag.ingest_profile import IngestProfile
+from app.rag.service import RAGService
+
+ROOT = Path(__file__).resolve().parent.parent
+SEED = 1234
+HASH_DIMENSIONS = 384
+
+# (txt files, KiB per txt file, pdf files, pages per pdf); every corpus is
+# generated from SEED, so runs on any machine or commit ingest identical input
+CORPORA = {
+    "small": (8, 200, 2, 40),
+    "medium": (24, 500, 4, 120),
+    "large": (48, 1000, 8, 240),
+}
+# Shared by every synthetic document, like a Gutenberg license header, so the
+# dedup stage has duplicates to find
+BOILERPLATE_PARAGRAPHS = 3
+LINES_PER_PAGE = 40
+WORDS_PER_LINE = 12
+
+SYLLABLES = [
+    "ka", "lo", "mi", "ren", "sta", "tor", "vel", "qui", "an", "ber",
+    "cor", "dun", "eth", "fal", "gor", "hin", "is", "jor", "mar", "nel",
+]  # fmt: skip
+
+
+def make_vocabulary(rng: random.Random, size: int = 4000) -> list[str]:
+    return ["".join(rng.choices(SYLLABLES, k=rng.randint(1, 4))) for _ in range(size)]
+
+
+def make_sentence(rng: random.Random, vocabulary: list[str]) -> str:
+    words = rng.choices(vocabulary, k=rng.randint(6, 24))
+    return " ".join(words).capitalize() + rng.choice([".", ".", ".", "?", "!"])
+
+
+def make_paragraph(rng: random.Random, vocabulary: list[str]) -> str:
+    sentences = [make_sentence(rng, vocabulary) for _ in range(rng.randint(3, 9))]
+    # Hard-wrapped like the corpus text files, so cleaning has lines to unwrap
+    words = " ".join(sentences).split(" ")
+    return "\n".join(
+        " ".join(words[i : i + WORDS_PER_LINE])
+        for i in range(0, len(words), WORDS_PER_LINE)
+    )
+
+
+def make_text(
+    rng: random.Random, vocabulary: list[str], boilerplate: str, size_bytes: int
+) -> str:
+    paragraphs = [boilerplate]
+    size = len(boilerplate)
+    while size < size_bytes:
+        paragraph = make_paragraph(rng, vocabulary)
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+    paragraphs.append(boilerplate)
+    return "\n\n".join(paragraphs)
+
+
+def make_pdf(pages: list[list[str]]) -> bytes:
+    """Build a PDF with the given lines of Helvetica text on each page."""
+    objects: list[bytes | None] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for lines in pages:
+        shown = b" T* ".join(b"(%s) Tj" % line.encode("latin-1") for line in lines)
+        stream = b"BT /F1 10 Tf 12 TL 40 760 Td %s ET" % shown
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /Resources << /Font << /F1 3 0 R >> >> "
+            b"/MediaBox [0 0 612 792] /Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(kids),
+        len(kids),
+    )
+
+    pdf = b"%PDF-1.1\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    return pdf
+
+
+def write_synthetic_corpus(name: str, directory: Path) -> None:
+    txt_files, txt_kib, pdf_files, pdf_pages = CORPORA[name]
+    rng = random.Random(SEED)
+    vocabulary = make_vocabulary(rng)
+    boilerplate = "\n\n".join(
+        make_paragraph(rng, vocabulary) for _ in range(BOILERPLATE_PARAGRAPHS)
+    )
+    directory.mkdir(parents=True, exist_ok=True)
+
+    for i in range(txt_files):
+        text = make_text(rng, vocabulary, boilerplate, txt_kib * 1024)
+        (directory / f"synthetic_{i:03d}.txt").write_text(text, encoding="utf-8")
+
+    for i in range(pdf_files):
+        pages = []
+        for _ in range(pdf_pages):
+            words = rng.choices(vocabulary, k=LINES_PER_PAGE * WORDS_PER_LINE)
+            pages.append(
+                [
+                    " ".join(words[j : j + WORDS_PER_LINE])
+                    for j in range(0, len(words), WORDS_PER_LINE)
+                ]
+            )
+        (directory / f"synthetic_{i:03d}.pdf").write_bytes(make_pdf(pages))
+
+
+def hash_embed_documents(texts: list[str]) -> np.ndarray:
+    """Deterministic bag-of-words vectors, so the benchmark runs without the
+    embedding model (or network to download it)."""
+    vectors = np.zeros((len(texts), HASH_DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.lower().split():
+            vectors[row, zlib.crc32(word.encode("utf-8")) % HASH_DIMENSIONS] += 1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> dict:
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+        "hostname": platform.node(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+    }
+
+
+def run_once(corpus_dir: Path, args: argparse.Namespace) -> dict:
+    """Ingest the corpus into scratch stores and return its stage profile."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        settings = Settings(
+            VECTOR_BACKEND=args.backend,
+            MMAP_INDEX_DIR=os.path.join(tmp_dir, "mmap"),
+            CHROMA_DB_DIR=os.path.join(tmp_dir, "chroma"),
+            CHROMA_HOST=None,
+            SPLITTER_MODE=args.splitter,
+            INGEST_MANIFEST_PATH=None,
+            INGEST_CHECKPOINT_DB=None,
+            TEXT_CACHE_DIR=None,
+            DEDUP_INDEX_DIR=None if args.no_dedup else os.path.join(tmp_dir, "dedup"),
+            EMBEDDING_CACHE_DIR=None,
+            EMBEDDING_SERVER_SOCKET=None,
+            RETRIEVAL_CACHE_SIZE=0,
+        )
+        service = RAGService(settings=settings)
+        service.ingest_profile = profile = IngestProfile()
+        results = list(service.ingest_directory(str(corpus_dir)))
+        profile.finish()
+        print(profile.report())
+
+        return {
+            "files": len(results),
+            "chunks": sum(result.chunks for result in results),
+            "suppressed": sum(result.suppressed for result in results),
+            **profile.to_dict(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Profile directory ingestion stage by stage and write JSON "
+        "results for comparison across commits and hardware."
+    )
+    parser.add_argument(
+        "--corpus",
+        default="small",
+        help=f"Synthetic corpus ({', '.join(CORPORA)}) or a corpus directory.",
+    )
+    parser.add_argument("--runs", type=int, default=3, help="Ingest runs to time.")
+    parser.add_argument(
+        "--embedder",
+        choices=["hash", "model"],
+        default="hash",
+        help="'hash' needs no model or network; 'model' times the real embedder.",
+    )
+    parser.add_argument("--backend", choices=["mmap", "chroma"], default="mmap")
+    parser.add_argument(
+        "--splitter", choices=["characters", "tokens"], default="characters"
+    )
+    parser.add_argument("--no-dedup", action="store_true", help="Skip dedup.")
+    parser.add_argument("--output", help="Write JSON results to this file.")
+    args = parser.parse_args()
+
+    if args.embedder == "hash":
+        embeddings.embed_documents = hash_embed_documents
+    else:
+        embeddings.embed_documents(["warm up"])  # load outside the timed runs
+
+    with tempfile.TemporaryDirectory() as corpus_tmp:
+        if args.corpus in CORPORA:
+            corpus_dir = Path(corpus_tmp) / args.corpus
+            write_synthetic_corpus(args.corpus, corpus_dir)
+        else:
+            corpus_dir = Path(args.corpus)
+        files = [
+            f for f in corpus_dir.iterdir() if f.suffix.lower() in (".txt", ".pdf")
+        ]
+        corpus_bytes = sum(f.stat().st_size for f in files)
+        print(
+            f"Corpus '{args.corpus}': {len(files)} files, "
+            f"{corpus_bytes / 2**20:.1f} MB; {args.runs} runs, "
+            f"{args.embedder} embedder, {args.backend} backend"
+        )
+
+        runs = []
+        for i in range(args.runs):
+            print(f"\nRun {i + 1}/{args.runs}")
+            runs.append(run_once(corpus_dir, args))
+
+    totals = [run["total_seconds"] for run in runs]
+    median = statistics.median(totals)
+    print("-" * 78)
+    print(
+        f"Median total: {median:.2f}s "
+        f"({corpus_bytes / 2**20 / median:.1f} MB/s, "
+        f"{runs[0]['chunks'] / median:.1f} chunks/s)"
+    )
+
+    if args.output:
+        result = {
+            "environment": environment(),
+            "config": {
+                "corpus": args.corpus,
+                "seed": SEED if args.corpus in CORPORA else None,
+                "files": len(files),
+                "corpus_bytes": corpus_bytes,
+                "embedder": args.embedder,
+                "backend": args.backend,
+                "splitter": args.splitter,
+                "dedup": not args.no_dedup,
+            },
+            "median_total_seconds": median,
+            "runs": runs,
+        }
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
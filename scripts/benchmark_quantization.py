@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import cast
+
+import numpy as np
+
+# Ensure app is in path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__))))
+
+from benchmark_vector_store import (
+    EVAL_SET_PATH,
+    QUERY_REPEATS,
+    create_chroma_store,
+    current_rss_mb,
+)
+
+from app.core.config import Settings
+from app.db.mmap_store import MmapVectorStore
+from app.db.quantization import QuantizationMode
+
+CONFIGS = ["chroma", "none", "int8", "binary"]
+ACCURACY_K = 5
+
+
+def run_worker(config: str, queries_path: str, k: int, multiplier: int) -> None:
+    """Load one configuration, run the queries and print a JSON result line."""
+    settings = Settings()
+    queries = np.load(queries_path)
+    baseline_rss = current_rss_mb()
+
+    if config == "chroma":
+        store = create_chroma_store(settings)
+        index_bytes = None
+    else:
+        mmap_store = MmapVectorStore(
+            index_directory=settings.MMAP_INDEX_DIR,
+            quantization=cast(QuantizationMode, config),
+            rescore_multiplier=multiplier,
+        )
+        store = mmap_store
+        index_bytes = mmap_store.index_nbytes
+
+    results = [store.similarity_search_by_vector(q.tolist(), k=k) for q in queries]
+
+    latencies = []
+    for _ in range(QUERY_REPEATS):
+        for query in queries:
+            start = time.perf_counter()
+            store.similarity_search_by_vector(query.tolist(), k=k)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    print(
+        json.dumps(
+            {
+                "config": config,
+                "texts": [[text for text, _, _ in r] for r in results],
+                "p50_ms": round(statistics.median(latencies), 3),
+                "p95_ms": round(latencies[int(len(latencies) * 0.95)], 3),
+                "index_mb": None if index_bytes is None else index_bytes / 2**20,
+                "rss_mb": round(current_rss_mb() - baseline_rss, 1),
+            }
+        )
+    )
+
+
+def recall(results: list[list[str]], reference: list[list[str]]) -> float:
+    hits = sum(len(set(r) & set(ref)) for r, ref in zip(results, reference))
+    return hits / max(1, sum(len(ref) for ref in reference))
+
+
+def keyword_accuracy(results: list[list[str]], questions: list[dict]) -> float:
+    """Share of questions with an expected keyword in the top results, as in
+    tests/test_rag_evaluation.py."""
+    successes = 0
+    for texts, item in zip(results, questions):
+        combined = " ".join(texts[:ACCURACY_K]).lower()
+        if any(kw.lower() in combined for kw in item["expected_keywords"]):
+            successes += 1
+    return successes / max(1, len(questions))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare quantized mmap search against exact mmap and Chroma."
+    )
+    parser.add_argument("--k", type=int, default=10, help="Results per query.")
+    parser.add_argument(
+        "--rescore-multiplier",
+        type=int,
+        default=Settings.model_fields["QUANTIZATION_RESCORE_MULTIPLIER"].default,
+        help="Shortlist size as a multiple of k for float rescoring.",
+    )
+    parser.add_argument("--worker", choices=CONFIGS, help=argparse.SUPPRESS)
+    parser.add_argument("--queries", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.queries, args.k, args.rescore_multiplier)
+        return
+
+    from app.rag import embeddings
+
+    with open(EVAL_SET_PATH) as f:
+        questions = json.load(f)
+    queries = np.asarray(
+        [embeddings.embed_query(item["question"]) for item in questions], dtype="<f4"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        queries_path = os.path.join(tmp_dir, "queries.npy")
+        np.save(queries_path, queries)
+
+        # Fresh process per configuration so RSS reflects only that index
+        results = {}
+        for config in CONFIGS:
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--worker",
+                    config,
+                    "--queries",
+                    queries_path,
+                    "--k",
+                    str(args.k),
+                    "--rescore-multiplier",
+                    str(args.rescore_multiplier),
+                ],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            results[config] = json.loads(output.strip().splitlines()[-1])
+
+    # Exact float search over the same index is the recall reference
+    reference = results["none"]["texts"]
+    print(f"{len(questions)} queries, k={args.k}, rescore x{args.rescore_multiplier}")
+    print("-" * 78)
+    print(
+        f"{'Config':<10}{f'Recall@{args.k}':>11}{'Accuracy':>10}{'p50 (ms)':>10}"
+        f"{'p95 (ms)':>10}{'Index (MB)':>12}{'RSS (MB)':>10}"
+    )
+    for config, r in results.items():
+        index_mb = "-" if r["index_mb"] is None else f"{r['index_mb']:.2f}"
+        print(
+            f"{config:<10}{recall(r['texts'], reference):>11.3f}"
+            f"{keyword_accuracy(r['texts'], questions):>10.1%}"
+            f"{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{index_mb:>12}"
+            f"{r['rss_mb']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Ensure app is in path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__))))
+
+from benchmark_quantization import keyword_accuracy
+from benchmark_vector_store import EVAL_SET_PATH
+
+from app.core.config import Settings
+from app.rag import embeddings
+from app.rag.loader import load_document
+from app.rag.service import DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_SIZE, RAGService
+from app.rag.splitter import split_text, split_text_by_tokens
+
+MODES = ["characters", "tokens"]
+
+
+def chunk_documents(mode: str, texts: list[str], settings: Settings) -> list[str]:
+    if mode == "characters":
+        return [
+            chunk
+            for text in texts
+            for chunk in split_text(text, DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP)
+        ]
+    tokenizer = embeddings.get_tokenizer()
+    return [
+        text[span.start : span.end]
+        for text in texts
+        for span in split_text_by_tokens(
+            text, tokenizer, settings.CHUNK_TOKENS, settings.CHUNK_OVERLAP_TOKENS
+        )
+    ]
+
+
+def chunk_stats(chunks: list[str]) -> tuple[float, float]:
+    """Mean model tokens per chunk and share of tokens the model truncates away."""
+    tokenizer = embeddings.get_tokenizer()
+    budget = embeddings.MAX_SEQ_TOKENS - embeddings.SPECIAL_TOKEN_COUNT
+    counts = [
+        len(ids)
+        for ids in tokenizer(chunks, add_special_tokens=False, verbose=False)[
+            "input_ids"
+        ]
+    ]
+    truncated = sum(max(0, count - budget) for count in counts)
+    return sum(counts) / max(1, len(counts)), truncated / max(1, sum(counts))
+
+
+def retrieval_accuracy(mode: str, corpus_dir: str, questions: list[dict], k: int):
+    """Ingest the corpus into a scratch mmap index with this splitter and score it."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        settings = Settings(
+            VECTOR_BACKEND="mmap",
+            MMAP_INDEX_DIR=tmp_dir,
+            SPLITTER_MODE=mode,
+            INGEST_MANIFEST_PATH=None,
+            RETRIEVAL_CACHE_SIZE=0,
+        )
+        service = RAGService(settings=settings)
+        start = time.perf_counter()
+        for _ in service.ingest_directory(corpus_dir):
+            pass
+        ingest_seconds = time.perf_counter() - start
+
+        results = service.retrieve_many([item["question"] for item in questions], k=k)
+        texts = [[text for text, _, _ in result] for result in results]
+        return keyword_accuracy(texts, questions), ingest_seconds
+
+
+def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser(
+        description="Compare the character and token splitters on chunking "
+        "throughput and retrieval accuracy."
+    )
+    parser.add_argument(
+        "--corpus", default=settings.CORPUS_LARGE_DIR, help="Corpus directory."
+    )
+    parser.add_argument("--k", type=int, default=5, help="Results per question.")
+    parser.add_argument(
+        "--skip-retrieval",
+        action="store_true",
+        help="Only measure chunking; retrieval re-embeds the corpus per mode.",
+    )
+    args = parser.parse_args()
+
+    paths = sorted(
+        os.path.join(args.corpus, name)
+        for name in os.listdir(args.corpus)
+        if name.lower().endswith((".txt", ".pdf"))
+    )
+    texts = [load_document(path) for path in paths]
+    total_chars = sum(len(text) for text in texts)
+    embeddings.get_tokenizer()  # load outside the timed region
+
+    with open(EVAL_SET_PATH) as f:
+        questions = json.load(f)
+
+    print(f"{len(paths)} documents, {total_chars / 1e6:.1f}M characters")
+    print("-" * 89)
+    print(
+        f"{'Splitter':<12}{'Chunks':>9}{'Mchar/s':>9}{'Tokens/chunk':>14}"
+        f"{'Truncated':>11}{'Accuracy':>10}{'Ingest (s)':>12}"
+    )
+    for mode in MODES:
+        start = time.perf_counter()
+        chunks = chunk_documents(mode, texts, settings)
+        seconds = time.perf_counter() - start
+        mean_tokens, truncated = chunk_stats(chunks)
+
+        accuracy, ingest = "-", "-"
+        if not args.skip_retrieval:
+            score, ingest_seconds = retrieval_accuracy(
+                mode, args.corpus, questions, args.k
+            )
+            accuracy, ingest = f"{score:.1%}", f"{ingest_seconds:.1f}"
+        print(
+            f"{mode:<12}{len(chunks):>9}{total_chars / 1e6 / seconds:>9.1f}"
+            f"{mean_tokens:>14.1f}{truncated:>11.1%}{accuracy:>10}{ingest:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+# Ensure app is in path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__))))
+
+from benchmark_ingest import SEED, environment, make_paragraph, make_vocabulary
+
+from app.db.vector import ChromaVectorStore
+from app.rag.pipeline import IngestionPipeline, PreparedDocument
+
+DIMENSIONS = 384
+
+
+def make_documents(files: int, chunks_per_file: int) -> dict[str, list[str]]:
+    """Small files of ~1500-character chunks, the case that used to cost one
+    upsert round trip per file."""
+    rng = random.Random(SEED)
+    vocabulary = make_vocabulary(rng)
+    documents = {}
+    for i in range(files):
+        chunks = []
+        for _ in range(chunks_per_file):
+            chunk = ""
+            while len(chunk) < 1500:
+                chunk += make_paragraph(rng, vocabulary) + " "
+            chunks.append(chunk[:1500])
+        documents[f"synthetic_{i:04d}.txt"] = chunks
+    return documents
+
+
+def random_embed(texts: list[str]) -> np.ndarray:
+    vectors = np.random.default_rng(len(texts)).standard_normal(
+        (len(texts), DIMENSIONS), dtype=np.float32
+    )
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def run_once(
+    store: ChromaVectorStore,
+    documents: dict[str, list[str]],
+    embed_batch_size: int,
+    write_concurrency: int,
+) -> float:
+    """Ingest the documents through the pipeline; returns upserted chunks/sec."""
+    pipeline = IngestionPipeline(
+        prepare=lambda path: PreparedDocument(
+            documents[Path(path).name], len(documents[Path(path).name])
+        ),
+        embed=random_embed,
+        vector_store=store,
+        embed_batch_size=embed_batch_size,
+        write_concurrency=write_concurrency,
+    )
+    start = time.perf_counter()
+    chunks = sum(result.chunks for result in pipeline.run(list(map(Path, documents))))
+    return chunks / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Upsert throughput of directory ingestion into Chroma, local "
+        "persistent and over HTTP, by batch size and upserts in flight."
+    )
+    parser.add_argument("--files", type=int, default=400, help="Files to ingest.")
+    parser.add_argument("--chunks-per-file", type=int, default=25)
+    parser.add_argument(
+        "--batch-sizes", default="64,256,1024", help="Chunks per upsert batch."
+    )
+    parser.add_argument(
+        "--concurrency", default="1,2,4,8", help="HTTP upserts in flight."
+    )
+    parser.add_argument(
+        "--host", help="Chroma server for HTTP mode (skipped if unset)."
+    )
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--output", help="Write JSON results to this file.")
+    args = parser.parse_args()
+
+    documents = make_documents(args.files, args.chunks_per_file)
+    total = args.files * args.chunks_per_file
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+    print(f"{args.files} files, {total} chunks")
+
+    runs = []
+
+    def record(mode: str, batch_size: int, concurrency: int, make_store) -> None:
+        collection = f"benchmark_upsert_{uuid.uuid4().hex[:8]}"
+        store = make_store(collection, batch_size)
+        try:
+            rate = run_once(store, documents, batch_size, concurrency)
+        finally:
+            store.client.delete_collection(collection)
+        runs.append(
+            {
+                "mode": mode,
+                "batch_size": batch_size,
+                "concurrency": concurrency,
+                "chunks_per_second": rate,
+            }
+        )
+        print(f"{mode:<8}{batch_size:>8}{concurrency:>8}{rate:>14.1f}")
+
+    print(f"{'Mode':<8}{'Batch':>8}{'Flight':>8}{'Chunks/s':>14}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for batch_size in batch_sizes:
+            record(
+                "local",
+                batch_size,
+                1,
+                lambda name, size: ChromaVectorStore(
+                    persist_directory=tmp_dir,
+                    collection_name=name,
+                    upsert_batch_size=size,
+                ),
+            )
+
+    if args.host:
+        for batch_size in batch_sizes:
+            for concurrency in (int(c) for c in args.concurrency.split(",")):
+                record(
+                    "http",
+                    batch_size,
+                    concurrency,
+                    lambda name, size: ChromaVectorStore(
+                        host=args.host,
+                        port=args.port,
+                        collection_name=name,
+                        upsert_batch_size=size,
+                    ),
+                )
+
+    if args.output:
+        result = {
+            "environment": environment(),
+            "config": {"files": args.files, "chunks": total, "seed": SEED},
+            "runs": runs,
+        }
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Ensure app is in path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.config import Settings
+from app.db.mmap_store import MmapVectorStore
+from app.db.vector import ChromaVectorStore
+
+EVAL_SET_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "tests", "data", "evaluation_set.json"
+)
+EXPORT_BATCH_SIZE = 2000
+QUERY_REPEATS = 5
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        # ru_maxrss is KiB on Linux (peak rather than current elsewhere)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def create_chroma_store(settings: Settings) -> ChromaVectorStore:
+    use_http_mode = settings.CHROMA_HOST is not None
+    return ChromaVectorStore(
+        persist_directory=None if use_http_mode else settings.CHROMA_DB_DIR,
+        host=settings.CHROMA_HOST,
+        port=settings.CHROMA_PORT,
+    )
+
+
+def export_chroma_to_mmap(settings: Settings) -> None:
+    """Copy every chunk and its stored embedding from Chroma into the mmap index."""
+    chroma = create_chroma_store(settings)
+    collection = chroma.client.get_or_create_collection(name=chroma.collection_name)
+    target = MmapVectorStore(index_directory=settings.MMAP_INDEX_DIR)
+
+    total = collection.count()
+    print(f"Exporting {total} chunks to {target.directory}...")
+    for offset in range(0, total, EXPORT_BATCH_SIZE):
+        batch = collection.get(
+            include=["embeddings", "documents", "metadatas"],
+            limit=EXPORT_BATCH_SIZE,
+            offset=offset,
+        )
+        target.add_documents(
+            texts=[doc or "" for doc in batch["documents"] or []],
+            metadatas=batch["metadatas"],
+            doc_embeddings=np.asarray(batch["embeddings"]).tolist(),
+        )
+        print(f"  {min(offset + EXPORT_BATCH_SIZE, total)}/{total}", flush=True)
+
+
+def run_worker(backend: str, queries_path: str, k: int) -> None:
+    """Load one backend, run the queries and print a JSON result line."""
+    settings = Settings()
+    queries = np.load(queries_path)
+    # Baseline excludes interpreter, torch and chromadb imports shared by both backends
+    baseline_rss = current_rss_mb()
+
+    start = time.perf_counter()
+    store = (
+        MmapVectorStore(index_directory=settings.MMAP_INDEX_DIR)
+        if backend == "mmap"
+        else create_chroma_store(settings)
+    )
+    store.similarity_search_by_vector(queries[0].tolist(), k=k)
+    load_seconds = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(QUERY_REPEATS):
+        for query in queries:
+            start = time.perf_counter()
+            store.similarity_search_by_vector(query.tolist(), k=k)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+
+    # All queries in one batched call
+    start = time.perf_counter()
+    for _ in range(QUERY_REPEATS):
+        store.similarity_search_by_vectors(queries.tolist(), k=k)
+    batch_seconds = time.perf_counter() - start
+
+    print(
+        json.dumps(
+            {
+                "backend": backend,
+                "queries": len(latencies),
+                "load_s": round(load_seconds, 3),
+                "p50_ms": round(statistics.median(latencies), 3),
+                "p95_ms": round(latencies[int(len(latencies) * 0.95)], 3),
+                "qps": round(len(latencies) / (sum(latencies) / 1000), 1),
+                "batch_qps": round(len(latencies) / batch_seconds, 1),
+                "index_rss_mb": round(current_rss_mb() - baseline_rss, 1),
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Chroma and memory-mapped vector backends."
+    )
+    parser.add_argument(
+        "--build",
+        action="store_true",
+        help="Export the Chroma collection into the mmap index before benchmarking.",
+    )
+    parser.add_argument("--k", type=int, default=10, help="Results per query.")
+    parser.add_argument("--worker", choices=["chroma", "mmap"], help=argparse.SUPPRESS)
+    parser.add_argument("--queries", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.queries, args.k)
+        return
+
+    settings = Settings()
+    if args.build:
+        export_chroma_to_mmap(settings)
+
+    from app.rag import embeddings
+
+    with open(EVAL_SET_PATH) as f:
+        questions = [item["question"] for item in json.load(f)]
+    queries = np.asarray([embeddings.embed_query(q) for q in questions], dtype="<f4")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        queries_path = os.path.join(tmp_dir, "queries.npy")
+        np.save(queries_path, queries)
+
+        # Each backend runs in a fresh process so RSS reflects only that backend
+        results = []
+        for backend in ("chroma", "mmap"):
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--worker",
+                    backend,
+                    "--queries",
+                    queries_path,
+                    "--k",
+                    str(args.k),
+                ],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print("-" * 90)
+    print(
+        f"{'Backend':<10}{'Load (s)':>10}{'p50 (ms)':>12}{'p95 (ms)':>12}"
+        f"{'q/s':>10}{'Batch q/s':>12}{'Index RSS (MB)':>16}"
+    )
+    for r in results:
+        print(
+            f"{r['backend']:<10}{r['load_s']:>10.3f}{r['p50_ms']:>12.3f}"
+            f"{r['p95_ms']:>12.3f}{r['qps']:>10.1f}{r['batch_qps']:>12.1f}"
+            f"{r['index_rss_mb']:>16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__))))
 
 from app.rag.service import RAGService
 from app.cli import ingest_directory_with_report
+from app.rag.ingest_profile import IngestProfile
 from app.core.config import Settings
 
 
@@ -17,6 +18,16 @@ def main():
         action="store_true",
         help="Use the large corpus directory instead of the default.",
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the last interrupted ingest of this corpus from its checkpoint.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print a per-stage timing breakdown (see scripts/benchmark_ingest.py).",
+    )
     args = parser.parse_args()
 
     print("Initializing RAG Service...")
@@ -35,7 +46,12 @@ def main():
     # Let's assume CWD is project root or we might need to adjust if the user runs it from elsewhere.
     # Given the "dry" instruction, relying on Settings is better than hardcoding paths again.
 
-    ingest_directory_with_report(service, target_dir)
+    ingest_directory_with_report(
+        service,
+        target_dir,
+        resume=args.resume,
+        profile=IngestProfile() if args.profile else None,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,93 @@
+from unittest.mock import Mock
+
+import pytest
+
+from app.db.mmap_store import MmapVectorStore
+from app.db.vector import ChromaVectorStore
+from app.rag.retrieval_cache import RetrievalCache
+from app.rag.service import RAGService
+
+TEXTS = ["east", "north", "west", "south"]
+VECTORS = [[1.0, 0.0], [0.0, 1.0], [-1.0, 0.0], [0.0, -1.0]]
+QUERIES = [[0.9, 0.2], [-0.1, -1.0], [-1.0, 0.3]]
+
+
+@pytest.fixture(params=["chroma", "mmap"])
+def store(request, tmp_path):
+    if request.param == "chroma":
+        store = ChromaVectorStore(persist_directory=str(tmp_path / "chroma"))
+    else:
+        store = MmapVectorStore(index_directory=str(tmp_path / "mmap"))
+    store.add_documents(
+        texts=TEXTS,
+        metadatas=[{"source": "compass.txt"}] * len(TEXTS),
+        doc_embeddings=VECTORS,
+    )
+    return store
+
+
+def test_batched_search_matches_single_queries_in_input_order(store):
+    batched = store.similarity_search_by_vectors(QUERIES, k=2)
+
+    assert [[text for text, _, _ in results] for results in batched] == [
+        ["east", "north"],
+        ["south", "west"],
+        ["west", "north"],
+    ]
+    for query, results in zip(QUERIES, batched):
+        single = store.similarity_search_by_vector(query, k=2)
+        assert [text for text, _, _ in results] == [text for text, _, _ in single]
+        assert [d for _, _, d in results] == pytest.approx([d for _, _, d in single])
+
+
+def test_batched_search_of_no_queries_is_empty(store):
+    assert store.similarity_search_by_vectors([], k=2) == []
+
+
+def test_cache_embeds_and_searches_only_misses_once():
+    cache = RetrievalCache()
+    embed_many = Mock(side_effect=lambda texts: [[float(len(t))] for t in texts])
+    cache.embedding("Who is Ahab?", lambda text: [12.0])
+
+    keyed = cache.embeddings_many(
+        ["who is  ahab?", "Call me Ishmael", "call me ishmael"], embed_many
+    )
+
+    embed_many.assert_called_once_with(["call me ishmael"])
+    assert [vector for _, vector in keyed] == [[12.0], [15.0], [15.0]]
+
+    search_many = Mock(side_effect=lambda keys: [[(key, {}, 0.1)] for key in keys])
+    keys = [key for key, _ in keyed]
+    cache.results_many(keys[:1], 5, search_many)
+    results = cache.results_many(keys, 5, search_many)
+
+    assert search_many.call_args_list[1].args == ([keys[1]],)
+    assert results == [[(key, {}, 0.1)] for key in keys]
+
+
+def test_rag_service_retrieve_many_uses_one_batched_search(settings, monkeypatch):
+    monkeypatch.setattr(
+        "app.rag.embeddings.embed_queries", lambda texts: [[0.1, 0.2]] * len(texts)
+    )
+    store = Mock()
+    store.similarity_search_by_vectors.side_effect = lambda vectors, k: [
+        [("chunk", {"source": "x"}, 0.3)] for _ in vectors
+    ]
+    service = RAGService(
+        vector_store=store,
+        settings=settings.model_copy(
+            update={
+                "INGEST_MANIFEST_PATH": None,
+                "EMBEDDING_CACHE_DIR": None,
+                "TEXT_CACHE_DIR": None,
+                "DEDUP_INDEX_DIR": None,
+                "KEYWORD_INDEX_DIR": None,
+            }
+        ),
+    )
+
+    results = service.retrieve_many(["a?", "b?", "A?"], k=3)
+
+    assert len(results) == 3
+    store.similarity_search_by_vectors.assert_called_once()
+    assert len(store.similarity_search_by_vectors.call_args.args[0]) == 2
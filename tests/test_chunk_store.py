@@ -0,0 +1,53 @@
+from app.db import chunk_store
+from app.db.chunk_store import ChunkStore
+
+
+def test_texts_round_trip_across_instances(tmp_path):
+    store = ChunkStore(str(tmp_path))
+    ids = [f"id-{i}" for i in range(50)]
+    texts = [f"chunk {i} " * (i + 1) for i in range(50)]
+    store.put_many(ids, texts)
+    # Content-addressed IDs: a stored ID is not rewritten
+    store.put_many(ids[:10], ["ignored"] * 10)
+
+    reopened = ChunkStore(str(tmp_path))
+    assert reopened.count == 50
+    assert reopened.get_many(["id-49", "missing", "id-0", "id-49"]) == [
+        texts[49],
+        None,
+        texts[0],
+        texts[49],
+    ]
+
+
+def test_readers_pick_up_appended_chunks(tmp_path):
+    writer = ChunkStore(str(tmp_path))
+    reader = ChunkStore(str(tmp_path))
+    assert reader.get_many(["a"]) == [None]
+
+    writer.put_many(["a", "b"], ["alpha", "beta"])
+
+    assert reader.get_many(["b", "a"]) == ["beta", "alpha"]
+
+
+def test_deletes_compact_into_a_new_generation(tmp_path, monkeypatch):
+    monkeypatch.setattr(chunk_store, "COMPACT_MIN_DEAD_CHUNKS", 10)
+    store = ChunkStore(str(tmp_path))
+    reader = ChunkStore(str(tmp_path))
+    ids = [f"id-{i}" for i in range(30)]
+    texts = [f"text {i} " * 100 for i in range(30)]
+    store.put_many(ids, texts)
+    assert reader.get_many(["id-25"]) == [texts[25]]
+    size_before = store.nbytes
+
+    store.delete(ids[:20] + ["never-stored"])
+
+    assert store.count == 10
+    assert store.nbytes < size_before
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "chunks.1.z",
+        "index.1.bin",
+        "meta.json",
+    ]
+    # A reader holding the old generation follows the compaction
+    assert reader.get_many(["id-25", "id-5"]) == [texts[25], None]
@@ -0,0 +1,215 @@
+import time
+from unittest.mock import Mock
+
+import numpy as np
+
+from app.db.vector import ChromaVectorStore
+from app.rag.dedup import ChunkDeduplicator, minhash_signature
+from app.rag.service import RAGService
+
+LICENSE = (
+    "This eBook is for the use of anyone anywhere in the United States and most "
+    "other parts of the world at no cost and with almost no restrictions "
+    "whatsoever. You may copy it, give it away or re-use it under the terms of "
+    "the Project Gutenberg License included with this eBook or online at "
+    "www.gutenberg.org. "
+) * 8
+
+
+def words(seed, count=200):
+    rng = np.random.default_rng(seed)
+    return " ".join(f"w{i}" for i in rng.integers(0, 10_000, count))
+
+
+def test_signature_is_stable_and_case_insensitive():
+    np.testing.assert_array_equal(
+        minhash_signature(LICENSE), minhash_signature(LICENSE.upper())
+    )
+
+
+def test_near_duplicates_of_other_sources_are_suppressed():
+    dedup = ChunkDeduplicator()
+    kept, suppressed = dedup.filter("a.txt", [LICENSE[:1000], words(1)])
+    assert (len(kept), suppressed) == (2, 0)
+
+    # The same boilerplate cut at a different offset still matches
+    kept, suppressed = dedup.filter("b.txt", [LICENSE[40:1040], words(2)])
+    assert kept == [words(2)]
+    assert suppressed == 1
+
+    # Re-ingesting the first source keeps its own copy
+    kept, suppressed = dedup.filter("a.txt", [LICENSE[:1000]])
+    assert suppressed == 0
+
+
+def test_index_persists_across_instances(tmp_path):
+    index_path = str(tmp_path / "dedup.npz")
+    dedup = ChunkDeduplicator(index_path)
+    dedup.filter("a.txt", [LICENSE[:1000]])
+    dedup.filter("b.txt", [words(1)])
+    dedup.commit("a.txt")
+    # b.txt's chunks were never stored
+    dedup.discard()
+    dedup.save()
+
+    reopened = ChunkDeduplicator(index_path)
+    assert reopened.entries == 1
+    assert reopened.filter("b.txt", [LICENSE[:1000]]) == ([], 1)
+
+
+def test_ingest_reports_suppressed_chunks(settings, tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "app.rag.embeddings.embed_documents", lambda texts: [[0.0]] * len(texts)
+    )
+    store = Mock(target="test")
+    store.get_ids_by_source.return_value = set()
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    (corpus / "a.txt").write_text(LICENSE + words(1, 600))
+    (corpus / "b.txt").write_text(LICENSE + words(2, 600))
+    service = RAGService(
+        vector_store=store,
+        settings=settings.model_copy(
+            update={
+                "INGEST_MANIFEST_PATH": None,
+                "EMBEDDING_CACHE_DIR": None,
+                "TEXT_CACHE_DIR": None,
+                "DEDUP_INDEX_DIR": str(tmp_path / "dedup"),
+                "INGEST_CHECKPOINT_DB": None,
+                "INGEST_LOADER_WORKERS": 1,
+            }
+        ),
+    )
+
+    results = list(service.ingest_directory(str(corpus)))
+
+    assert [r.suppressed for r in results] == [0, 1]
+    assert results[1].chunks == results[0].chunks - 1
+    assert (tmp_path / "dedup" / "test.npz").exists()
+
+
+def test_ingest_deletes_chunks_of_a_now_fully_duplicate_file(
+    settings, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(
+        "app.rag.embeddings.embed_documents",
+        lambda texts: [[float(len(text)), 1.0] for text in texts],
+    )
+    store = ChromaVectorStore(persist_directory=str(tmp_path / "chroma_db"))
+    service = RAGService(
+        vector_store=store,
+        settings=settings.model_copy(
+            update={
+                "INGEST_MANIFEST_PATH": None,
+                "EMBEDDING_CACHE_DIR": None,
+                "TEXT_CACHE_DIR": None,
+                "DEDUP_INDEX_DIR": str(tmp_path / "dedup"),
+                "KEYWORD_INDEX_DIR": None,
+            }
+        ),
+    )
+    original, copy = tmp_path / "a.txt", tmp_path / "b.txt"
+    original.write_text(LICENSE[:1000])
+    copy.write_text(words(3))
+    service.ingest(str(original))
+    service.ingest(str(copy))
+    assert store.get_ids_by_source(str(copy))
+
+    # Edited down to a copy of the first file's text
+    copy.write_text(LICENSE[:1000])
+
+    assert service.ingest(str(copy)) == 0
+    assert store.get_ids_by_source(str(copy)) == set()
+
+
+def test_first_file_in_input_order_keeps_a_shared_passage(
+    settings, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(
+        "app.rag.embeddings.embed_documents", lambda texts: [[0.0]] * len(texts)
+    )
+    store = Mock(target="test")
+    store.get_ids_by_source.return_value = set()
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    (corpus / "a.txt").write_text(LICENSE + words(1, 600))
+    (corpus / "b.txt").write_text(LICENSE + words(2, 600))
+    service = RAGService(
+        vector_store=store,
+        settings=settings.model_copy(
+            update={
+                "INGEST_MANIFEST_PATH": None,
+                "EMBEDDING_CACHE_DIR": None,
+                "TEXT_CACHE_DIR": None,
+                "DEDUP_INDEX_DIR": str(tmp_path / "dedup"),
+                "KEYWORD_INDEX_DIR": None,
+                "INGEST_CHECKPOINT_DB": None,
+                "INGEST_LOADER_WORKERS": 2,
+            }
+        ),
+    )
+    load_chunks = service._load_chunks
+
+    def slow_first_file(path):
+        if path.endswith("a.txt"):
+            time.sleep(0.2)  # b.txt is split first
+        return load_chunks(path)
+
+    monkeypatch.setattr(service, "_load_chunks", slow_first_file)
+
+    results = list(service.ingest_directory(str(corpus)))
+
+    assert [r.suppressed for r in results] == [0, 1]
+
+
+def test_commit_returns_sources_to_recheck_when_a_kept_passage_goes(tmp_path):
+    index_path = str(tmp_path / "dedup.npz")
+    dedup = ChunkDeduplicator(index_path)
+    dedup.filter("a.txt", [LICENSE[:1000], words(1)])
+    assert dedup.commit("a.txt") == set()
+    assert dedup.filter("b.txt", [LICENSE[:1000], words(2)])[1] == 1
+    assert dedup.commit("b.txt") == set()
+
+    # Re-ingested unchanged: b.txt's copy is still covered
+    dedup.filter("a.txt", [LICENSE[:1000], words(1)])
+    assert dedup.commit("a.txt") == set()
+    dedup.save()
+
+    reopened = ChunkDeduplicator(index_path)
+    reopened.filter("a.txt", [words(1)])
+    assert reopened.commit("a.txt") == {"b.txt"}
+    assert reopened.filter("b.txt", [LICENSE[:1000]]) == ([LICENSE[:1000]], 0)
+
+
+def test_ingest_forgets_files_whose_kept_copy_changed(settings, tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "app.rag.embeddings.embed_documents", lambda texts: [[0.0]] * len(texts)
+    )
+    store = Mock(target="test")
+    store.get_ids_by_source.return_value = {"stored"}
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    (corpus / "a.txt").write_text(LICENSE + words(1, 600))
+    (corpus / "b.txt").write_text(LICENSE + words(2, 600))
+    service = RAGService(
+        vector_store=store,
+        settings=settings.model_copy(
+            update={
+                "INGEST_MANIFEST_PATH": str(tmp_path / "manifest.json"),
+                "INGEST_INCREMENTAL": False,
+                "EMBEDDING_CACHE_DIR": None,
+                "TEXT_CACHE_DIR": None,
+                "DEDUP_INDEX_DIR": str(tmp_path / "dedup"),
+                "KEYWORD_INDEX_DIR": None,
+                "INGEST_CHECKPOINT_DB": None,
+                "INGEST_LOADER_WORKERS": 1,
+            }
+        ),
+    )
+    list(service.ingest_directory(str(corpus)))
+
+    (corpus / "a.txt").write_text(words(1, 600))
+    service.ingest(str(corpus / "a.txt"))
+
+    results = list(service.ingest_directory(str(corpus)))
+    assert [(r.skipped, r.suppressed) for r in results] == [(True, 0), (False, 0)]
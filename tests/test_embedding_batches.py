@@ -0,0 +1,123 @@
+import sys
+import threading
+import time
+import types
+
+import numpy as np
+
+from app.rag import embeddings
+from app.rag.embedding_batches import encode_by_length, plan_batches
+
+
+def test_batches_are_longest_first_and_within_token_budget():
+    lengths = [10, 200, 30, 200, 5, 90, 30, 1000]
+
+    batches = plan_batches(lengths, max_tokens=400, max_batch_size=3)
+
+    order = np.concatenate(batches).tolist()
+    assert sorted(order) == list(range(len(lengths)))
+    assert [lengths[i] for i in order] == sorted(lengths, reverse=True)
+    # An over-budget text is a batch on its own; the rest fit the budget
+    assert batches[0].tolist() == [7]
+    for batch in batches[1:]:
+        assert len(batch) <= 3
+        assert len(batch) * max(lengths[i] for i in batch) <= 400
+
+
+def test_encode_by_length_scatters_back_to_input_order():
+    texts = ["a" * n for n in [3, 40, 7, 40, 1, 12]]
+    calls = []
+
+    def encode(batch):
+        calls.append(batch)
+        return np.array([[len(text), 0.0] for text in batch], dtype=np.float32)
+
+    vectors = encode_by_length(
+        texts, [len(t) for t in texts], encode, max_tokens=80, max_batch_size=8
+    )
+
+    assert vectors[:, 0].tolist() == [len(text) for text in texts]
+    assert [[len(text) for text in batch] for batch in calls] == [
+        [40, 40],
+        [12, 7, 3, 1],
+    ]
+
+
+class FakeModel:
+    """Stand-in for the SentenceTransformer: one token per character."""
+
+    max_seq_length = 256
+
+    def __init__(self):
+        self.batches = []
+
+    def tokenizer(self, texts, max_length, **kwargs):
+        return {"input_ids": [list(text[: max_length - 2]) + [0, 0] for text in texts]}
+
+    def encode(self, texts, batch_size=32):
+        self.batches.append(list(texts))
+        return np.array([[len(text)] for text in texts], dtype=np.float64)
+
+
+def test_encode_locally_buckets_by_token_length(monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(embeddings, "_get_model", lambda: model)
+    texts = ["x" * n for n in [500, 20, 300, 18, 22, 250]]
+
+    vectors = embeddings.encode_locally(texts, batch_tokens=256)
+
+    assert vectors.dtype == embeddings.EMBEDDING_DTYPE
+    assert vectors[:, 0].tolist() == [len(text) for text in texts]
+    # Truncated to 256 tokens: the three long texts go one per batch
+    assert [len(batch) for batch in model.batches] == [1, 1, 1, 3]
+
+    model.batches.clear()
+    embeddings.encode_locally(texts, batch_tokens=0)
+    assert model.batches == [texts]
+
+
+def test_queries_are_encoded_in_one_call_and_documents_by_length(monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(embeddings, "_get_model", lambda: model)
+    monkeypatch.setattr(embeddings, "_server", None)
+    monkeypatch.setattr(embeddings, "_pool", None)
+    monkeypatch.setattr(embeddings, "_cache", None)
+    monkeypatch.setattr(embeddings, "_batch_tokens", 256)
+    texts = ["x" * n for n in [500, 20, 300, 18]]
+
+    vectors = embeddings.embed_queries(texts)
+
+    assert vectors[:, 0].tolist() == [len(text) for text in texts]
+    assert model.batches == [texts]
+
+    model.batches.clear()
+    vectors = embeddings.embed_documents(texts)
+    assert vectors[:, 0].tolist() == [len(text) for text in texts]
+    assert len(model.batches) == 3
+
+
+def test_concurrent_first_calls_load_the_model_once(monkeypatch):
+    loads = []
+
+    class SlowModel:
+        def __init__(self, name):
+            time.sleep(0.05)
+            loads.append(name)
+
+    monkeypatch.setitem(
+        sys.modules,
+        "sentence_transformers",
+        types.SimpleNamespace(SentenceTransformer=SlowModel),
+    )
+    embeddings._load_model.cache_clear()
+    try:
+        # As the warm-up thread and the first query do
+        threads = [threading.Thread(target=embeddings._get_model) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        embeddings._load_model.cache_clear()
+
+    assert loads == [embeddings.MODEL_NAME]
@@ -0,0 +1,106 @@
+import numpy as np
+
+from app.rag import embeddings
+from app.rag.embedding_cache import EmbeddingCache
+
+
+def test_cache_round_trips_vectors_across_instances(tmp_path):
+    vectors = np.array([[0.5, -1.0, 2.0], [0.25, 0.0, 1.0]], dtype=np.float32)
+
+    cache = EmbeddingCache(str(tmp_path), "test-model")
+    cache.put_many(["alpha", "beta"], vectors)
+    cache.flush()
+
+    reopened = EmbeddingCache(str(tmp_path), "test-model")
+    hits = reopened.get_many(["beta", "alpha", "gamma"])
+
+    np.testing.assert_allclose(hits[0], vectors[1])
+    np.testing.assert_allclose(hits[1], vectors[0])
+    assert hits[2] is None
+    stats = reopened.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (2, 1, 2)
+
+
+def test_cache_keys_include_model_name(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model-a")
+    cache.put_many(["alpha"], np.ones((1, 3), dtype=np.float32))
+    cache.flush()
+
+    other_model = EmbeddingCache(str(tmp_path), "model-b")
+    assert other_model.get_many(["alpha"]) == [None]
+
+
+def test_cache_evicts_least_recently_used_when_full(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "test-model", max_entries=10)
+    texts = [f"text {i}" for i in range(10)]
+    cache.put_many(texts, np.arange(30, dtype=np.float32).reshape(10, 3))
+
+    # Touch everything except "text 0" so it becomes the eviction candidate
+    cache.get_many(texts[1:])
+    cache.put_many(["newcomer"], np.zeros((1, 3), dtype=np.float32))
+
+    assert cache.stats().evictions == 1
+    assert cache.get_many(["text 0"]) == [None]
+    assert cache.get_many(["newcomer"])[0] is not None
+
+
+def test_embed_documents_only_encodes_cache_misses(tmp_path, monkeypatch):
+    encoded = []
+
+    class FakeModel:
+        def encode(self, texts):
+            encoded.append(list(texts))
+            return np.array([[float(len(t)), 1.0] for t in texts], dtype=np.float32)
+
+    monkeypatch.setattr(embeddings, "_get_model", lambda: FakeModel())
+    monkeypatch.setattr(embeddings, "_cache", None)
+    monkeypatch.setattr(embeddings, "_batch_tokens", 0)
+    embeddings.configure_cache(str(tmp_path))
+
+    first = embeddings.embed_documents(["one", "three"])
+    second = embeddings.embed_documents(["three", "fifteen"])
+
+    assert encoded == [["one", "three"], ["fifteen"]]
+    assert first.dtype == np.float32
+    assert first.tolist() == [[3.0, 1.0], [5.0, 1.0]]
+    assert second.tolist() == [[5.0, 1.0], [7.0, 1.0]]
+    assert embeddings.cache_stats().hits == 1
+
+    embeddings.configure_cache(None)
+
+
+def test_instances_sharing_a_cache_never_serve_a_reused_slot(tmp_path):
+    first = EmbeddingCache(str(tmp_path), "test-model", max_entries=2)
+    first.put_many(["alpha"], np.full((1, 3), 1.0, dtype=np.float32))
+    # Opened while slot 1 is still free, then filled by the first instance
+    second = EmbeddingCache(str(tmp_path), "test-model", max_entries=2)
+    first.put_many(["beta"], np.full((1, 3), 2.0, dtype=np.float32))
+
+    # The second instance finds its free slot taken and evicts instead
+    second.put_many(["gamma"], np.full((1, 3), 3.0, dtype=np.float32))
+
+    alpha, beta = first.get_many(["alpha", "beta"])
+    surviving = [vector for vector in (alpha, beta) if vector is not None]
+    assert len(surviving) == 1
+    np.testing.assert_allclose(surviving[0], 1.0 if alpha is not None else 2.0)
+    np.testing.assert_allclose(second.get_many(["gamma"])[0], 3.0)
+    assert first.get_many(["gamma"]) == [None]
+
+
+def test_flush_keeps_the_latest_use_recorded_by_any_instance(tmp_path):
+    first = EmbeddingCache(str(tmp_path), "test-model", max_entries=2)
+    first.put_many(["alpha", "beta"], np.ones((2, 3), dtype=np.float32))
+    first.flush()
+    second = EmbeddingCache(str(tmp_path), "test-model", max_entries=2)
+
+    first.get_many(["alpha"])
+    first.get_many(["alpha"])
+    first.flush()
+    # Saving its own clocks must not make "alpha" look unused since the load
+    second.get_many(["beta"])
+    second.flush()
+
+    third = EmbeddingCache(str(tmp_path), "test-model", max_entries=2)
+    third.put_many(["gamma"], np.zeros((1, 3), dtype=np.float32))
+    assert third.get_many(["alpha"])[0] is not None
+    assert third.get_many(["beta"]) == [None]
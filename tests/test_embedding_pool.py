@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.rag import embeddings
+from app.rag.embedding_pool import SHARD_SIZE, THREAD_ENV_VARS, EmbeddingPool
+
+# In a worker, the environment it had while unpickling its first task
+IMPORT_ENV = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+
+
+def fake_encode(texts):
+    """Runs in a spawned worker: tags each vector with the size of its shard."""
+    return np.array([[len(text), len(texts)] for text in texts], dtype=np.float32)
+
+
+def import_env_encode(texts):
+    threads = [int(IMPORT_ENV[name] or 0) for name in THREAD_ENV_VARS]
+    return np.array([threads for _ in texts], dtype=np.float32)
+
+
+def crashing_encode(texts):
+    os._exit(1)
+
+
+@pytest.fixture
+def pool():
+    pools = []
+
+    def create(encode=fake_encode, workers=2, threads=1):
+        pools.append(EmbeddingPool(workers, threads=threads, encode=encode))
+        return pools[-1]
+
+    yield create
+    for created in pools:
+        created.shutdown()
+
+
+def test_pool_shards_across_workers_and_keeps_order(pool):
+    texts = ["x" * i for i in range(135)]
+
+    vectors = pool(workers=2).encode(texts)
+
+    assert vectors[:, 0].tolist() == list(range(len(texts)))
+    assert sorted(set(vectors[:, 1].tolist())) == [67, 68]
+    assert os.environ.get("TOKENIZERS_PARALLELISM") != "false"  # set in workers only
+
+
+def test_workers_import_with_their_thread_settings(pool):
+    before = dict(os.environ)
+
+    vectors = pool(encode=import_env_encode, workers=1, threads=3).encode(["a"])
+
+    assert vectors.tolist() == [[3.0, 3.0, 3.0]]
+    assert dict(os.environ) == before
+
+
+def test_small_batches_are_not_split(pool):
+    vectors = pool(workers=4).encode(["x" * i for i in range(SHARD_SIZE - 1)])
+
+    assert vectors[:, 0].tolist() == list(range(SHARD_SIZE - 1))
+    assert set(vectors[:, 1].tolist()) == {SHARD_SIZE - 1}
+
+
+def test_broken_pool_falls_back_to_in_process(pool, monkeypatch):
+    monkeypatch.setattr(embeddings, "_cache", None)
+    monkeypatch.setattr(embeddings, "_pool", pool(encode=crashing_encode))
+    monkeypatch.setattr(embeddings, "_encode", lambda texts: np.ones((len(texts), 2)))
+
+    vectors = embeddings.embed_documents(["a", "b"])
+
+    assert vectors.tolist() == [[1.0, 1.0], [1.0, 1.0]]
+    assert embeddings._pool is None
+
+
+def test_process_pool_is_scoped_to_block():
+    with embeddings.process_pool(0) as disabled:
+        assert disabled is None
+        assert embeddings._pool is None
+
+    with embeddings.process_pool(3, threads=2) as active:
+        assert embeddings._pool is active
+        assert active is not None
+        assert (active.workers, active.threads) == (3, 2)
+        assert active.batch_size == 3 * SHARD_SIZE
+    assert embeddings._pool is None
@@ -0,0 +1,118 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.rag import embeddings
+from app.rag.embedding_server import (
+    EmbeddingClient,
+    EmbeddingServer,
+    EmbeddingServerError,
+)
+
+
+def fake_encode(texts):
+    return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def start_server(tmp_path):
+    servers = []
+
+    def start(encode=fake_encode, **kwargs):
+        server = EmbeddingServer(str(tmp_path / "embed.sock"), encode, **kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        deadline = time.monotonic() + 5
+        while not (tmp_path / "embed.sock").exists():
+            assert time.monotonic() < deadline, "server did not start"
+            time.sleep(0.01)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def test_client_round_trip(start_server):
+    server = start_server()
+    client = EmbeddingClient(server.socket_path)
+
+    vectors = client.encode(["a", "abc"])
+
+    np.testing.assert_array_equal(vectors, [[1, 1], [3, 1]])
+    # The connection is reused for later requests
+    np.testing.assert_array_equal(client.encode(["ab"]), [[2, 1]])
+
+
+def test_concurrent_requests_are_micro_batched(start_server):
+    batch_sizes = []
+
+    def encode(texts):
+        batch_sizes.append(len(texts))
+        return fake_encode(texts)
+
+    server = start_server(encode, max_wait_ms=200)
+    client = EmbeddingClient(server.socket_path)
+    results = {}
+    barrier = threading.Barrier(8)
+
+    def request(i):
+        barrier.wait()
+        results[i] = client.encode(["x" * i])
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Each caller gets its own rows back, from fewer encode calls than requests
+    assert {i: vectors.tolist() for i, vectors in results.items()} == {
+        i: [[float(i), 1.0]] for i in range(8)
+    }
+    assert sum(batch_sizes) == 8
+    assert len(batch_sizes) < 8
+    assert server.requests == 8
+
+
+def test_encode_failure_is_reported_to_client(start_server):
+    def encode(texts):
+        raise RuntimeError("model exploded")
+
+    server = start_server(encode)
+
+    with pytest.raises(EmbeddingServerError, match="model exploded"):
+        EmbeddingClient(server.socket_path).encode(["a"])
+
+
+def test_embeddings_use_server_when_running(start_server, monkeypatch):
+    server = start_server()
+    monkeypatch.setattr(embeddings, "_get_model", lambda: pytest.fail("model loaded"))
+    embeddings.configure_server(server.socket_path)
+    try:
+        assert embeddings.embed_query("abcd").tolist() == [4.0, 1.0]
+        assert embeddings.embed_queries(["a", "ab"]).tolist() == [
+            [1.0, 1.0],
+            [2.0, 1.0],
+        ]
+    finally:
+        embeddings.configure_server(None)
+
+
+def test_embeddings_fall_back_in_process_without_server(tmp_path, monkeypatch):
+    class LocalModel:
+        def encode(self, texts):
+            return fake_encode(texts) * 10
+
+    monkeypatch.setattr(embeddings, "_get_model", LocalModel)
+    # A stale socket file with no server behind it
+    stale = tmp_path / "embed.sock"
+    stale.touch()
+    embeddings.configure_server(str(stale))
+    try:
+        assert embeddings.embed_query("ab").tolist() == [20.0, 10.0]
+        assert embeddings._server_retry_at > time.monotonic()
+    finally:
+        embeddings.configure_server(None)
@@ -0,0 +1,88 @@
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from app.rag.checkpoint import IngestCheckpoint
+from app.rag.service import RAGService
+
+
+def test_checkpoint_resumes_latest_unfinished_run(tmp_path):
+    db_path = str(tmp_path / "checkpoint.db")
+    checkpoint = IngestCheckpoint(db_path, "db/documents", "/corpus")
+    assert not checkpoint.start()
+    checkpoint.record_batch({Path("/corpus/a.txt"): 2, Path("/corpus/b.txt"): 1})
+    checkpoint.record_batch({Path("/corpus/b.txt"): 3})
+    checkpoint.record_file(Path("/corpus/b.txt"), 4)
+    checkpoint.close()
+
+    resumed = IngestCheckpoint(db_path, "db/documents", "/corpus")
+    assert resumed.start(resume=True)
+    assert resumed.run_id == checkpoint.run_id
+    assert resumed.written_chunks(Path("/corpus/a.txt")) == 2
+    assert resumed.completed_chunk_count(Path("/corpus/a.txt")) is None
+    assert resumed.completed_chunk_count(Path("/corpus/b.txt")) == 4
+    resumed.finish()
+
+    # A finished run is not resumed, and other targets never share runs
+    again = IngestCheckpoint(db_path, "db/documents", "/corpus")
+    assert not again.start(resume=True)
+    assert again.written_chunks(Path("/corpus/a.txt")) == 0
+    other = IngestCheckpoint(db_path, "db/other", "/corpus")
+    assert not other.start(resume=True)
+
+
+def test_interrupted_ingest_resumes_after_last_committed_batch(
+    settings, tmp_path, monkeypatch
+):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    # Chunks start every 1200 characters, so each begins with its own letter
+    (corpus / "a.txt").write_text("a" * 1200 + "b" * 1200 + "c" * 600)
+    (corpus / "b.txt").write_text("d" * 1200 + "e" * 900)
+
+    embed_calls = []
+
+    def embed(texts):
+        embed_calls.append(texts)
+        if len(embed_calls) == 2 and failing:
+            raise RuntimeError("preempted")
+        return [[0.0]] * len(texts)
+
+    monkeypatch.setattr("app.rag.embeddings.embed_documents", embed)
+    store = Mock(target="test")
+    service = RAGService(
+        vector_store=store,
+        settings=settings.model_copy(
+            update={
+                "INGEST_MANIFEST_PATH": None,
+                "INGEST_INCREMENTAL": False,
+                "INGEST_CHECKPOINT_DB": str(tmp_path / "checkpoint.db"),
+                "INGEST_EMBED_BATCH_SIZE": 2,
+                "INGEST_LOADER_WORKERS": 1,
+                "EMBEDDING_CACHE_DIR": None,
+                "TEXT_CACHE_DIR": None,
+                "DEDUP_INDEX_DIR": None,
+                "KEYWORD_INDEX_DIR": None,
+            }
+        ),
+    )
+
+    failing = True
+    with pytest.raises(RuntimeError, match="preempted"):
+        list(service.ingest_directory(str(corpus)))
+    first_run = [call.kwargs["texts"] for call in store.add_documents.call_args_list]
+    assert [[t[0] for t in texts] for texts in first_run] == [["a", "b"]]
+
+    failing = False
+    store.add_documents.reset_mock()
+    results = list(service.ingest_directory(str(corpus), resume=True))
+
+    second_run = [call.kwargs["texts"] for call in store.add_documents.call_args_list]
+    assert [[t[0] for t in texts] for texts in second_run] == [["c", "d"], ["e"]]
+    assert [(r.filename, r.chunks) for r in results] == [("a.txt", 3), ("b.txt", 2)]
+
+    # The finished run is not resumed again: all 5 chunks are written afresh
+    store.add_documents.reset_mock()
+    list(service.ingest_directory(str(corpus), resume=True))
+    assert store.add_documents.call_count == 3
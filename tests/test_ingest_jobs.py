@@ -0,0 +1,173 @@
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from app.cli import CANCEL, CLI, INGEST_ALL, JOB, JOBS
+from app.rag.jobs import JobManager
+from app.rag.service import RAGService
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (corpus / name).write_text(f"{name} " * 500)
+    return corpus
+
+
+@pytest.fixture
+def rag_service(settings, tmp_path):
+    return RAGService(
+        vector_store=Mock(target="test"),
+        settings=settings.model_copy(
+            update={
+                "INGEST_MANIFEST_PATH": None,
+                "INGEST_INCREMENTAL": False,
+                "INGEST_CHECKPOINT_DB": str(tmp_path / "checkpoint.db"),
+                "INGEST_LOADER_WORKERS": 1,
+                "INGEST_EMBED_BATCH_SIZE": 1,
+                "INGEST_QUEUE_SIZE": 1,
+                "TEXT_CACHE_DIR": None,
+                "DEDUP_INDEX_DIR": None,
+                "KEYWORD_INDEX_DIR": None,
+            }
+        ),
+    )
+
+
+def test_job_ingests_in_background_and_reports_progress(
+    rag_service, corpus, monkeypatch
+):
+    release = threading.Event()
+
+    def embed(texts):
+        release.wait(timeout=5)
+        return [[0.0]] * len(texts)
+
+    monkeypatch.setattr("app.rag.embeddings.embed_documents", embed)
+    jobs = JobManager()
+
+    job = jobs.start_ingest(rag_service, str(corpus))
+    # Returns while the ingest is still blocked on embedding
+    assert job.state == "running"
+    assert job.progress().files_total == 3
+    with pytest.raises(RuntimeError, match="still running"):
+        jobs.start_ingest(rag_service, str(corpus))
+
+    release.set()
+    assert job.wait(timeout=10)
+
+    progress = job.progress()
+    assert job.state == "completed"
+    assert (progress.files_done, progress.files_total) == (3, 3)
+    assert progress.chunks == sum(r.chunks for r in job.results) > 0
+    assert progress.eta_seconds is None
+    assert jobs.newly_finished() == [job]
+    assert jobs.newly_finished() == []
+
+
+def test_cancelled_job_stops_early_and_can_resume(rag_service, corpus, monkeypatch):
+    monkeypatch.setattr(
+        "app.rag.embeddings.embed_documents", lambda texts: [[0.0]] * len(texts)
+    )
+    jobs = JobManager()
+    job = jobs.start_ingest(rag_service, str(corpus))
+    assert job.cancel()  # before the first file's results come back
+    assert job.wait(timeout=10)
+
+    assert job.state == "cancelled"
+    assert not job.cancel()
+    assert len(job.results) < 3
+
+    resumed = jobs.start_ingest(rag_service, str(corpus), resume=True)
+    assert resumed.wait(timeout=10)
+    assert resumed.state == "completed"
+    assert len(job.results) + len(resumed.results) == 3
+
+
+def test_job_fails_cleanly_on_ingest_error(rag_service, corpus, monkeypatch):
+    def broken_store_write(*args, **kwargs):
+        raise RuntimeError("disk full")
+
+    rag_service.vector_store.add_documents.side_effect = broken_store_write
+    monkeypatch.setattr(
+        "app.rag.embeddings.embed_documents", lambda texts: [[0.0]] * len(texts)
+    )
+
+    job = JobManager().start_ingest(rag_service, str(corpus))
+    assert job.wait(timeout=10)
+
+    assert job.state == "failed"
+    assert job.error == "disk full"
+
+
+def test_cli_job_commands(rag_service, settings, corpus, monkeypatch, capsys):
+    monkeypatch.setattr(
+        "app.rag.embeddings.embed_documents", lambda texts: [[0.0]] * len(texts)
+    )
+    cli = CLI(
+        Mock(), rag_service, settings.model_copy(update={"CORPUS_DIR": str(corpus)})
+    )
+
+    cli._handle_command(INGEST_ALL)
+    assert "Started ingest job 1: 3 files" in capsys.readouterr().out
+    assert cli.jobs.get(1).wait(timeout=10)
+
+    cli._handle_command(JOBS)
+    assert "[1] completed" in capsys.readouterr().out
+    cli._handle_command(f"{JOB} 1")
+    assert "3/3 files" in capsys.readouterr().out
+    cli._handle_command(f"{CANCEL} 1")
+    assert "already completed" in capsys.readouterr().out
+    cli._handle_command(f"{JOB} 7")
+    assert "No ingest job '7'" in capsys.readouterr().out
+
+
+def test_job_embeds_in_a_thread_limited_worker_process(
+    rag_service, corpus, monkeypatch
+):
+    from contextlib import contextmanager
+
+    from app.rag import embeddings
+
+    pools = []
+
+    @contextmanager
+    def process_pool(workers, threads=1):
+        pools.append((workers, threads))
+        yield None
+
+    monkeypatch.setattr(embeddings, "process_pool", process_pool)
+    monkeypatch.setattr(
+        "app.rag.embeddings.embed_documents", lambda texts: [[0.0]] * len(texts)
+    )
+
+    job = JobManager().start_ingest(rag_service, str(corpus), embed_threads=3)
+    assert job.wait(timeout=10)
+    assert job.state == "completed"
+    assert pools == [(1, 3)]
+
+
+def test_foreground_ingest_is_refused_while_a_job_runs(
+    rag_service, corpus, monkeypatch
+):
+    embedding, release = threading.Event(), threading.Event()
+
+    def embed(texts):
+        embedding.set()
+        release.wait(timeout=5)
+        return [[0.0]] * len(texts)
+
+    monkeypatch.setattr("app.rag.embeddings.embed_documents", embed)
+    job = JobManager().start_ingest(rag_service, str(corpus))
+
+    assert embedding.wait(timeout=5)
+    with pytest.raises(RuntimeError, match="Another ingest is running"):
+        rag_service.ingest(str(corpus / "a.txt"))
+
+    release.set()
+    assert job.wait(timeout=10)
+    assert job.state == "completed"
+    assert rag_service.ingest(str(corpus / "a.txt")) > 0
@@ -0,0 +1,127 @@
+import os
+
+from app.core.models import IngestResult
+from app.db.vector import ChromaVectorStore
+from app.rag.manifest import IngestManifest
+from app.rag.service import RAGService
+
+
+def test_manifest_skips_unchanged_file_across_instances(tmp_path):
+    doc = tmp_path / "book.txt"
+    doc.write_text("Call me Ishmael.")
+    manifest_path = str(tmp_path / "manifest.json")
+
+    manifest = IngestManifest(manifest_path, "db/documents")
+    manifest.record(doc, 3, 1500, 300)
+    # Written in batches, not per file
+    assert (
+        IngestManifest(manifest_path, "db/documents").get_unchanged(doc, 1500, 300)
+        is None
+    )
+    manifest.flush()
+
+    entry = IngestManifest(manifest_path, "db/documents").get_unchanged(doc, 1500, 300)
+    assert entry is not None
+    assert entry.chunk_count == 3
+
+
+def test_manifest_detects_content_and_chunking_changes(tmp_path):
+    doc = tmp_path / "book.txt"
+    doc.write_text("Call me Ishmael.")
+    manifest = IngestManifest(str(tmp_path / "manifest.json"), "db/documents")
+    manifest.record(doc, 1, 1500, 300)
+
+    assert manifest.get_unchanged(doc, 1000, 200) is None
+    assert manifest.get_unchanged(doc, 1500, 300, splitter="tokens") is None
+
+    doc.write_text("Call me Queequeg.")
+    assert manifest.get_unchanged(doc, 1500, 300) is None
+
+
+def test_manifest_accepts_touched_file_with_identical_content(tmp_path):
+    doc = tmp_path / "book.txt"
+    doc.write_text("Call me Ishmael.")
+    manifest = IngestManifest(str(tmp_path / "manifest.json"), "db/documents")
+    manifest.record(doc, 1, 1500, 300)
+
+    stat = doc.stat()
+    os.utime(doc, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000_000))
+
+    assert manifest.get_unchanged(doc, 1500, 300) is not None
+
+
+def test_manifest_entries_are_scoped_to_target(tmp_path):
+    doc = tmp_path / "book.txt"
+    doc.write_text("Call me Ishmael.")
+    manifest_path = str(tmp_path / "manifest.json")
+    manifest = IngestManifest(manifest_path, "db/documents")
+    manifest.record(doc, 1, 1500, 300)
+    manifest.flush()
+
+    other = IngestManifest(manifest_path, "other_db/documents")
+    assert other.get_unchanged(doc, 1500, 300) is None
+
+
+def test_service_reingests_files_whose_chunks_are_gone(tmp_path, settings, monkeypatch):
+    monkeypatch.setattr(
+        "app.rag.embeddings.embed_documents",
+        lambda texts: [[float(len(text)), 1.0, 0.0] for text in texts],
+    )
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    doc = corpus / "book.txt"
+    doc.write_text("Call me Ishmael.")
+    store = ChromaVectorStore(persist_directory=str(tmp_path / "chroma_db"))
+    service = RAGService(
+        vector_store=store,
+        settings=settings.model_copy(
+            update={
+                "INGEST_MANIFEST_PATH": str(tmp_path / "manifest.json"),
+                "INGEST_CHECKPOINT_DB": None,
+                "TEXT_CACHE_DIR": None,
+                "DEDUP_INDEX_DIR": None,
+                "EMBEDDING_CACHE_DIR": None,
+                "KEYWORD_INDEX_DIR": None,
+            }
+        ),
+    )
+
+    assert not next(iter(service.ingest_directory(str(corpus)))).skipped
+    assert next(iter(service.ingest_directory(str(corpus)))).skipped
+
+    # As if the collection had been dropped and recreated under the same name
+    store.delete(sorted(store.get_ids_by_source(str(doc))))
+    result = next(iter(service.ingest_directory(str(corpus))))
+    assert result == IngestResult("book.txt", 1)
+    assert store.get_ids_by_source(str(doc))
+
+
+def test_service_records_the_file_as_it_was_read(tmp_path, settings, monkeypatch):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    doc = corpus / "book.txt"
+    doc.write_text("Call me Ishmael.")
+
+    def embed_while_editing(texts):
+        # Edited after the loader read it, before the manifest records it
+        doc.write_text("It was the best of times, it was the worst of times.")
+        return [[float(len(text)), 1.0, 0.0] for text in texts]
+
+    monkeypatch.setattr("app.rag.embeddings.embed_documents", embed_while_editing)
+    store = ChromaVectorStore(persist_directory=str(tmp_path / "chroma_db"))
+    service = RAGService(
+        vector_store=store,
+        settings=settings.model_copy(
+            update={
+                "INGEST_MANIFEST_PATH": str(tmp_path / "manifest.json"),
+                "INGEST_CHECKPOINT_DB": None,
+                "TEXT_CACHE_DIR": None,
+                "DEDUP_INDEX_DIR": None,
+                "EMBEDDING_CACHE_DIR": None,
+                "KEYWORD_INDEX_DIR": None,
+            }
+        ),
+    )
+
+    assert not next(iter(service.ingest_directory(str(corpus)))).skipped
+    assert not next(iter(service.ingest_directory(str(corpus)))).skipped
@@ -0,0 +1,91 @@
+import json
+from unittest.mock import Mock, patch
+
+from app.cli import CLI, INGEST_ALL, ingest_directory_with_report
+from app.rag.ingest_profile import IngestProfile, timed_stage
+from app.rag.service import RAGService
+
+
+def test_timed_stage_accumulates_calls_bytes_and_items():
+    profile = IngestProfile()
+    for size in (100, 50):
+        with profile.timed("split") as stage:
+            stage.bytes = size
+            stage.items = 2
+    with timed_stage(None, "split") as stage:
+        stage.bytes = 1000  # profiling off: recorded nowhere
+
+    stats = profile.stages["split"]
+    assert (stats.calls, stats.bytes, stats.items) == (2, 150, 4)
+    assert stats.wall_seconds >= stats.cpu_seconds >= 0
+    assert stats.max_rss_mb > 0
+    # JSON-serialisable, for comparing benchmark runs
+    assert json.loads(json.dumps(profile.to_dict()))["stages"]["split"]["calls"] == 2
+
+
+def test_ingest_directory_profiles_each_stage(settings, tmp_path, monkeypatch):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    (corpus / "a.txt").write_text("alpha\nbeta " * 400)
+    (corpus / "b.txt").write_text("gamma delta " * 300)
+    monkeypatch.setattr(
+        "app.rag.embeddings.embed_documents", lambda texts: [[0.0]] * len(texts)
+    )
+    service = RAGService(
+        vector_store=Mock(target="test"),
+        settings=settings.model_copy(
+            update={
+                "INGEST_MANIFEST_PATH": None,
+                "INGEST_INCREMENTAL": False,
+                "INGEST_CHECKPOINT_DB": None,
+                "TEXT_CACHE_DIR": None,
+                "DEDUP_INDEX_DIR": str(tmp_path / "dedup"),
+            }
+        ),
+    )
+    service.ingest_profile = profile = IngestProfile()
+
+    results = list(service.ingest_directory(str(corpus)))
+
+    stages = profile.stages
+    assert list(dict(profile.ordered_stages())) == [
+        "parse",
+        "clean",
+        "split",
+        "dedup",
+        "embed",
+        "upsert",
+    ]
+    assert stages["parse"].calls == 2
+    assert stages["parse"].bytes == sum(f.stat().st_size for f in corpus.iterdir())
+    chunks = sum(result.chunks for result in results)
+    assert stages["split"].items == stages["dedup"].items == chunks
+    assert stages["embed"].items == stages["upsert"].items == chunks
+
+
+def test_report_prints_stage_breakdown_only_when_profiling(capsys):
+    rag_service = Mock(embed_seconds_per_chunk=0.0)
+    rag_service.ingest_directory.return_value = iter([])
+
+    ingest_directory_with_report(rag_service, "corpus")
+    assert "Ingest profile" not in capsys.readouterr().out
+
+    profile = IngestProfile()
+    with profile.timed("parse"):
+        pass
+    rag_service.ingest_directory.return_value = iter([])
+    ingest_directory_with_report(rag_service, "corpus", profile=profile)
+    output = capsys.readouterr().out
+    assert "Ingest profile" in output and "parse" in output
+    assert rag_service.ingest_profile is None
+
+
+def test_ingest_all_profile_flag_passes_a_profile(settings):
+    rag_service = Mock()
+    cli = CLI(Mock(), rag_service, settings, planning_service=None)
+
+    with patch.object(cli.jobs, "start_ingest") as mock_ingest:
+        cli._handle_command(f"{INGEST_ALL} --profile")
+
+    profile = mock_ingest.call_args.kwargs["profile"]
+    assert isinstance(profile, IngestProfile)
@@ -0,0 +1,222 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from app.core.models import IngestResult
+from app.rag.pipeline import IngestionPipeline, PreparedDocument
+
+
+class RecordingStore:
+    def __init__(self):
+        self.upserts = []
+        self.deleted = []
+
+    def add_documents(self, texts, metadatas=None, doc_embeddings=None):
+        self.upserts.append((list(texts), list(metadatas), doc_embeddings))
+
+    def delete(self, ids):
+        self.deleted.extend(ids)
+
+
+def fake_embed(texts):
+    return [[float(len(text))] for text in texts]
+
+
+def prepared(chunks):
+    return PreparedDocument(chunks, len(chunks))
+
+
+def test_pipeline_yields_counts_in_input_order_and_batches_across_files():
+    chunks_by_path = {
+        "a.txt": ["a1", "a2", "a3"],
+        "b.txt": ["b1"],
+        "c.txt": ["c1", "c2"],
+    }
+    store = RecordingStore()
+    pipeline = IngestionPipeline(
+        prepare=lambda path: prepared(chunks_by_path[Path(path).name]),
+        embed=fake_embed,
+        vector_store=store,
+        loader_workers=3,
+        embed_batch_size=4,
+    )
+
+    results = list(pipeline.run([Path(name) for name in chunks_by_path]))
+
+    assert results == [
+        IngestResult("a.txt", 3),
+        IngestResult("b.txt", 1),
+        IngestResult("c.txt", 2),
+    ]
+    # Unpacks as the (filename, chunk_count) pairs ingest_directory always yielded
+    assert [(name, count) for name, count in results] == [
+        ("a.txt", 3),
+        ("b.txt", 1),
+        ("c.txt", 2),
+    ]
+    assert results[0] != IngestResult("a.txt", 3, failed=True)
+    # 6 chunks with batch size 4 -> one full batch spanning files, one remainder
+    assert [texts for texts, _, _ in store.upserts] == [
+        ["a1", "a2", "a3", "b1"],
+        ["c1", "c2"],
+    ]
+    _, metadatas, doc_embeddings = store.upserts[0]
+    assert metadatas[3] == {"source": "b.txt"}
+    assert doc_embeddings == [[2.0], [2.0], [2.0], [2.0]]
+
+
+def test_pipeline_reports_failed_files():
+    def prepare(path):
+        if path == "broken.pdf":
+            raise ValueError("corrupt")
+        return prepared(["ok"])
+
+    store = RecordingStore()
+    pipeline = IngestionPipeline(prepare=prepare, embed=fake_embed, vector_store=store)
+
+    results = list(pipeline.run([Path("broken.pdf"), Path("good.txt")]))
+
+    assert results == [
+        IngestResult("broken.pdf", 0, failed=True),
+        IngestResult("good.txt", 1),
+    ]
+
+
+def test_pipeline_propagates_unexpected_load_errors():
+    def prepare(path):
+        raise TypeError("bug in prepare")
+
+    pipeline = IngestionPipeline(
+        prepare=prepare, embed=fake_embed, vector_store=RecordingStore()
+    )
+
+    with pytest.raises(TypeError, match="bug in prepare"):
+        list(pipeline.run([Path("a.txt")]))
+
+
+def test_pipeline_propagates_stage_errors():
+    def failing_embed(texts):
+        raise RuntimeError("embedder crashed")
+
+    pipeline = IngestionPipeline(
+        prepare=lambda path: prepared(["chunk"]),
+        embed=failing_embed,
+        vector_store=RecordingStore(),
+    )
+
+    with pytest.raises(RuntimeError, match="embedder crashed"):
+        list(pipeline.run([Path("a.txt")]))
+
+
+def test_pipeline_skips_unchanged_files_and_records_completed_ones():
+    completed = []
+    store = RecordingStore()
+    pipeline = IngestionPipeline(
+        prepare=lambda path: prepared(["fresh"]),
+        embed=fake_embed,
+        vector_store=store,
+        skip=lambda path: 7 if path.name == "old.txt" else None,
+        on_complete=lambda path, count: completed.append((path.name, count)),
+    )
+
+    results = list(pipeline.run([Path("old.txt"), Path("new.txt")]))
+
+    assert results == [
+        IngestResult("old.txt", 7, skipped=True),
+        IngestResult("new.txt", 1),
+    ]
+    assert [texts for texts, _, _ in store.upserts] == [["fresh"]]
+    assert completed == [("new.txt", 1)]
+
+
+def test_pipeline_deletes_stale_chunks_after_writing_replacements():
+    store = RecordingStore()
+    pipeline = IngestionPipeline(
+        prepare=lambda path: PreparedDocument(["edited"], 3, stale_ids=["old-id"]),
+        embed=fake_embed,
+        vector_store=store,
+    )
+
+    results = list(pipeline.run([Path("book.txt")]))
+
+    assert results == [IngestResult("book.txt", 3)]
+    assert [texts for texts, _, _ in store.upserts] == [["edited"]]
+    assert store.deleted == ["old-id"]
+
+
+def test_concurrent_writes_finish_batches_in_order():
+    events = []
+
+    class SlowFirstStore(RecordingStore):
+        def add_documents(self, texts, metadatas=None, doc_embeddings=None):
+            # The first batch is still in flight when the later ones complete
+            if texts[0] == "a1":
+                time.sleep(0.2)
+            super().add_documents(texts, metadatas, doc_embeddings)
+            events.append(("upsert", texts[0]))
+
+        def delete(self, ids):
+            events.append(("delete", ids))
+
+    chunks_by_path = {"a.txt": ["a1", "a2"], "b.txt": ["b1", "b2"], "c.txt": ["c1"]}
+    pipeline = IngestionPipeline(
+        prepare=lambda path: PreparedDocument(
+            chunks_by_path[Path(path).name], 2, stale_ids=[f"old-{Path(path).stem}"]
+        ),
+        embed=fake_embed,
+        vector_store=SlowFirstStore(),
+        embed_batch_size=2,
+        write_concurrency=3,
+        on_batch=lambda written: events.append(("batch", sorted(map(str, written)))),
+    )
+
+    results = list(pipeline.run([Path(name) for name in chunks_by_path]))
+
+    assert [result.filename for result in results] == ["a.txt", "b.txt", "c.txt"]
+    assert events.index(("upsert", "b1")) < events.index(("upsert", "a1"))
+    # A file completes with the batch after its last chunk's, and its stale
+    # chunks go only once that batch is written
+    finished = [event for event in events if event[0] != "upsert"]
+    assert finished == [
+        ("batch", ["a.txt"]),
+        ("batch", ["b.txt"]),
+        ("delete", ["old-a"]),
+        ("batch", ["c.txt"]),
+        ("delete", ["old-b"]),
+        ("delete", ["old-c"]),
+    ]
+
+
+def test_failed_concurrent_write_stops_the_run():
+    class FailingStore(RecordingStore):
+        def add_documents(self, texts, metadatas=None, doc_embeddings=None):
+            raise ConnectionError("server went away")
+
+    pipeline = IngestionPipeline(
+        prepare=lambda path: prepared(["x", "y", "z"]),
+        embed=fake_embed,
+        vector_store=FailingStore(),
+        embed_batch_size=1,
+        write_concurrency=2,
+    )
+
+    with pytest.raises(ConnectionError):
+        list(pipeline.run([Path("a.txt"), Path("b.txt")]))
+
+
+def test_pipeline_completes_files_whose_chunks_were_all_suppressed():
+    completed = []
+    store = RecordingStore()
+    pipeline = IngestionPipeline(
+        prepare=lambda path: PreparedDocument([], 0, stale_ids=["old"], suppressed=2),
+        embed=fake_embed,
+        vector_store=store,
+        on_complete=lambda path, count: completed.append((path.name, count)),
+    )
+
+    results = list(pipeline.run([Path("copy.txt")]))
+
+    assert results == [IngestResult("copy.txt", 0, suppressed=2)]
+    assert completed == [("copy.txt", 0)]
+    assert store.deleted == ["old"]
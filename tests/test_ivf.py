@@ -0,0 +1,108 @@
+import numpy as np
+
+from app.db.ivf import InvertedLists, assign_lists, train_kmeans
+from app.db.mmap_store import MmapVectorStore, normalize_rows
+
+
+def clustered_vectors(n_clusters=8, per_cluster=100, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = normalize_rows(rng.standard_normal((n_clusters, dim)))
+    noise = 0.1 * rng.standard_normal((n_clusters, per_cluster, dim))
+    return normalize_rows((centers[:, None, :] + noise).reshape(-1, dim))
+
+
+def add(store, vectors, start=0):
+    store.add_documents(
+        texts=[f"chunk {start + i}" for i in range(len(vectors))],
+        metadatas=[{"source": "doc.txt"}] * len(vectors),
+        doc_embeddings=vectors.tolist(),
+    )
+
+
+def test_kmeans_recovers_clusters():
+    vectors = clustered_vectors()
+    centroids = train_kmeans(vectors, n_lists=8)
+    labels = assign_lists(vectors, centroids)
+
+    # Every true cluster maps to exactly one list
+    per_cluster = labels.reshape(8, 100)
+    assert all(len(set(row.tolist())) == 1 for row in per_cluster)
+    assert len(set(per_cluster[:, 0].tolist())) == 8
+    np.testing.assert_allclose(np.linalg.norm(centroids, axis=1), 1.0, rtol=1e-5)
+
+
+def test_inverted_lists_probe_returns_rows_of_nearest_lists():
+    centroids = np.eye(3, dtype=np.float32)
+    lists = InvertedLists(centroids)
+    lists.append(np.array([0, 1, 2, 0]))
+    assert lists.probe(np.array([1.0, 0, 0]), nprobe=1).tolist() == [0, 3]
+
+    # Rows appended after a probe are picked up by the next one
+    lists.append(np.array([0]))
+    assert lists.probe(np.array([1.0, 0.2, 0]), nprobe=2).tolist() == [0, 1, 3, 4]
+
+
+def test_store_trains_once_enough_rows_and_assigns_new_rows(tmp_path):
+    vectors = clustered_vectors(per_cluster=50)
+    store = MmapVectorStore(index_directory=str(tmp_path), ivf_lists=8, nprobe=1)
+
+    add(store, vectors[:100])
+    assert store._ivf is None  # below 40 rows per list
+
+    add(store, vectors[100:], start=100)
+    assert store._ivf is not None and len(store._ivf) == 400
+
+    # A second process picks up centroids and persisted assignments
+    reader = MmapVectorStore(index_directory=str(tmp_path), nprobe=1)
+    np.testing.assert_array_equal(reader._ivf.assignments, store._ivf.assignments)
+
+    exact = MmapVectorStore(index_directory=str(tmp_path), nprobe=8)
+    for row in (0, 123, 399):
+        query = vectors[row].tolist()
+        assert reader.similarity_search_by_vector(query, k=5) == (
+            exact.similarity_search_by_vector(query, k=5)
+        )
+
+
+def test_store_keeps_assignments_through_compaction(tmp_path):
+    vectors = clustered_vectors(per_cluster=50)
+    store = MmapVectorStore(index_directory=str(tmp_path), ivf_lists=4, nprobe=2)
+    add(store, vectors)
+    before = dict(zip(store._ids, store._ivf.assignments.tolist()))
+
+    store.delete([store._ids[row] for row in range(0, 400, 2)])
+    store.compact()
+
+    assert len(store._ivf) == 200
+    assert dict(zip(store._ids, store._ivf.assignments.tolist())) == {
+        chunk_id: before[chunk_id] for chunk_id in store._ids
+    }
+    assert sorted(p.name for p in tmp_path.joinpath("documents").glob("ivf_*")) == [
+        "ivf_centroids.2.npy",
+        "ivf_lists.2.i32",
+    ]
+
+
+def test_quantized_ivf_search_finds_nearest_chunk(tmp_path):
+    vectors = clustered_vectors(per_cluster=50)
+    store = MmapVectorStore(
+        index_directory=str(tmp_path), ivf_lists=8, nprobe=2, quantization="int8"
+    )
+    add(store, vectors)
+
+    [(text, _, distance)] = store.similarity_search_by_vector(vectors[42].tolist(), 1)
+
+    assert text == "chunk 42"
+    assert abs(distance) < 1e-5
+
+
+def test_snapshot_lists_ignore_later_assignments():
+    lists = InvertedLists(np.eye(2, dtype=np.float32))
+    lists.append(np.array([0, 1, 0]))
+    snapshot = lists.snapshot(3)
+    lists.append(np.array([0, 0]))
+
+    query = np.array([1.0, 0.0], dtype=np.float32)
+    assert snapshot.probe(query, 1).tolist() == [0, 2]
+    assert lists.probe(query, 1).tolist() == [0, 2, 3, 4]
+    assert lists.snapshot(2).probe(query, 1).tolist() == [0]
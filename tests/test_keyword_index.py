@@ -0,0 +1,187 @@
+import numpy as np
+import pytest
+
+from app.db.vector import ChromaVectorStore, make_chunk_id
+from app.rag.keyword_index import KeywordIndex, reciprocal_rank_fusion
+from app.rag.service import RAGService
+
+CHUNKS = [
+    "The whale swam past the ship in the grey morning.",
+    "Captain Ahab commanded the Pequod from its quarterdeck.",
+    "The sailors of the ship sang while the whale was hunted.",
+]
+
+
+def test_bm25_ranks_exact_entity_matches_first():
+    index = KeywordIndex()
+    list(index.index("moby.txt", CHUNKS))
+    index.commit("moby.txt")
+
+    hits = index.search("What was the name of Ahab's ship, the Pequod?", k=2)
+
+    assert hits[0][0] == make_chunk_id("moby.txt", CHUNKS[1])
+    assert hits[0][1] > hits[1][1] > 0
+    assert index.search("the of was", k=5) == []
+
+
+def test_reindexing_a_source_replaces_its_chunks(tmp_path):
+    index = KeywordIndex(str(tmp_path / "keywords.npz"))
+    list(index.index("moby.txt", CHUNKS))
+    index.commit("moby.txt")
+    list(index.index("moby.txt", ["Ishmael narrates the voyage."]))
+    index.commit("moby.txt")
+    index.save()
+
+    reopened = KeywordIndex(str(tmp_path / "keywords.npz"))
+    assert reopened.entries == 1
+    assert reopened.search("Pequod", k=5) == []
+    assert reopened.search("Ishmael", k=5)[0][0] == make_chunk_id(
+        "moby.txt", "Ishmael narrates the voyage."
+    )
+
+    # A reader in another process picks up the next save
+    list(index.index("dracula.txt", ["Jonathan Harker travels to Transylvania."]))
+    index.commit("dracula.txt")
+    index.save()
+    assert reopened.has_source("dracula.txt")
+    assert len(reopened.search("Transylvania", k=5)) == 1
+
+
+def test_staged_chunks_are_searchable_only_once_committed(tmp_path):
+    index = KeywordIndex(str(tmp_path / "keywords.npz"))
+    list(index.index("moby.txt", CHUNKS))
+    index.commit("moby.txt")
+
+    list(index.index("moby.txt", ["Ishmael narrates the voyage."]))
+    index.save()
+    assert index.search("Ishmael", k=5) == []
+    assert len(index.search("Pequod", k=5)) == 1
+
+    index.discard("moby.txt")
+    index.commit("moby.txt")  # nothing staged: the source is now empty
+    assert index.search("Pequod", k=5) == []
+    assert not index.has_source("dracula.txt")
+    assert KeywordIndex(str(tmp_path / "keywords.npz")).entries == len(CHUNKS)
+
+
+def test_search_reuses_its_row_arrays_until_the_index_changes():
+    index = KeywordIndex()
+    list(index.index("moby.txt", CHUNKS))
+    index.commit("moby.txt")
+    index.search("whale", k=5)
+    arrays = index._row_arrays
+
+    assert len(index.search("whale", k=5)) == 2
+    assert index._row_arrays is arrays
+
+    list(index.index("moby.txt", ["The whale sounded."]))
+    index.commit("moby.txt")
+    assert index.search("whale", k=5) == [
+        (make_chunk_id("moby.txt", "The whale sounded."), pytest.approx(0.2876821))
+    ]
+
+
+def test_replaced_and_discarded_rows_are_reclaimed(tmp_path):
+    index = KeywordIndex(str(tmp_path / "keywords.npz"))
+    # Staged for another source across every compaction below
+    staging = index.index("dracula.txt", ["Jonathan Harker travels to Transylvania."])
+    next(staging)
+    for _ in range(10):
+        list(index.index("moby.txt", CHUNKS))
+        index.commit("moby.txt")
+        list(index.index("moby.txt", ["Ishmael narrates the voyage."]))
+        index.discard("moby.txt")
+
+    assert len(index._ids) <= 2 * (len(CHUNKS) + 1)
+    assert len(index.search("whale", k=5)) == 2
+    assert index.search("Ishmael", k=5) == []
+    assert list(staging) == []
+    index.commit("dracula.txt")
+    index.save()
+    reopened = KeywordIndex(str(tmp_path / "keywords.npz"))
+    assert reopened.entries == len(CHUNKS) + 1
+    assert reopened.search("Transylvania", k=5)[0][0] == make_chunk_id(
+        "dracula.txt", "Jonathan Harker travels to Transylvania."
+    )
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d", "a"]], k=3)
+    assert fused == ["a", "c", "b"]
+
+
+@pytest.fixture
+def hybrid_service(tmp_path, settings, monkeypatch):
+    # Chunks embed near the first axis and the query on the second, so vector
+    # search ranks a document's chunks by position, its last chunks worst
+    def fake_embed_documents(texts):
+        return np.array(
+            [[1.0, 0.01 * (len(texts) - i), 0.0] for i in range(len(texts))],
+            dtype=np.float32,
+        )
+
+    monkeypatch.setattr("app.rag.embeddings.embed_documents", fake_embed_documents)
+    monkeypatch.setattr(
+        "app.rag.embeddings.embed_query",
+        lambda text: np.array([0.0, 1.0, 0.0], dtype=np.float32),
+    )
+    store = ChromaVectorStore(persist_directory=str(tmp_path / "chroma_db"))
+    return RAGService(
+        vector_store=store,
+        settings=settings.model_copy(
+            update={
+                "INGEST_MANIFEST_PATH": None,
+                "TEXT_CACHE_DIR": None,
+                "DEDUP_INDEX_DIR": None,
+                "EMBEDDING_CACHE_DIR": None,
+                "KEYWORD_INDEX_DIR": str(tmp_path / "keywords"),
+                "RETRIEVAL_MODE": "hybrid",
+            }
+        ),
+    )
+
+
+def test_hybrid_retrieve_fuses_keyword_matches(tmp_path, hybrid_service, monkeypatch):
+    doc = tmp_path / "moby.txt"
+    filler = [f"Paragraph {i} about the open sea. " + "x" * 1450 for i in range(15)]
+    doc.write_text("".join(filler + ["Captain Ahab of the Pequod. " * 50]))
+    hybrid_service.ingest(str(doc))
+
+    query = np.array([0.0, 1.0, 0.0], dtype=np.float32)
+    vector_only = hybrid_service.vector_store.similarity_search_by_vector(query, k=6)
+    assert not any("Pequod" in text for text, _, _ in vector_only)
+
+    results = hybrid_service.retrieve("Which ship was the Pequod?", k=2)
+
+    assert any("Pequod" in text for text, _, _ in results)
+    assert all(meta["source"] == str(doc) for _, meta, _ in results)
+    assert all(0.0 <= distance <= 4.0 for _, _, distance in results)
+    assert hybrid_service.retrieve_many(["Which ship was the Pequod?"], k=2) == [
+        results
+    ]
+
+    def no_model(text):
+        raise AssertionError("keyword search must not embed")
+
+    monkeypatch.setattr("app.rag.embeddings.embed_query", no_model)
+    text, meta, score = hybrid_service.keyword_search("Pequod", k=1)[0]
+    assert "Pequod" in text and meta["source"] == str(doc) and score > 0
+
+
+def test_failed_stream_keeps_the_previous_postings(
+    tmp_path, hybrid_service, monkeypatch
+):
+    doc = tmp_path / "moby.txt"
+    doc.write_text("Captain Ahab of the Pequod. " * 20)
+    hybrid_service.ingest(str(doc))
+
+    def failing_stream(path):
+        yield "Ishmael narrates the voyage. " * 100
+        raise OSError("disk went away")
+
+    monkeypatch.setattr("app.rag.service.stream_document", failing_stream)
+    hybrid_service.settings.INGEST_STREAM_MIN_MB = 0
+    assert hybrid_service.ingest(str(doc)) == 0
+
+    assert hybrid_service.keyword_search("Ishmael", k=5) == []
+    assert "Pequod" in hybrid_service.keyword_search("Pequod", k=1)[0][0]
@@ -10,9 +10,15 @@ def test_handle_command_ingest_all_default():
 
     cli = CLI(chat_service, rag_service, settings, planning_service=None)
 
-    with patch("app.cli.ingest_directory_with_report") as mock_ingest:
+    with patch.object(cli.jobs, "start_ingest") as mock_ingest:
         cli._handle_command(INGEST_ALL)
-        mock_ingest.assert_called_once_with(rag_service, settings.CORPUS_DIR)
+        mock_ingest.assert_called_once_with(
+            rag_service,
+            settings.CORPUS_DIR,
+            resume=False,
+            profile=None,
+            embed_threads=settings.BACKGROUND_INGEST_THREADS,
+        )
 
 
 def test_handle_command_ingest_all_large():
@@ -22,6 +28,12 @@ def test_handle_command_ingest_all_large():
 
     cli = CLI(chat_service, rag_service, settings, planning_service=None)
 
-    with patch("app.cli.ingest_directory_with_report") as mock_ingest:
+    with patch.object(cli.jobs, "start_ingest") as mock_ingest:
         cli._handle_command(f"{INGEST_ALL} --large")
-        mock_ingest.assert_called_once_with(rag_service, settings.CORPUS_LARGE_DIR)
+        mock_ingest.assert_called_once_with(
+            rag_service,
+            settings.CORPUS_LARGE_DIR,
+            resume=False,
+            profile=None,
+            embed_threads=settings.BACKGROUND_INGEST_THREADS,
+        )
@@ -0,0 +1,152 @@
+import numpy as np
+import pytest
+
+from app.db.mmap_store import MmapVectorStore, top_k_rows
+from app.db.vector import make_chunk_id
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MmapVectorStore(index_directory=str(tmp_path / "index"))
+
+
+def add(store, texts, vectors, source="doc.txt"):
+    store.add_documents(
+        texts=texts,
+        metadatas=[{"source": source}] * len(texts),
+        doc_embeddings=vectors,
+    )
+
+
+def test_search_returns_nearest_chunks_with_l2_distances(store):
+    add(store, ["east", "north", "west"], [[1, 0], [0, 2], [-1, 0]])
+
+    results = store.similarity_search_by_vector([0.9, 0.1], k=2)
+
+    assert [text for text, _, _ in results] == ["east", "north"]
+    assert results[0][1] == {"source": "doc.txt"}
+    cosine = 0.9 / np.hypot(0.9, 0.1)
+    assert results[0][2] == pytest.approx(2 - 2 * cosine, abs=1e-6)
+
+
+def test_upsert_and_delete_hide_superseded_rows(store):
+    add(store, ["east", "west"], [[1, 0], [-1, 0]])
+    add(store, ["east"], [[0, 1]])  # same id: replaces the earlier row
+
+    results = store.similarity_search_by_vector([1, 0], k=5)
+    assert [text for text, _, _ in results] == ["east", "west"]
+    assert results[0][2] == pytest.approx(2.0)
+    assert store.count == 2
+
+    store.delete([make_chunk_id("doc.txt", "west")])
+
+    assert store.count == 1
+    assert store.get_ids_by_source("doc.txt") == {make_chunk_id("doc.txt", "east")}
+
+
+def test_get_documents_returns_texts_and_unit_vectors_by_id(store):
+    add(store, ["east", "north"], [[2, 0], [0, 3]])
+    store.delete([make_chunk_id("doc.txt", "east")])
+
+    found = store.get_documents(
+        [make_chunk_id("doc.txt", "north"), make_chunk_id("doc.txt", "east")]
+    )
+
+    text, metadata, vector = found[0]
+    assert (text, metadata) == ("north", {"source": "doc.txt"})
+    assert vector.tolist() == [0.0, 1.0]
+    assert found[1] is None
+
+
+def test_add_documents_embeds_in_fixed_size_windows(store, monkeypatch):
+    windows = []
+
+    def embed(texts):
+        windows.append(len(texts))
+        return np.ones((len(texts), 2), dtype=np.float32)
+
+    monkeypatch.setattr("app.db.mmap_store.ADD_WINDOW", 2)
+    monkeypatch.setattr("app.rag.embeddings.embed_documents", embed)
+
+    texts = ["a", "b", "c", "d", "e"]
+    store.add_documents(texts, metadatas=[{"source": "doc.txt"}] * len(texts))
+
+    assert windows == [2, 2, 1]
+    assert store.get_ids_by_source("doc.txt") == {
+        make_chunk_id("doc.txt", text) for text in texts
+    }
+
+
+def test_second_instance_sees_rows_appended_by_writer(tmp_path):
+    writer = MmapVectorStore(index_directory=str(tmp_path))
+    reader = MmapVectorStore(index_directory=str(tmp_path))
+    assert reader.similarity_search_by_vector([1, 0], k=1) == []
+
+    add(writer, ["east"], [[1, 0]])
+
+    assert reader.similarity_search_by_vector([1, 0], k=1)[0][0] == "east"
+
+
+def test_compact_keeps_live_rows_and_readers_follow(tmp_path):
+    writer = MmapVectorStore(index_directory=str(tmp_path))
+    reader = MmapVectorStore(index_directory=str(tmp_path))
+    add(writer, ["a", "b", "c"], [[1, 0], [0, 1], [-1, 0]], source="abc.txt")
+    add(writer, ["z"], [[0, -1]], source="z.txt")
+    writer.delete(sorted(writer.get_ids_by_source("abc.txt"))[:2])
+
+    writer.compact()
+
+    assert reader.count == 2
+    assert writer.get_ids_by_source("z.txt") == reader.get_ids_by_source("z.txt")
+    assert reader.similarity_search_by_vector([0, -1], k=1)[0][0] == "z"
+
+
+def test_search_hydrates_rows_it_scored_despite_concurrent_compaction(
+    store, monkeypatch
+):
+    add(store, ["east", "north", "west"], [[1, 0], [0, 1], [-1, 0]])
+    search = store._search
+
+    def compact_then_search(view, query_vector, k):
+        # Lands between scoring's snapshot and hydration, renumbering the rows
+        store.delete([make_chunk_id("doc.txt", "east")])
+        store.compact()
+        return search(view, query_vector, k)
+
+    monkeypatch.setattr(store, "_search", compact_then_search)
+
+    results = store.similarity_search_by_vector([-1, 0], k=1)
+    assert [text for text, _, _ in results] == ["west"]
+    assert results[0][2] == pytest.approx(0.0)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{"quantization": "int8"}, {"quantization": "binary"}, {"ivf_lists": 2}],
+)
+def test_search_scores_its_view_while_documents_are_added(
+    tmp_path, monkeypatch, options
+):
+    store = MmapVectorStore(
+        index_directory=str(tmp_path / "index"), nprobe=1, **options
+    )
+    vectors = np.random.default_rng(0).normal(size=(200, 8))
+    add(store, [f"chunk {i}" for i in range(100)], vectors[:100])
+    assert store._quantized is not None or store._ivf is not None
+    search = store._search
+
+    def add_then_search(view, query_vector, k):
+        # Appends to the live quantized codes and IVF lists behind the view
+        add(store, [f"chunk {i}" for i in range(100, 200)], vectors[100:])
+        return search(view, query_vector, k)
+
+    monkeypatch.setattr(store, "_search", add_then_search)
+
+    assert store.similarity_search_by_vector(vectors[5], k=3)[0][0] == "chunk 5"
+    assert store.similarity_search_by_vector(vectors[150], k=1)[0][0] == "chunk 150"
+
+
+def test_top_k_rows_orders_best_first():
+    scores = np.array([0.1, 0.9, 0.5, 0.7])
+    assert top_k_rows(scores, 3).tolist() == [1, 3, 2]
+    assert top_k_rows(scores, 10).tolist() == [1, 3, 2, 0]
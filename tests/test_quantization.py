@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from app.db.mmap_store import MmapVectorStore, normalize_rows
+from app.db.quantization import QuantizedIndex, quantize_binary, quantize_int8
+
+
+def random_vectors(rows, dim=64, seed=0):
+    return normalize_rows(np.random.default_rng(seed).standard_normal((rows, dim)))
+
+
+def test_int8_round_trip_is_close():
+    vectors = random_vectors(50)
+    codes, scales = quantize_int8(vectors)
+
+    assert codes.dtype == np.int8
+    np.testing.assert_allclose(codes * scales[:, None], vectors, atol=scales.max())
+
+
+def test_binary_codes_pack_sign_bits():
+    codes = quantize_binary(np.array([[1.0, -1.0, 0.5, -0.5, 1, 1, 1, 1, -1]]))
+
+    assert codes.shape == (1, 2)
+    assert codes.tolist() == [[0b10101111, 0]]
+
+
+@pytest.mark.parametrize("mode,bytes_per_row", [("int8", 64 + 4), ("binary", 8)])
+def test_quantized_index_ranks_exact_match_first(mode, bytes_per_row):
+    vectors = random_vectors(200)
+    index = QuantizedIndex(mode, dim=64)
+    index.append(vectors[:120])
+    index.append(vectors[120:])
+
+    assert len(index) == 200
+    assert index.nbytes == 200 * bytes_per_row
+    assert int(np.argmax(index.scores(vectors[137]))) == 137
+
+
+def test_quantized_index_rejects_none_mode():
+    with pytest.raises(ValueError):
+        QuantizedIndex("none", dim=8)
+
+
+def build_stores(tmp_path, vectors, mode):
+    exact = MmapVectorStore(index_directory=str(tmp_path))
+    exact.add_documents(
+        texts=[f"chunk {i}" for i in range(len(vectors))],
+        metadatas=[{"source": "doc.txt"}] * len(vectors),
+        doc_embeddings=vectors.tolist(),
+    )
+    quantized = MmapVectorStore(
+        index_directory=str(tmp_path), quantization=mode, rescore_multiplier=10
+    )
+    return exact, quantized
+
+
+def test_int8_rescored_search_matches_exact_search(tmp_path):
+    exact, quantized = build_stores(tmp_path, random_vectors(300, seed=1), "int8")
+
+    for query in random_vectors(5, seed=2):
+        expected = exact.similarity_search_by_vector(query.tolist(), k=5)
+        results = quantized.similarity_search_by_vector(query.tolist(), k=5)
+        assert [text for text, _, _ in results] == [text for text, _, _ in expected]
+        # Returned distances come from the float rescoring, not the codes
+        assert [d for _, _, d in results] == pytest.approx([d for _, _, d in expected])
+
+    assert quantized.index_nbytes < exact.index_nbytes
+
+
+def test_binary_rescored_search_finds_near_duplicates(tmp_path):
+    vectors = random_vectors(300, seed=1)
+    exact, quantized = build_stores(tmp_path, vectors, "binary")
+    noise = 0.05 * np.random.default_rng(3).standard_normal(vectors.shape)
+
+    for row in (3, 150, 299):
+        query = (vectors[row] + noise[row]).tolist()
+        [(text, _, distance)] = quantized.similarity_search_by_vector(query, k=1)
+        [(_, _, exact_distance)] = exact.similarity_search_by_vector(query, k=1)
+        assert text == f"chunk {row}"
+        assert distance == pytest.approx(exact_distance, abs=1e-5)
+
+    assert quantized.index_nbytes * 32 <= exact.index_nbytes
+
+
+def test_quantized_store_picks_up_appends_and_deletes(tmp_path):
+    store = MmapVectorStore(index_directory=str(tmp_path), quantization="int8")
+    store.add_documents(
+        texts=["east", "west"],
+        metadatas=[{"source": "a.txt"}] * 2,
+        doc_embeddings=[[1, 0], [-1, 0]],
+    )
+    store.add_documents(
+        texts=["north"], metadatas=[{"source": "b.txt"}], doc_embeddings=[[0, 1]]
+    )
+    store.delete(list(store.get_ids_by_source("a.txt")))
+
+    results = store.similarity_search_by_vector([1, 0], k=5)
+
+    assert [text for text, _, _ in results] == ["north"]
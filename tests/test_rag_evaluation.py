@@ -26,6 +26,7 @@ def test_rag_accuracy_and_latency():
 
     # Track metrics by question type
     latencies: list[float] = []
+    sequential_distances: list[list[float]] = []
     factual_success = 0
     factual_total = 0
     factual_failures: list[tuple[str, list[str]]] = []
@@ -46,6 +47,7 @@ def test_rag_accuracy_and_latency():
 
         # Extract text from results (handles tuple or string format)
         texts = [r[0] if isinstance(r, tuple) else r for r in results]
+        sequential_distances.append([r[-1] for r in results])
         combined_text = " ".join(texts).lower()
 
         # Check if any expected keyword appears in top-5 results
@@ -82,6 +84,15 @@ def test_rag_accuracy_and_latency():
     median_latency = statistics.median(latencies)
     p95_latency = sorted(latencies)[int(len(latencies) * 0.95)]
 
+    # Same questions as one batch: one encode call and one vector-store query
+    start = time.perf_counter()
+    batched_results = rag_service.vector_store.similarity_search_many(
+        [item["question"] for item in questions], k=5
+    )
+    batch_seconds = time.perf_counter() - start
+    sequential_qps = total_questions / (sum(latencies) / 1000)
+    batched_qps = total_questions / batch_seconds
+
     # Report results
     print(f"\n{'=' * 70}")
     print(f"RAG EVALUATION: {total_questions} questions")
@@ -97,6 +108,10 @@ def test_rag_accuracy_and_latency():
     )
     print("")
     print(f"Latency:  Median={median_latency:.0f}ms | P95={p95_latency:.0f}ms")
+    print(
+        f"Throughput: sequential={sequential_qps:.1f} q/s | "
+        f"batched={batched_qps:.1f} q/s ({batched_qps / sequential_qps:.1f}x)"
+    )
     print(f"{'=' * 70}")
 
     # Show failures by type
@@ -113,6 +128,10 @@ def test_rag_accuracy_and_latency():
     print("=" * 70)
 
     # Assert requirements
+    # Batched encoding can differ in the last bits, so near-ties may swap places:
+    # compare the distances at each rank, not the ranked texts
+    for results, distances in zip(batched_results, sequential_distances, strict=True):
+        assert [r[-1] for r in results] == pytest.approx(distances, abs=1e-4)
     assert overall_accuracy >= 65, (
         f"Overall accuracy {overall_accuracy:.1f}% below 65% threshold"
     )
@@ -1,6 +1,20 @@
+import itertools
+import re
+
 import pytest
-from app.rag.loader import load_document
-from app.rag.splitter import split_text
+from app.rag import loader
+from app.rag.loader import (
+    configure_pdf_extraction,
+    configure_text_cache,
+    load_document,
+    stream_document,
+)
+from app.rag.splitter import (
+    iter_split_text,
+    split_text,
+    split_text_by_tokens,
+    split_token_spans,
+)
 from app.core.utils import ValidationError
 
 # --- Test DocumentLoader ---
@@ -46,6 +60,89 @@ def test_document_loader_extracts_txt_text(tmp_path):
     assert "This is a simple text file." in text
 
 
+def make_pdf(page_texts):
+    """Build a PDF with one line of Helvetica text per page."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for text in page_texts:
+        stream = f"BT /F1 24 Tf 100 700 Td ({text}) Tj ET".encode()
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /Resources << /Font << /F1 3 0 R >> >> "
+            b"/MediaBox [0 0 612 792] /Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(kids),
+        len(kids),
+    )
+
+    pdf = b"%PDF-1.1\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    return pdf
+
+
+def test_streamed_text_matches_loaded_text(tmp_path, monkeypatch):
+    # Newline runs and paragraphs straddle the tiny block boundaries
+    text = "Line one\nline two\n\n\n\nNext para\n\nLast\nline\n" * 50
+    file_path = tmp_path / "book.txt"
+    file_path.write_text(text, encoding="utf-8")
+    monkeypatch.setattr(loader, "STREAM_BLOCK_CHARS", 7)
+    configure_text_cache(None)
+
+    blocks = list(stream_document(str(file_path)))
+
+    assert len(blocks) > 1
+    assert "".join(blocks) == load_document(str(file_path))
+
+
+@pytest.fixture
+def pdf_extraction():
+    # Extract for real rather than serving text cached by an earlier test
+    configure_text_cache(None)
+    yield configure_pdf_extraction
+    configure_pdf_extraction(workers=1)
+
+
+def test_parallel_pdf_extraction_keeps_page_order(tmp_path, pdf_extraction):
+    pdf_path = tmp_path / "book.pdf"
+    pdf_path.write_bytes(make_pdf([f"Page {i}" for i in range(10)]))
+    serial = load_document(str(pdf_path))
+
+    pdf_extraction(workers=2, min_pages=4)
+    parallel = load_document(str(pdf_path))
+
+    assert parallel == serial
+    assert parallel.split("\n\n") == [f"Page {i}" for i in range(10)]
+    assert loader._pdf_pool is not None
+
+
+def test_small_pdf_is_extracted_in_process(tmp_path, pdf_extraction):
+    pdf_path = tmp_path / "short.pdf"
+    pdf_path.write_bytes(make_pdf(["Only page"]))
+
+    pdf_extraction(workers=2, min_pages=4)
+
+    assert load_document(str(pdf_path)) == "Only page"
+    assert loader._pdf_pool is None
+
+
 # --- Test TextSplitter ---
 
 
@@ -87,3 +184,85 @@ def test_splitter_does_not_infinite_loop():
     assert len(chunks) == 2
     assert chunks[0] == "1234567890"
     assert chunks[1] == "2345678901"
+
+
+@pytest.mark.parametrize("piece_size", [1, 4, 9, 100])
+def test_iter_split_text_matches_split_text(piece_size):
+    text = "".join(str(i % 10) for i in range(53))
+    pieces = [text[i : i + piece_size] for i in range(0, len(text), piece_size)]
+
+    for chunk_size, overlap in [(5, 2), (10, 9), (60, 10), (10, 0)]:
+        assert list(iter_split_text(pieces, chunk_size, overlap)) == split_text(
+            text, chunk_size, overlap
+        )
+    assert list(iter_split_text([], 5, 2)) == split_text("", 5, 2)
+
+
+WORD = r"\w+|[^\w\s]"
+
+
+class WordTokenizer:
+    """Stand-in for a fast tokenizer: one token per word or punctuation mark."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, text, **kwargs):
+        self.calls += 1
+        return {"offset_mapping": [m.span() for m in re.finditer(WORD, text)]}
+
+
+def token_count(text):
+    return len(re.findall(WORD, text))
+
+
+def test_token_splitter_tokenizes_once_and_respects_budget():
+    text = " ".join(f"Sentence number {i} is here." for i in range(100))
+    tokenizer = WordTokenizer()
+
+    spans = split_text_by_tokens(text, tokenizer, chunk_tokens=20, overlap_tokens=4)
+
+    assert tokenizer.calls == 1
+    assert len(spans) > 1
+    assert spans[0].start == 0
+    assert spans[-1].end == len(text)
+    assert all(token_count(text[s.start : s.end]) <= 20 for s in spans)
+    # Consecutive chunks overlap and every chunk starts after the previous one
+    for prev, span in itertools.pairwise(spans):
+        assert prev.start < span.start < prev.end
+
+
+def test_token_splitter_snaps_to_sentence_and_paragraph_breaks():
+    text = "One two three. Four five six seven eight nine ten eleven"
+    offsets = [m.span() for m in re.finditer(WORD, text)]
+
+    spans = split_token_spans(
+        text, offsets, chunk_tokens=8, overlap_tokens=0, snap_fraction=0.75
+    )
+    assert text[spans[0].start : spans[0].end] == "One two three."
+
+    text = "Alpha beta.\n\nGamma delta. Epsilon zeta eta theta"
+    offsets = [m.span() for m in re.finditer(WORD, text)]
+    spans = split_token_spans(
+        text, offsets, chunk_tokens=8, overlap_tokens=0, snap_fraction=0.75
+    )
+    assert text[spans[0].start : spans[0].end] == "Alpha beta."
+
+
+def test_token_splitter_does_not_cut_inside_words():
+    # Word-pieces: "unbelievable" -> "un", "##believ", "##able"
+    text = "an unbelievable tale"
+    offsets = [(0, 2), (3, 5), (5, 11), (11, 15), (16, 20)]
+
+    spans = split_token_spans(
+        text, offsets, chunk_tokens=3, overlap_tokens=1, snap_fraction=1.0
+    )
+
+    assert [text[s.start : s.end] for s in spans] == ["an", "unbelievable", "tale"]
+
+
+def test_token_splitter_short_and_empty_text():
+    assert split_text_by_tokens("", WordTokenizer()) == []
+    text = "Just a few words."
+    spans = split_text_by_tokens(text, WordTokenizer())
+    assert [(s.start, s.end) for s in spans] == [(0, len(text))]
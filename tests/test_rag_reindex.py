@@ -0,0 +1,106 @@
+import pytest
+
+from app.db.vector import ChromaVectorStore
+from app.rag.service import RAGService
+
+
+@pytest.fixture
+def embedded_texts(monkeypatch):
+    """Replace the embedding model with a deterministic stub and record its inputs."""
+    calls = []
+
+    def fake_embed_documents(texts):
+        calls.append(list(texts))
+        return [[float(len(text)), 1.0, 0.0] for text in texts]
+
+    monkeypatch.setattr("app.rag.embeddings.embed_documents", fake_embed_documents)
+    return calls
+
+
+@pytest.fixture
+def rag_service(tmp_path, settings):
+    store = ChromaVectorStore(
+        persist_directory=str(tmp_path / "chroma_db"),
+        collection_name="test_reindex",
+    )
+    return RAGService(
+        vector_store=store,
+        settings=settings.model_copy(
+            update={
+                "INGEST_MANIFEST_PATH": None,
+                "TEXT_CACHE_DIR": None,
+                "DEDUP_INDEX_DIR": None,
+                "KEYWORD_INDEX_DIR": None,
+            }
+        ),
+    )
+
+
+def test_reingest_embeds_only_changed_chunks_and_deletes_stale(
+    tmp_path, rag_service, embedded_texts
+):
+    doc = tmp_path / "book.txt"
+    paragraphs = [f"Paragraph {i} " + "x" * 1480 for i in range(4)]
+    doc.write_text("".join(paragraphs))
+
+    first_count = rag_service.ingest(str(doc))
+    stored_before = rag_service.vector_store.get_ids_by_source(str(doc))
+    assert len(stored_before) == first_count
+
+    # Same-length edit inside the last paragraph only
+    paragraphs[-1] = paragraphs[-1].replace("Paragraph 3", "Paragraph Z")
+    doc.write_text("".join(paragraphs))
+    embedded_texts.clear()
+
+    second_count = rag_service.ingest(str(doc))
+
+    re_embedded = [text for call in embedded_texts for text in call]
+    assert second_count == first_count
+    assert 0 < len(re_embedded) < first_count
+    assert all("Paragraph Z" in text for text in re_embedded)
+
+    stored_after = rag_service.vector_store.get_ids_by_source(str(doc))
+    assert len(stored_after) == first_count
+    assert stored_after != stored_before
+
+
+def test_reingest_unchanged_document_embeds_nothing(
+    tmp_path, rag_service, embedded_texts
+):
+    doc = tmp_path / "note.txt"
+    doc.write_text("The secret code is BLUE-HORIZON-99.")
+
+    assert rag_service.ingest(str(doc)) == 1
+    embedded_texts.clear()
+
+    assert rag_service.ingest(str(doc)) == 1
+    assert embedded_texts == []
+
+
+def test_streamed_reingest_matches_buffered_ingest(
+    tmp_path, rag_service, embedded_texts, monkeypatch
+):
+    doc = tmp_path / "large.txt"
+    paragraphs = [f"Paragraph {i}\nwrapped " + "y" * 1480 for i in range(6)]
+    doc.write_text("\n\n".join(paragraphs))
+    buffered_count = rag_service.ingest(str(doc))
+    buffered_ids = rag_service.vector_store.get_ids_by_source(str(doc))
+    rag_service.vector_store.delete(sorted(buffered_ids))
+
+    rag_service.settings = rag_service.settings.model_copy(
+        update={"INGEST_STREAM_MIN_MB": 0}
+    )
+    monkeypatch.setattr("app.rag.loader.STREAM_BLOCK_CHARS", 1000)
+    assert rag_service.ingest(str(doc)) == buffered_count
+    assert rag_service.vector_store.get_ids_by_source(str(doc)) == buffered_ids
+
+    paragraphs[-1] = paragraphs[-1].replace("Paragraph 5", "Paragraph Z")
+    doc.write_text("\n\n".join(paragraphs))
+    embedded_texts.clear()
+
+    assert rag_service.ingest(str(doc)) == buffered_count
+    re_embedded = [text for call in embedded_texts for text in call]
+    assert 0 < len(re_embedded) < buffered_count
+    stored = rag_service.vector_store.get_ids_by_source(str(doc))
+    assert len(stored) == buffered_count
+    assert stored != buffered_ids
@@ -0,0 +1,75 @@
+from unittest.mock import Mock
+
+from app.rag.retrieval_cache import RetrievalCache
+from app.rag.service import RAGService
+
+
+def test_query_embeddings_are_shared_across_normalized_queries():
+    cache = RetrievalCache()
+    embedded = []
+
+    def embed(text):
+        embedded.append(text)
+        return [1.0, 2.0]
+
+    key_a, vector_a = cache.embedding("What is  the Pequod?", embed)
+    key_b, vector_b = cache.embedding("what is the pequod?", embed)
+
+    assert embedded == ["what is the pequod?"]
+    assert key_a == key_b
+    assert vector_a.tolist() == vector_b.tolist() == [1.0, 2.0]
+    stats = cache.stats()
+    assert (stats.embedding_hits, stats.embedding_misses) == (1, 1)
+
+
+def test_results_are_cached_per_k_until_invalidated():
+    cache = RetrievalCache()
+    search = Mock(return_value=[("text", {"source": "a.txt"}, 0.5)])
+
+    cache.results("key", 10, search)
+    cache.results("key", 10, search)
+    cache.results("key", 5, search)
+    assert search.call_count == 2
+
+    cache.invalidate()
+    cache.results("key", 10, search)
+
+    assert search.call_count == 3
+    stats = cache.stats()
+    assert stats.collection_version == 1
+    assert stats.result_hits == 1
+    assert stats.saved_ms >= 0
+
+
+def test_rag_service_retrieve_hits_cache_and_ingest_invalidates(
+    settings, monkeypatch, tmp_path
+):
+    monkeypatch.setattr("app.rag.embeddings.embed_query", lambda text: [0.1, 0.2])
+    store = Mock()
+    store.similarity_search_by_vector.return_value = [("chunk", {"source": "x"}, 0.3)]
+    service = RAGService(
+        vector_store=store,
+        settings=settings.model_copy(
+            update={
+                "INGEST_MANIFEST_PATH": None,
+                "EMBEDDING_CACHE_DIR": None,
+                "TEXT_CACHE_DIR": None,
+                "DEDUP_INDEX_DIR": None,
+                "KEYWORD_INDEX_DIR": None,
+            }
+        ),
+    )
+
+    first = service.retrieve("Who is Ahab?")
+    second = service.retrieve("who is ahab?")
+
+    assert first == second
+    assert store.similarity_search_by_vector.call_count == 1
+
+    store.get_ids_by_source.return_value = set()
+    doc = tmp_path / "new.txt"
+    doc.write_text("Ahab is the captain.")
+    service.ingest(str(doc))
+    service.retrieve("Who is Ahab?")
+
+    assert store.similarity_search_by_vector.call_count == 2
@@ -0,0 +1,96 @@
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from app.cli import CLI, PLAN
+from app.core.startup import Lazy, StartupProfile, resolve, start_warm_up
+
+
+def test_lazy_builds_once_across_threads():
+    calls = []
+
+    def build():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    lazy = Lazy(build)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(lazy.get())) for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len({id(r) for r in results}) == 1
+    assert lazy.loaded
+
+
+def test_lazy_retries_after_failure():
+    attempts = iter([RuntimeError("offline"), "ready"])
+
+    def build():
+        result = next(attempts)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    lazy = Lazy(build)
+    with pytest.raises(RuntimeError):
+        lazy.get()
+    assert not lazy.loaded
+    assert lazy.get() == "ready"
+
+
+def test_resolve_passes_plain_values_through():
+    service = Mock()
+    assert resolve(service) is service
+    assert resolve(Lazy(lambda: service)) is service
+
+
+def test_warm_up_continues_after_a_failed_step():
+    done = []
+
+    def fail():
+        raise RuntimeError("no model")
+
+    start_warm_up([("model", fail), ("chat", lambda: done.append("chat"))]).join(5)
+
+    assert done == ["chat"]
+
+
+def test_profile_report_lists_steps_and_time_to_prompt():
+    profile = StartupProfile()
+    with profile.timed("RAGService", "init"):
+        pass
+    profile.mark_first_prompt()
+
+    report = profile.report()
+
+    assert "RAGService" in report
+    assert "MainThread" in report
+    assert "Time to first prompt:" in report
+
+
+def test_cli_builds_services_only_when_a_command_needs_them():
+    planning = Mock()
+    planning.plan.return_value = []
+    build_planning = Mock(return_value=planning)
+    build_rag = Mock()
+    cli = CLI(
+        chat_service=Lazy(Mock()),
+        rag_service=Lazy(build_rag),
+        settings=Mock(),
+        planning_service=Lazy(build_planning),
+    )
+
+    cli._handle_command(f"{PLAN} a trip to Tokyo")
+
+    build_planning.assert_called_once()
+    planning.plan.assert_called_once_with("a trip to Tokyo")
+    build_rag.assert_not_called()
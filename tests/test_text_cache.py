@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from app.rag import loader
+from app.rag.text_cache import TextCache
+
+
+@pytest.fixture
+def text_cache(tmp_path):
+    loader.configure_text_cache(str(tmp_path / "text_cache"))
+    yield
+    loader.configure_text_cache(None)
+
+
+def test_load_document_skips_parsing_on_cache_hit(tmp_path, text_cache, monkeypatch):
+    doc = tmp_path / "book.txt"
+    doc.write_text("Call me\nIshmael.\n\n\n\nSome years ago.")
+    first = loader.load_document(str(doc))
+
+    monkeypatch.setattr(loader, "_load_txt", lambda path: pytest.fail("parsed"))
+    # A fresh cache instance reads the entry back from disk
+    loader.configure_text_cache(str(tmp_path / "text_cache"))
+
+    assert (
+        loader.load_document(str(doc)) == first == "Call me Ishmael.\n\nSome years ago."
+    )
+    stats = loader.text_cache_stats()
+    assert stats is not None
+    assert (stats.hits, stats.misses) == (1, 0)
+
+
+def test_cache_misses_on_changed_content_or_loader_version(tmp_path):
+    cache = TextCache(str(tmp_path), version=1)
+    cache.put("abc", "old text")
+
+    assert cache.get("abc") == "old text"
+    assert cache.get("def") is None
+    assert TextCache(str(tmp_path), version=2).get("abc") is None
+
+
+def test_cache_evicts_least_recently_used_over_size_cap(tmp_path):
+    text = os.urandom(2000).hex()
+    cache = TextCache(str(tmp_path), version=1)
+    for i in range(3):
+        cache.put(f"doc{i}", text)
+        entry = cache._entry_path(f"doc{i}")
+        os.utime(entry, (1_000_000 + i, 1_000_000 + i))
+    # Room for three entries but not four
+    cache.max_bytes = int(entry.stat().st_size * 3.5)
+
+    # Reading doc0 makes doc1 the least recently used entry
+    assert cache.get("doc0") == text
+    cache.put("doc3", text)
+
+    assert cache.get("doc1") is None
+    assert cache.get("doc0") == cache.get("doc3") == text
+    assert cache.evictions == 1
+
+
+def test_cache_discards_corrupt_entries(tmp_path):
+    cache = TextCache(str(tmp_path), version=1)
+    cache.put("abc", "text")
+    cache._entry_path("abc").write_bytes(b"not zlib")
+
+    assert cache.get("abc") is None
+    assert not cache._entry_path("abc").exists()
@@ -1,4 +1,11 @@
+from contextlib import suppress
+from unittest.mock import Mock
+
+import numpy as np
 import pytest
+from chromadb.errors import InternalError, InvalidArgumentError, NotFoundError
+
+from app.db.chunk_store import MissingChunkError
 from app.db.vector import ChromaVectorStore
 
 
@@ -36,7 +43,89 @@ def test_local_embeddings_and_chroma_integration(tmp_path):
     assert results[0][1] == {"category": "food"}
 
     # Cleanup (optional, but good for local usage)
-    try:
+    with suppress(NotFoundError):
         store.client.delete_collection("test_integration_collection")
-    except Exception:
-        pass
+
+
+@pytest.fixture
+def mock_store(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.db.vector.UPSERT_RETRY_SECONDS", 0)
+    store = ChromaVectorStore(
+        persist_directory=str(tmp_path / "chroma"), upsert_batch_size=4
+    )
+    store.client = Mock()
+    store.client.get_max_batch_size.return_value = 3
+    return store
+
+
+def test_upserts_are_capped_by_max_batch_size_and_reuse_the_collection(mock_store):
+    texts = [f"chunk {i}" for i in range(7)]
+    vectors = np.arange(14, dtype=np.float64).reshape(7, 2)
+
+    mock_store.add_documents(texts, [{"source": "a.txt"}] * 7, vectors)
+    mock_store.delete(["old-id"])
+
+    collection = mock_store.client.get_or_create_collection.return_value
+    assert mock_store.client.get_or_create_collection.call_count == 1
+    upserts = [c.kwargs for c in collection.upsert.call_args_list]
+    assert [u["documents"] for u in upserts] == [texts[0:3], texts[3:6], texts[6:]]
+    assert upserts[2]["embeddings"].tolist() == [[12.0, 13.0]]
+    assert upserts[2]["embeddings"].dtype == np.float32
+
+
+def test_transient_upsert_errors_are_retried(mock_store):
+    collection = mock_store.client.get_or_create_collection.return_value
+    collection.upsert.side_effect = [InternalError("busy"), None]
+
+    mock_store.add_documents(["text"], [{"source": "a.txt"}], np.zeros((1, 2)))
+
+    assert collection.upsert.call_count == 2
+
+    collection.upsert.side_effect = InvalidArgumentError("bad metadata")
+    with pytest.raises(InvalidArgumentError):
+        mock_store.add_documents(["text"], [{"source": "a.txt"}], np.zeros((1, 2)))
+    assert collection.upsert.call_count == 3
+
+
+def test_deleted_collection_is_recreated_on_upsert(mock_store):
+    stale, fresh = Mock(), Mock()
+    stale.upsert.side_effect = NotFoundError("collection deleted")
+    mock_store.client.get_or_create_collection.side_effect = [stale, fresh]
+
+    mock_store.add_documents(["text"], [{"source": "a.txt"}], np.zeros((1, 2)))
+
+    assert fresh.upsert.call_count == 1
+
+
+def test_chunk_store_keeps_texts_out_of_chroma(tmp_path):
+    store = ChromaVectorStore(
+        persist_directory=str(tmp_path / "chroma"),
+        chunk_store_dir=str(tmp_path / "chunks"),
+    )
+    texts = ["alpha", "beta", "gamma"]
+    store.add_documents(texts, [{"source": "a.txt"}] * 3, np.eye(3))
+
+    stored = store.client.get_collection("documents").get(include=["documents"])
+    assert stored["documents"] == [None, None, None]
+    assert store.chunk_store is not None and store.chunk_store.count == 3
+
+    results = store.similarity_search_by_vectors(np.eye(3)[[2, 0]], k=1)
+    assert [[text for text, _, _ in hits] for hits in results] == [["gamma"], ["alpha"]]
+
+    store.delete(list(store.get_ids_by_source("a.txt")))
+    assert store.chunk_store.count == 0
+
+
+def test_search_fails_loudly_on_chunks_missing_from_the_chunk_store(tmp_path):
+    store = ChromaVectorStore(
+        persist_directory=str(tmp_path / "chroma"),
+        chunk_store_dir=str(tmp_path / "chunks"),
+    )
+    store.add_documents(["alpha", "beta"], [{"source": "a.txt"}] * 2, np.eye(2))
+    assert store.chunk_store is not None
+    store.chunk_store.delete(list(store.get_ids_by_source("a.txt")))
+
+    with pytest.raises(MissingChunkError, match="2 chunks are missing"):
+        store.similarity_search_by_vector(np.eye(2)[0], k=2)
+    with pytest.raises(MissingChunkError):
+        store.similarity_search_by_vectors(np.eye(2), k=1)